@@ -0,0 +1,23 @@
+import json
+from typing import Optional
+
+
+def log_frame(stream: str, data: str) -> str:
+    """
+    Encode one chunk of job output as a single line for the master.
+    The master tells log frames apart from the final JobResult line by the 'stream' key.
+    """
+    return json.dumps({"stream": stream, "data": data})
+
+
+def parse_log_frame(line: str) -> Optional[dict]:
+    """Return the decoded frame if `line` is a log frame, otherwise None"""
+    if not line.startswith('{"stream"'):
+        return None
+    try:
+        frame = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(frame, dict) and "stream" in frame and "data" in frame:
+        return frame
+    return None
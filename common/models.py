@@ -10,24 +10,59 @@ class JobStatus(str, Enum):
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+# Statuses a job never leaves once reached
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
 class NodeStatus(str, Enum):
     ACTIVE = "active"
     BUSY = "busy"
     OFFLINE = "offline"
     ERROR = "error"
 
+# Execution backends a worker can offer
+EXECUTORS = ("docker", "process")
+
 class ResourceRequirements(BaseModel):
     cpu_cores: int = Field(..., ge=1)
     memory_mb: int = Field(..., ge=128)
     gpu: bool = False
-    docker_image: str
+    docker_image: Optional[str] = None # required by the docker executor
     timeout: int = 3600
+    executor: str = "docker" # "docker", or "process" to run natively on the worker (trusted jobs only)
+
+class InputBlob(BaseModel):
+    digest: str # sha256 of the content, hex; must be uploaded to the master first
+    path: str   # where it appears, relative to /workspace (read-only)
+    size: int = 0 # filled in by the master
+
+class Artifact(BaseModel):
+    path: str   # relative to /workspace
+    size: int
+    chunks: List[str] = [] # sha256 of each chunk, in order; content lives in the master blob store
+
+class ParentWorkspace(BaseModel):
+    """A finished dependency's data as a child sees it under /workspace/parents/<job_id>"""
+    job_id: str
+    node_id: Optional[str] = None # node keeping its workspace, if any (mounted read-only when local)
+    artifacts: List[Artifact] = [] # its uploaded outputs, fetched instead on any other node
 
 class JobResult(BaseModel):
     exit_code: int
     stdout: str
     stderr: str
     execution_time_ms: int
+    rejected: bool = False # worker had no free slot; the job never started
+    artifacts: List[Artifact] = []
+    stages: Dict[str, float] = {} # worker-side stage durations (ms), see JOB_STAGES
+    image_digest: Optional[str] = None # image ID the job actually ran on (reported for cacheable jobs)
+    cached_from: Optional[str] = None # set on a memoized result: the job whose run produced it
+
+# Lifecycle stages timed per attempt, in order: the master's plus those reported in JobResult.stages
+JOB_STAGES = (
+    "submit_to_ready", "ready_to_placed", "placement", "ssh_connect", "payload_transfer",
+    "input_staging", "image_pull", "container_start", "run", "log_collection", "artifact_upload",
+    "result_parse",
+)
 
 class Job(BaseModel):
     id: str
@@ -36,6 +71,19 @@ class Job(BaseModel):
     resource_requirements: ResourceRequirements
     priority: int = 0
     dependencies: List[str] = []
+    tags: List[str] = []
+    inputs: List[InputBlob] = []
+    outputs: List[str] = [] # paths or glob patterns under /workspace collected after the run
+    env: Dict[str, str] = {} # extra environment variables for the job
+    cacheable: bool = False # deterministic: an identical earlier run's result may be reused
+    cache_key: Optional[str] = None # content hash the result cache knows this job by (cacheable jobs)
+    workflow_id: Optional[str] = None # set for tasks submitted together via /api/workflows
+    estimated_runtime_s: Optional[float] = None # submitter's estimate; otherwise learned per job name
+    critical_path_s: float = 0.0 # estimated time from this job's start to the end of its longest dependent chain
+    keep_workspace: bool = False # other jobs depend on it: the worker keeps its workspace for them
+    parent_workspaces: List[ParentWorkspace] = [] # filled in by the scheduler once dependencies complete
+    gang_size: int = 1 # nodes the job runs on at once, each with resource_requirements; see master/gang.py
+    gang_nodes: List[str] = [] # a gang job's nodes by rank (assigned_node is rank 0)
     status: JobStatus = JobStatus.QUEUED
     assigned_node: Optional[str] = None
     submitted_at: datetime = Field(default_factory=datetime.utcnow)
@@ -44,16 +92,52 @@ class Job(BaseModel):
     result: Optional[JobResult] = None
     retry_count: int = 0
     max_retries: int = 3
+    stages: Dict[str, float] = {} # per-stage latency (ms) of the latest attempt, see JOB_STAGES
+
+def attempt_id(started_at: Optional[datetime]) -> str:
+    """How workers tag one attempt of a job (its started_at), so a kill meant for it spares a retry"""
+    return started_at.isoformat() if started_at else ""
+
+class JobSummary(BaseModel):
+    """A job without its result, inputs and outputs: cheap to list in bulk"""
+    id: str
+    name: str
+    status: JobStatus
+    priority: int = 0
+    tags: List[str] = []
+    assigned_node: Optional[str] = None
+    submitted_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    exit_code: Optional[int] = None
+    execution_time_ms: Optional[int] = None
+    retry_count: int = 0
+
+    @classmethod
+    def of(cls, job: "Job") -> "JobSummary":
+        return cls(
+            id=job.id, name=job.name, status=job.status, priority=job.priority, tags=job.tags,
+            assigned_node=job.assigned_node, submitted_at=job.submitted_at,
+            started_at=job.started_at, completed_at=job.completed_at,
+            exit_code=job.result.exit_code if job.result else None,
+            execution_time_ms=job.result.execution_time_ms if job.result else None,
+            retry_count=job.retry_count,
+        )
 
 class NodeResources(BaseModel):
     cpu_total: int
-    cpu_available: int
+    cpu_available: float # smoothed by the worker, so fractions of a core are kept
     memory_total_mb: int
     memory_available_mb: int
     disk_total_gb: float
     disk_free_gb: float
     gpu_available: bool = False
     cached_images: List[str] = []
+    cached_blobs: List[str] = [] # input blob digests in the worker's local cache
+    # Layers of the cached images, sent when they change (None: as in the last report). The
+    # master moves them into its image layer index rather than keeping them on the node.
+    image_layers: Optional[Dict[str, List[str]]] = None # image tag or repo digest -> layer digests
+    layer_sizes: Optional[Dict[str, int]] = None # layer digest -> bytes
 
 class Node(BaseModel):
     id: str
@@ -67,3 +151,9 @@ class Node(BaseModel):
     last_heartbeat: Optional[datetime] = None
     jobs_running: List[str] = []
     jobs_completed: int = 0
+    metrics: Dict[str, Any] = {} # last worker-side metrics from heartbeat (e.g. image cache hits)
+
+class Heartbeat(BaseModel):
+    resources: Optional[NodeResources] = None
+    metrics: Dict[str, Any] = {}
+    events: List[Dict[str, Any]] = [] # job lifecycle events since the last delivered heartbeat, oldest first
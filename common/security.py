@@ -1,5 +1,9 @@
 import re
 
+# The executor daemon's shared secret, relative to the worker user's home and readable
+# by that user only; the master reads it over SSH and sends it with every request
+EXECUTOR_TOKEN_FILE = ".dcloud/executor_token"
+
 def validate_job_command(command: str) -> bool:
     """
     Validate job command to prevent injection or dangerous operations.
@@ -29,5 +33,21 @@ def validate_job_command(command: str) -> bool:
 def sanitize_filename(filename: str) -> str:
     return re.sub(r'[^a-zA-Z0-9_.-]', '', filename)
 
+def validate_blob_digest(digest: str) -> bool:
+    """Blob ids are lowercase hex sha256; anything else could escape the store directory"""
+    return bool(re.fullmatch(r'[0-9a-f]{64}', digest or ''))
 
+def validate_job_env(env: dict) -> bool:
+    """Plain variable names and values without NULs (which can't be passed to exec)"""
+    for key, value in env.items():
+        if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]{0,127}', key) or '\0' in value or len(value) > 32768:
+            return False
+    return True
 
+def validate_workspace_path(path: str) -> bool:
+    """A relative path that stays inside the job workspace"""
+    # ':' would break docker bind specs
+    if not path or len(path) > 255 or path.startswith('/') or '\0' in path or ':' in path:
+        return False
+    parts = path.split('/')
+    return all(part not in ('', '.', '..') for part in parts)
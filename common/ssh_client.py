@@ -1,8 +1,14 @@
 import paramiko
 import os
 import socket
-from typing import Tuple
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
 from .exceptions import SSHConnectionError
+from .timing import elapsed_ms
+
+# exec_command_stream keeps only this much of a command's stderr (the end of it)
+STDERR_TAIL_BYTES = 64 * 1024
 
 class SSHClient:
     def __init__(self, hostname: str, username: str, port: int = 22, key_filename: str = None):
@@ -25,6 +31,11 @@ class SSHClient:
         except (paramiko.AuthenticationException, paramiko.SSHException, socket.error) as e:
             raise SSHConnectionError(f"Failed to connect to {self.username}@{self.hostname}:{self.port} - {str(e)}")
 
+    def ensure_connected(self):
+        """Connect unless the transport is already up (pooled clients are reused)"""
+        if not self.client.get_transport() or not self.client.get_transport().is_active():
+            self.connect()
+
     def exec_command(self, command: str, timeout: int = None) -> Tuple[int, str, str]:
         if not self.client.get_transport() or not self.client.get_transport().is_active():
             self.connect()
@@ -36,6 +47,91 @@ class SSHClient:
         except Exception as e:
             raise SSHConnectionError(f"Failed to execute command '{command}' - {str(e)}")
 
+    def exec_command_stream(self, command: str, on_line: Callable[[str], None], timeout: int = None,
+                            stages: Optional[Dict[str, float]] = None) -> Tuple[int, str]:
+        """
+        Like exec_command, but hands each stdout line to on_line as soon as it arrives
+        instead of buffering the whole output. Returns (exit_status, stderr), where stderr
+        is the last STDERR_TAIL_BYTES of it.
+        If `stages` is given, the time to send the command is recorded as payload_transfer (ms).
+        """
+        self.ensure_connected()
+
+        done = threading.Event()
+        try:
+            sent = time.perf_counter()
+            stdin, stdout, stderr = self.client.exec_command(command, timeout=timeout)
+            if stages is not None:
+                stages["payload_transfer"] = elapsed_ms(sent)
+            # stdout and stderr share the channel's window: stderr left unread stalls stdout too
+            tail = bytearray()
+            reader = threading.Thread(target=self._drain_stderr, args=(stdout.channel, tail, done), daemon=True)
+            reader.start()
+            for line in stdout:
+                on_line(line.rstrip('\n'))
+            exit_status = stdout.channel.recv_exit_status()
+            reader.join(timeout=10)
+            return exit_status, bytes(tail).decode(errors="replace").strip()
+        except Exception as e:
+            raise SSHConnectionError(f"Failed to execute command '{command}' - {str(e)}")
+        finally:
+            done.set()
+
+    def _drain_stderr(self, channel, tail: bytearray, done: threading.Event):
+        """Read a channel's stderr to EOF, keeping the last STDERR_TAIL_BYTES in tail"""
+        while True:
+            try:
+                data = channel.recv_stderr(65536)
+            except socket.timeout:
+                if done.is_set():
+                    return
+                continue # quiet stderr; the stdout side enforces the command timeout
+            except Exception:
+                return
+            if not data:
+                return
+            tail += data
+            del tail[:-STDERR_TAIL_BYTES]
+
+    def open_tunnel(self, port: int, host: str = "127.0.0.1", timeout: int = 10):
+        """Open a forwarded channel to host:port as seen from the remote machine"""
+        self.ensure_connected()
+
+        try:
+            return self.client.get_transport().open_channel(
+                "direct-tcpip", (host, port), ("127.0.0.1", 0), timeout=timeout
+            )
+        except Exception as e:
+            raise SSHConnectionError(f"Failed to open tunnel to {host}:{port} on {self.hostname} - {str(e)}")
+
+    def stream_channel(self, channel, request: str, on_line: Callable[[str], None], timeout: int = None,
+                       stages: Optional[Dict[str, float]] = None):
+        """
+        Send one request line over an open channel and hand back response lines until EOF.
+        If `stages` is given, the time to send the request is recorded as payload_transfer (ms).
+        """
+        try:
+            channel.settimeout(timeout)
+            sent = time.perf_counter()
+            channel.sendall((request + "\n").encode())
+            if stages is not None:
+                stages["payload_transfer"] = elapsed_ms(sent)
+            buffer = b""
+            while True:
+                data = channel.recv(65536)
+                if not data:
+                    break
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    on_line(line.decode(errors="replace"))
+            if buffer:
+                on_line(buffer.decode(errors="replace"))
+        except Exception as e:
+            raise SSHConnectionError(f"Tunnel request to {self.hostname} failed - {str(e)}")
+        finally:
+            channel.close()
+
     def close(self):
         self.client.close()
 
@@ -0,0 +1,16 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+def elapsed_ms(since: float) -> float:
+    """Milliseconds since a time.perf_counter() reading"""
+    return round((time.perf_counter() - since) * 1000, 1)
+
+@contextmanager
+def timed(stages: Dict[str, float], name: str):
+    """Add the duration of the block to stages[name] (ms), also if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = round(stages.get(name, 0.0) + elapsed_ms(start), 1)
@@ -1,23 +1,55 @@
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import json
+import os
+import uuid
 import threading
+import zlib
 
-from common.models import Job, Node, JobStatus, ResourceRequirements
+from common.models import Job, Node, JobStatus, ResourceRequirements, Heartbeat, InputBlob, TERMINAL_STATUSES, EXECUTORS, JOB_STAGES
+from common.exceptions import NodeNotFoundError
+from common.security import validate_blob_digest, validate_workspace_path, validate_job_command, validate_job_env
 from master.cluster_manager import ClusterManager
-from master.job_scheduler import JobScheduler
+from master.job_scheduler import JobScheduler, RECENT_FINISHED
+from master.blob_store import BlobStore, Inflater, InflatedTooLarge
+from master.trace import TraceRecorder
+from master.result_cache import ResultCache
+from master.workflow import topological_order
+from master.job_record import JobRecord, dumps, job_json, jobs_json, summarize
 
 app = FastAPI(title="DistributedCloud Master API")
 
+# Optional scheduling trace for offline replay (scripts/replay_trace.py)
+TRACE_FILE = os.environ.get("DCLOUD_TRACE_FILE")
+trace = TraceRecorder(TRACE_FILE) if TRACE_FILE else None
+
 # Global instances
-cluster_manager = ClusterManager()
+cluster_manager = ClusterManager(trace)
 
 # Metrics Integration
 from master.metrics import MetricsServer
 metrics_server = MetricsServer()
 
-scheduler = JobScheduler(cluster_manager, metrics_server)
+# Memoized results of jobs submitted with cacheable=true
+result_cache = ResultCache(ttl_s=float(os.environ.get("DCLOUD_RESULT_CACHE_TTL_S", "86400")),
+                           max_bytes=int(float(os.environ.get("DCLOUD_RESULT_CACHE_MB", "64")) * 1024 * 1024))
+
+# Placement worker processes; 0 keeps placement in the scheduler thread
+PLACEMENT_SHARDS = int(os.environ.get("DCLOUD_PLACEMENT_SHARDS", "0"))
+
+scheduler = JobScheduler(cluster_manager, metrics_server, trace=trace, result_cache=result_cache,
+                         placement_shards=PLACEMENT_SHARDS)
+
+# Master-side state that lives on disk (input blobs, ...)
+DATA_DIR = os.environ.get("DCLOUD_DATA_DIR", "data")
+blob_store = BlobStore(os.path.join(DATA_DIR, "blobs"))
+# Largest plain content a deflate-encoded blob upload may inflate to
+MAX_INFLATED_BYTES = int(float(os.environ.get("DCLOUD_MAX_INFLATED_MB", "4096")) * 1024 * 1024)
 
 # Dashboard Integration
 from master.dashboard.router import router as dashboard_router, context
@@ -34,13 +66,15 @@ async def lifespan(app: FastAPI):
     metrics_server.start()
     
     # Start metrics updater thread
-    updater_thread = threading.Thread(target=metrics_server.update_cluster_stats, args=(cluster_manager,), daemon=True)
+    updater_thread = threading.Thread(target=metrics_server.update_cluster_stats, args=(cluster_manager, scheduler), daemon=True)
     updater_thread.start()
     
     yield
     # Shutdown
     scheduler.stop()
     metrics_server.running = False
+    if trace:
+        trace.close()
 
 app.router.lifespan_context = lifespan
 
@@ -59,9 +93,19 @@ async def get_node(node_id: str):
     return cluster_manager.get_node(node_id)
 
 @app.post("/api/nodes/{node_id}/heartbeat")
-async def heartbeat(node_id: str):
-    cluster_manager.update_heartbeat(node_id)
-    return {"status": "ok"}
+async def heartbeat(node_id: str, report: Optional[Heartbeat] = None):
+    try:
+        cluster_manager.update_heartbeat(node_id, report)
+    except NodeNotFoundError:
+        # e.g. after a master restart; the agent re-registers on 404
+        raise HTTPException(status_code=404, detail="Node not registered")
+    # Piggyback pre-pull hints: images queued jobs want that this node lacks
+    node = cluster_manager.get_node(node_id)
+    return {"status": "ok", "prepull": scheduler.image_hints(node)}
+
+@app.get("/api/nodes/{node_id}/events")
+async def get_node_events(node_id: str):
+    return cluster_manager.recent_events(node_id)
 
 # --- Job Endpoints ---
 
@@ -72,50 +116,474 @@ class JobSubmission(BaseModel):
     priority: int = 0
     dependencies: List[str] = []
     docker_image: str = "python:3.9"
+    inputs: List[InputBlob] = []
+    outputs: List[str] = []
+    tags: List[str] = []
+    env: Dict[str, str] = {}
+    cacheable: bool = False # the job is deterministic: reuse an identical job's result
+    gang_size: int = Field(1, ge=1, le=256) # >1: run on this many nodes at once (MPI, distributed training)
 
-@app.post("/api/jobs", response_model=Job)
-async def submit_job(submission: JobSubmission):
-    from common.security import validate_job_command
+class WorkflowTask(JobSubmission):
+    key: str # local name, unique within the workflow
+    after: List[str] = [] # keys of tasks in this workflow that must complete first
+    estimated_runtime_s: Optional[float] = Field(None, ge=0)
+
+class WorkflowSubmission(BaseModel):
+    name: str = "workflow"
+    tasks: List[WorkflowTask]
+    tags: List[str] = []
+
+# Bulk submissions are validated and queued this many jobs at a time
+BULK_CHUNK_SIZE = 500
+
+def _resolve_inputs(inputs: List[InputBlob]) -> List[InputBlob]:
+    """Check that every input blob was uploaded and record its size for placement"""
+    for blob in inputs:
+        if not validate_blob_digest(blob.digest) or not validate_workspace_path(blob.path):
+            raise ValueError(f"Invalid input: {blob.path} ({blob.digest})")
+        size = blob_store.size(blob.digest)
+        if size is None:
+            raise ValueError(f"Input blob {blob.digest} not uploaded; PUT /api/blobs/{{digest}} first")
+        blob.size = size
+    return inputs
+
+def _build_job(submission: JobSubmission) -> Job:
+    """Validate a submission and turn it into a queued-to-be Job; raises ValueError"""
     if not validate_job_command(submission.command):
-         raise HTTPException(status_code=400, detail="Invalid command: Potential security risk or invalid format.")
-         
-    import uuid
-    job = Job(
+        raise ValueError("Invalid command: Potential security risk or invalid format.")
+    reqs = submission.resource_requirements
+    if reqs.executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {reqs.executor}")
+    if reqs.executor == "docker" and not reqs.docker_image:
+        raise ValueError("docker_image is required for the docker executor")
+    inputs = _resolve_inputs(submission.inputs)
+    for pattern in submission.outputs:
+        if not validate_workspace_path(pattern):
+            raise ValueError(f"Invalid output path: {pattern}")
+    if not validate_job_env(submission.env):
+        raise ValueError("Invalid environment: names must be [A-Za-z_][A-Za-z0-9_]*")
+    if submission.gang_size > 1:
+        active = len(cluster_manager.get_active_nodes())
+        if submission.gang_size > active:
+            raise ValueError(f"gang_size {submission.gang_size} exceeds the {active} active nodes")
+
+    # The image comes from resource_requirements; JobSubmission.docker_image is unused
+    return Job(
         id=str(uuid.uuid4()),
         name=submission.name,
         command=submission.command,
         resource_requirements=submission.resource_requirements,
         priority=submission.priority,
         dependencies=submission.dependencies,
-        # For now, default image if not in submission (Wait, submission has it)
-        # Actually ResourceRequirements has it too? 
-        # In models.py: ResourceRequirements has docker_image.
-        # So we should use that.
+        tags=submission.tags,
+        inputs=inputs,
+        outputs=submission.outputs,
+        env=submission.env,
+        cacheable=submission.cacheable,
+        gang_size=submission.gang_size,
     )
-    # The models.py definitions might be duplicating docker_image? 
-    # Let's check models.py content again in my memory.
-    # ResourceRequirements has docker_image. Job also has docker_image field?
-    # No, Job definition in my previous tool call:
-    # class Job(BaseModel): ... resource_requirements: ResourceRequirements ... 
-    # No top-level docker_image in Job class in the prev tool call, 
-    # WAIT. I need to be careful.
-    # Let's check the models.py content I wrote.
-    # Yes, Job has: id, name, command, resource_requirements, priority...
-    # It does NOT have docker_image at top level. 
-    # But ResourceRequirements DOES.
-    
+
+@app.post("/api/jobs", response_model=Job)
+async def submit_job(submission: JobSubmission):
+    try:
+        job = _build_job(submission)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return scheduler.submit_job(job)
 
-@app.get("/api/jobs", response_model=List[Job])
-async def list_jobs():
-    return scheduler.list_jobs()
+class _BodyReadingStream(StreamingResponse):
+    """
+    A StreamingResponse whose body may go on reading the request. The stock one
+    also waits on receive() for a disconnect, which would swallow request chunks;
+    a disconnect still ends the body through request.stream() raising.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+@app.post("/api/jobs/bulk")
+async def submit_jobs_bulk(request: Request):
+    """
+    Submit many jobs in one request: a JSON array of submissions, or NDJSON (one
+    per line, Content-Type: application/x-ndjson) which is parsed as it arrives.
+    Jobs are validated and queued in chunks under one scheduler lock each. The
+    response is NDJSON, one line per submission: {"index", "id"} or {"index",
+    "error"}; invalid submissions don't stop the rest. Lines are sent as each chunk
+    is queued, so an error line comes back with the chunk it falls in (right away
+    while that chunk has no jobs yet); lines are in input order either way.
+    """
+    ndjson = request.headers.get("content-type", "").startswith("application/x-ndjson")
+    items = None
+    if not ndjson:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+
+    held = [] # (index, Job or error line) of the chunk being filled, in input order
+    jobs = 0 # Jobs in held
+
+    def release() -> bytes:
+        """Queue the held jobs and return the chunk's lines"""
+        nonlocal jobs
+        queued = [item for _, item in held if isinstance(item, Job)]
+        if queued:
+            scheduler.submit_jobs(queued)
+        lines = b"".join(dumps({"index": index, "id": item.id} if isinstance(item, Job) else item) + b"\n"
+                         for index, item in held)
+        held.clear()
+        jobs = 0
+        return lines
+
+    def add(index: int, raw) -> bytes:
+        nonlocal jobs
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError("Not a JSON object")
+            held.append((index, _build_job(JobSubmission(**raw))))
+            jobs += 1
+        except ValueError as e: # pydantic's ValidationError is a ValueError
+            held.append((index, {"index": index, "error": str(e)}))
+        return release() if jobs >= BULK_CHUNK_SIZE or not jobs else b""
+
+    async def results():
+        if ndjson:
+            index, buffer = 0, b""
+            async for chunk in request.stream():
+                buffer += chunk
+                lines = buffer.split(b"\n")
+                buffer = lines.pop()
+                out = []
+                for line in lines:
+                    if line.strip():
+                        out.append(add(index, _parse_line(line)))
+                        index += 1
+                if any(out):
+                    yield b"".join(out)
+            if buffer.strip():
+                out = add(index, _parse_line(buffer))
+                if out:
+                    yield out
+        else:
+            for index, raw in enumerate(items):
+                out = add(index, raw)
+                if out:
+                    yield out
+        if held:
+            yield release()
+
+    return _BodyReadingStream(results(), media_type="application/x-ndjson")
+
+@app.post("/api/workflows")
+async def submit_workflow(submission: WorkflowSubmission):
+    """
+    Submit a whole DAG at once. Tasks name each other by key in `after`;
+    `dependencies` may still list IDs of existing jobs. The graph is checked for
+    cycles up front, and ready tasks are queued by remaining critical path
+    (estimated_runtime_s, else the learnt run time of jobs with the same name).
+    """
+    tasks = {}
+    for task in submission.tasks:
+        if task.key in tasks:
+            raise HTTPException(status_code=400, detail=f"Duplicate task key '{task.key}'")
+        tasks[task.key] = task
+    try:
+        topological_order({key: task.after for key, task in tasks.items()})
+        for task in tasks.values():
+            missing = [dep for dep in task.dependencies if not scheduler.lookup(dep)]
+            if missing:
+                raise ValueError(f"Task '{task.key}' depends on unknown job(s): {', '.join(missing)}")
+        jobs = {}
+        for key, task in tasks.items():
+            if task.name == "job":
+                task.name = key
+            task.tags = task.tags + submission.tags
+            jobs[key] = _build_job(task)
+            jobs[key].estimated_runtime_s = task.estimated_runtime_s
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for key, task in tasks.items():
+        jobs[key].dependencies = jobs[key].dependencies + [jobs[dep].id for dep in task.after]
+
+    workflow_id = str(uuid.uuid4())
+    scheduler.submit_workflow(workflow_id, jobs)
+    return {
+        "workflow_id": workflow_id,
+        "name": submission.name,
+        "jobs": {key: job.id for key, job in jobs.items()},
+        "critical_path_s": max((job.critical_path_s for job in jobs.values()), default=0.0),
+    }
+
+@app.get("/api/workflows/{workflow_id}")
+async def get_workflow(workflow_id: str):
+    """Status of each task in a workflow, by key"""
+    tasks = scheduler.workflows.get(workflow_id)
+    if tasks is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    jobs = {key: scheduler.lookup(job_id) for key, job_id in tasks.items()}
+    return {
+        "workflow_id": workflow_id,
+        "tasks": {key: {"id": job.id, "status": job.status, "critical_path_s": job.critical_path_s}
+                  for key, job in jobs.items()},
+        "done": all(job.status in TERMINAL_STATUSES for job in jobs.values()),
+    }
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None # reported as a per-line error
+
+@app.get("/api/jobs")
+async def list_jobs(response: Response, status: Optional[JobStatus] = None, node: Optional[str] = None,
+                    name: Optional[str] = None, tag: Optional[str] = None,
+                    submitted_after: Optional[datetime] = None, submitted_before: Optional[datetime] = None,
+                    cursor: Optional[int] = None, limit: int = Query(100, ge=1, le=1000),
+                    view: str = "full", fields: Optional[str] = None):
+    """
+    Newest-first page of jobs matching the filters. The next page's cursor is in
+    the X-Next-Cursor header (absent on the last page). view=summary drops result,
+    inputs and outputs; fields=a,b,c returns only those fields. Encoded here rather
+    than through response models: archived jobs are already JSON.
+    """
+    jobs, next_cursor = scheduler.query_jobs(
+        status=status, node=node, name=name, tag=tag,
+        submitted_after=_as_utc(submitted_after), submitted_before=_as_utc(submitted_before),
+        cursor=cursor, limit=limit,
+    )
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    if fields:
+        include = {f.strip() for f in fields.split(",") if f.strip()}
+        content = dumps([job.fields(include) if isinstance(job, JobRecord) else job.dict(include=include) for job in jobs])
+    elif view == "summary":
+        content = dumps([summarize(job).dict() for job in jobs])
+    else:
+        content = jobs_json(jobs)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Jobs carry naive UTC timestamps
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+@app.get("/api/jobs/slow")
+async def slow_jobs(limit: int = Query(20, ge=1, le=RECENT_FINISHED), stage: Optional[str] = None):
+    """
+    Slowest of the recently finished jobs with their per-stage latency breakdown (ms),
+    ranked by total stage time or, with stage=, by that one stage.
+    """
+    if stage is not None and stage not in JOB_STAGES:
+        raise HTTPException(status_code=400, detail=f"Unknown stage '{stage}'; one of {', '.join(JOB_STAGES)}")
+    return scheduler.slowest_jobs(limit=limit, stage=stage)
+
+@app.get("/api/result-cache")
+async def result_cache_stats():
+    """Hit/miss/merge counters and size of the memoized result cache"""
+    return result_cache.stats()
 
 @app.get("/api/jobs/{job_id}", response_model=Job)
 async def get_job(job_id: str):
+    job = scheduler.lookup(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return Response(content=job_json(job), media_type="application/json")
+
+# --- Blob Endpoints (job inputs and output artifact chunks) ---
+
+@app.post("/api/blobs/missing")
+async def missing_blobs(digests: List[str]):
+    """Which of these blobs the store doesn't have yet; lets uploaders skip the rest"""
+    return {"missing": [d for d in digests if validate_blob_digest(d) and not blob_store.has(d)]}
+
+@app.put("/api/blobs/{digest}")
+async def upload_blob(digest: str, request: Request):
+    """
+    Upload content addressed by its sha256; re-uploading an existing blob is a no-op.
+    The body may be sent with Content-Encoding: deflate; the digest is of the plain content.
+    """
+    if not validate_blob_digest(digest):
+        raise HTTPException(status_code=400, detail="Blob id must be a lowercase hex sha256")
+    if blob_store.has(digest):
+        return {"digest": digest, "size": blob_store.size(digest)}
+    inflater = Inflater(MAX_INFLATED_BYTES) if request.headers.get("content-encoding") == "deflate" else None
+    writer = blob_store.writer(digest)
+    try:
+        async for chunk in request.stream():
+            if inflater:
+                for piece in inflater.feed(chunk):
+                    writer.write(piece)
+            else:
+                writer.write(chunk)
+        if inflater:
+            writer.write(inflater.flush())
+    except zlib.error as e:
+        writer.abort()
+        raise HTTPException(status_code=400, detail=f"Bad deflate body: {e}")
+    except InflatedTooLarge as e:
+        writer.abort()
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        writer.abort()
+        raise
+    try:
+        size = writer.commit()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"digest": digest, "size": size}
+
+@app.get("/api/blobs/{digest}")
+async def download_blob(digest: str):
+    if not validate_blob_digest(digest) or not blob_store.has(digest):
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return FileResponse(blob_store.path(digest), media_type="application/octet-stream")
+
+# --- Artifact Endpoints ---
+
+def _job_artifacts(job_id: str):
     job = scheduler.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    return job.result.artifacts if job.result else []
+
+@app.get("/api/jobs/{job_id}/artifacts")
+async def list_artifacts(job_id: str):
+    return [{"path": a.path, "size": a.size} for a in _job_artifacts(job_id)]
+
+@app.get("/api/jobs/{job_id}/artifacts/{path:path}")
+async def download_artifact(job_id: str, path: str):
+    artifact = next((a for a in _job_artifacts(job_id) if a.path == path), None)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    if not all(blob_store.has(d) for d in artifact.chunks):
+        raise HTTPException(status_code=410, detail="Artifact content no longer available")
+
+    def chunks():
+        for digest in artifact.chunks:
+            with open(blob_store.path(digest), "rb") as f:
+                yield f.read()
+
+    filename = os.path.basename(path)
+    return StreamingResponse(chunks(), media_type="application/octet-stream",
+                             headers={"Content-Length": str(artifact.size),
+                                      "Content-Disposition": f'attachment; filename="{filename}"'})
+
+# --- Watch Endpoints ---
+
+# Idle streams get a keepalive this often so proxies and clients can tell it's alive
+WATCH_KEEPALIVE_S = 15
+
+@app.get("/api/jobs/{job_id}/wait", response_model=Job)
+async def wait_for_job(job_id: str, timeout: float = Query(30, ge=0, le=300)):
+    """Long-poll: returns the job once it is finished, or as it is after `timeout` seconds"""
+    job = scheduler.lookup(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        seen = scheduler.events.last_seq # before the check, so a transition in between still wakes us
+        remaining = deadline - loop.time()
+        if job.status in TERMINAL_STATUSES or remaining <= 0:
+            return Response(content=job_json(job), media_type="application/json")
+        await scheduler.events.wait(seen, remaining)
+
+def _event_filter(job_ids: Optional[List[str]], tags: Optional[List[str]]):
+    ids, tag_set = set(job_ids or ()), set(tags or ())
+    if not ids and not tag_set:
+        return None
+    return lambda event: event["job_id"] in ids or bool(tag_set.intersection(event["tags"]))
+
+@app.get("/api/events")
+async def watch_events(request: Request, job_id: Optional[List[str]] = Query(None),
+                       tag: Optional[List[str]] = Query(None), since: Optional[int] = None):
+    """
+    Server-Sent Events stream of job state transitions, optionally limited to some
+    job ids and/or tags. Each event's id is its sequence number; reconnect with
+    `since` (or Last-Event-ID) to resume. If the gap is too old to replay, a
+    `reset` event tells the client to re-read job state before continuing.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    if since is None:
+        since = scheduler.events.last_seq # only new transitions
+    return StreamingResponse(_stream_events(since, _event_filter(job_id, tag)), media_type="text/event-stream")
+
+async def _stream_events(since: int, match):
+    while True:
+        events, since, missed = scheduler.events.read(since, match)
+        if missed:
+            yield f"event: reset\ndata: {since}\n\n"
+        for event in events:
+            yield f"id: {event['seq']}\nevent: job\ndata: {json.dumps(event)}\n\n"
+        if not events and not await scheduler.events.wait(since, WATCH_KEEPALIVE_S):
+            yield ": keepalive\n\n"
+
+@app.websocket("/api/events/ws")
+async def watch_events_ws(websocket: WebSocket):
+    """
+    WebSocket flavour of /api/events. The client first sends
+    {"job_ids": [...], "tags": [...], "since": seq} (all optional); the server then
+    sends each matching transition as JSON, {"type": "reset", "seq": n} after a
+    gap too old to replay, and {"type": "keepalive"} when idle.
+    """
+    await websocket.accept()
+    try:
+        spec = await websocket.receive_json()
+        since = spec.get("since")
+        if since is None:
+            since = scheduler.events.last_seq
+        match = _event_filter(spec.get("job_ids"), spec.get("tags"))
+        while True:
+            events, since, missed = scheduler.events.read(since, match)
+            if missed:
+                await websocket.send_json({"type": "reset", "seq": since})
+            for event in events:
+                await websocket.send_json(dict(event, type="job"))
+            if not events and not await scheduler.events.wait(since, WATCH_KEEPALIVE_S):
+                await websocket.send_json({"type": "keepalive"})
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/jobs/{job_id}/logs")
+async def get_job_logs(job_id: str, request: Request, follow: bool = False, stream: Optional[str] = None, since: int = 0):
+    """
+    Buffered output of a job. With follow=1 the response is a Server-Sent Events
+    stream that stays open until the job finishes; reconnecting clients can pass
+    `since` (or Last-Event-ID) to resume without duplicates.
+    """
+    if not scheduler.lookup(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    streams = {stream} if stream else None
+
+    if not follow:
+        return PlainTextResponse(scheduler.log_store.text(job_id, streams))
+
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(_follow_logs(job_id, since, streams), media_type="text/event-stream")
+
+async def _follow_logs(job_id: str, since: int, streams):
+    while True:
+        entries = scheduler.log_store.read(job_id, after=since, streams=streams)
+        for seq, name, data in entries:
+            since = seq
+            payload = "\n".join(f"data: {line}" for line in data.split("\n"))
+            yield f"id: {seq}\nevent: {name}\n{payload}\n\n"
+
+        if not entries:
+            job = scheduler.lookup(job_id)
+            if not job or job.status in TERMINAL_STATUSES:
+                # Drain anything that raced in with the final status
+                if not scheduler.log_store.read(job_id, after=since, streams=streams):
+                    status = job.status.value if job else "unknown"
+                    yield f"event: end\ndata: {status}\n\n"
+                    return
+                continue
+            await asyncio.sleep(0.25)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import tempfile
+import zlib
+from typing import Iterable, Iterator, Optional
+
+INFLATE_PIECE = 1024 * 1024 # most plain bytes one step of Inflater produces
+
+class InflatedTooLarge(ValueError):
+    pass
+
+class Inflater:
+    """
+    Decodes a deflate upload in bounded pieces and stops once the plain content
+    passes max_bytes, so a small, highly compressed body can't fill memory or disk.
+    """
+    def __init__(self, max_bytes: int):
+        self.decompressor = zlib.decompressobj()
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            yield self._count(self.decompressor.decompress(data, INFLATE_PIECE))
+            data = self.decompressor.unconsumed_tail
+
+    def flush(self) -> bytes:
+        return self._count(self.decompressor.flush())
+
+    def _count(self, piece: bytes) -> bytes:
+        self.size += len(piece)
+        if self.size > self.max_bytes:
+            raise InflatedTooLarge(f"Inflated content exceeds {self.max_bytes} bytes")
+        return piece
+
+class BlobWriter:
+    """Incremental write of one blob; nothing is visible until commit() verifies the hash"""
+    def __init__(self, target: str, digest: str):
+        self.target = target
+        self.digest = digest
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".upload-")
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> int:
+        self.file.close()
+        if self.hasher.hexdigest() != self.digest:
+            self.abort()
+            raise ValueError(f"Content hashes to {self.hasher.hexdigest()}, not {self.digest}")
+        os.replace(self.tmp_path, self.target)
+        return self.size
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+
+
+class BlobStore:
+    """
+    Content-addressed file store on the master: each blob lives at
+    <root>/<first two hex chars>/<sha256>. Writes are verified against the
+    claimed digest and land atomically, so a blob that exists is always complete.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def size(self, digest: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path(digest))
+        except OSError:
+            return None
+
+    def writer(self, digest: str) -> BlobWriter:
+        return BlobWriter(self.path(digest), digest)
+
+    def put(self, digest: str, chunks: Iterable[bytes]) -> int:
+        """Store content streamed as chunks; raises ValueError if it doesn't hash to `digest`"""
+        writer = self.writer(digest)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except Exception:
+            writer.abort()
+            raise
+        return writer.commit()
@@ -1,18 +1,42 @@
-from typing import Dict, List, Optional
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
-from common.models import Node, NodeStatus
+from common.models import Node, NodeStatus, Heartbeat
 from common.exceptions import NodeNotFoundError
+from master.image_index import ImageLayerIndex
 
 class ClusterManager:
-    def __init__(self):
+    def __init__(self, trace=None):
+        # Optional master.trace.TraceRecorder for node joins, capacity changes and departures
+        self.trace = trace
         # In-memory registry for now, will move to DB later
         self.nodes: Dict[str, Node] = {}
+        # Scheduler reservations per node: node_id -> [cpu_cores, memory_mb]
+        self.reserved: Dict[str, List[float]] = {}
+        # Last capacity the worker itself reported: node_id -> (cpu_available, memory_available_mb)
+        self.reported: Dict[str, tuple] = {}
+        # Recent job lifecycle events delivered with heartbeats, per node
+        self.events: Dict[str, deque] = {}
+        # Running cluster totals for the dashboard, adjusted per node change instead of summed per request
+        self.contrib: Dict[str, tuple] = {} # node_id -> (active, cpu_total, cpu_used) as counted
+        self.totals = {"active_nodes": 0, "cpu_total": 0, "cpu_used": 0.0}
+        self.totals_lock = threading.Lock()
+        # Image layers cached on each node, for placement by bytes left to pull
+        self.image_index = ImageLayerIndex()
 
     def register_node(self, node: Node) -> Node:
         """Register a new node or update existing one"""
         node.last_heartbeat = datetime.utcnow()
         node.status = NodeStatus.ACTIVE
         self.nodes[node.id] = node
+        if node.resources:
+            self._index_layers(node)
+            self.reported[node.id] = (node.resources.cpu_available, node.resources.memory_available_mb)
+            self._refresh_available(node)
+        self._account(node)
+        if self.trace:
+            self.trace.node(node, registered=True)
         print(f"Node registered: {node.id} ({node.hostname})")
         return node
 
@@ -26,18 +50,110 @@ class ClusterManager:
         """List all registered nodes"""
         return list(self.nodes.values())
 
-    def update_heartbeat(self, node_id: str):
-        """Update last heartbeat for a node"""
+    def update_heartbeat(self, node_id: str, heartbeat: Optional[Heartbeat] = None):
+        """Update last heartbeat for a node, applying any reported state"""
         if node_id in self.nodes:
-            self.nodes[node_id].last_heartbeat = datetime.utcnow()
-            self.nodes[node_id].status = NodeStatus.ACTIVE
+            node = self.nodes[node_id]
+            node.last_heartbeat = datetime.utcnow()
+            node.status = NodeStatus.ACTIVE
+            if heartbeat:
+                self._apply_heartbeat(node, heartbeat)
+                if self.trace:
+                    self.trace.node(node)
+            self._account(node)
         else:
             raise NodeNotFoundError(f"Cannot update heartbeat: Node {node_id} not known")
 
+    def _apply_heartbeat(self, node: Node, heartbeat: Heartbeat):
+        if heartbeat.events:
+            self.events.setdefault(node.id, deque(maxlen=200)).extend(heartbeat.events)
+            for event in heartbeat.events:
+                if event.get("type") == "events_dropped":
+                    print(f"Node {node.id} dropped {event.get('count')} events while the master was unreachable")
+        if heartbeat.metrics:
+            node.metrics = heartbeat.metrics
+        reported = heartbeat.resources
+        if reported:
+            self.reported[node.id] = (reported.cpu_available, reported.memory_available_mb)
+            node.resources = reported
+            self._index_layers(node)
+            self._refresh_available(node)
+
+    def _index_layers(self, node: Node):
+        """Move reported layer lists into the image index; the node keeps its tags only"""
+        resources = node.resources
+        if resources.image_layers is not None:
+            self.image_index.update(node.id, resources.image_layers, resources.layer_sizes or {})
+        resources.image_layers = resources.layer_sizes = None
+
+    def recent_events(self, node_id: str) -> List[Dict[str, Any]]:
+        return list(self.events.get(node_id, ()))
+
+    def _refresh_available(self, node: Node):
+        """
+        Available capacity is the tighter of what the worker reports (smoothed, already
+        net of its running jobs) and what is left after the scheduler's reservations
+        (which covers jobs dispatched since that report).
+        """
+        reported_cpu, reported_mem = self.reported.get(node.id, (node.resources.cpu_total, node.resources.memory_total_mb))
+        reserved_cpu, reserved_mem = self.reserved.get(node.id, (0, 0))
+        node.resources.cpu_available = max(0.0, min(reported_cpu, node.resources.cpu_total - reserved_cpu))
+        node.resources.memory_available_mb = max(0, min(reported_mem, node.resources.memory_total_mb - reserved_mem))
+        self._account(node)
+
+    def _account(self, node: Node):
+        """Move this node's share of the cluster totals to its current state"""
+        active = node.status == NodeStatus.ACTIVE and node.resources is not None
+        current = (active, node.resources.cpu_total, node.resources.cpu_total - node.resources.cpu_available) if active else (False, 0, 0.0)
+        self._apply_contrib(node.id, current)
+
+    def _apply_contrib(self, node_id: str, current: Optional[tuple]):
+        """current=None removes the node from the totals"""
+        with self.totals_lock: # reservations change from scheduler threads
+            previous = self.contrib.pop(node_id, (False, 0, 0.0))
+            if current is None:
+                current = (False, 0, 0.0)
+            else:
+                self.contrib[node_id] = current
+            self.totals["active_nodes"] += int(current[0]) - int(previous[0])
+            self.totals["cpu_total"] += current[1] - previous[1]
+            self.totals["cpu_used"] += current[2] - previous[2]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "node_count": len(self.nodes),
+            "active_nodes": self.totals["active_nodes"],
+            "cpu_total": self.totals["cpu_total"],
+            "cpu_used": round(max(0.0, self.totals["cpu_used"]), 1),
+        }
+
+    def reserve(self, node: Node, cpu_cores: float, memory_mb: int):
+        """Hold capacity on a node for a job being dispatched"""
+        reserved = self.reserved.setdefault(node.id, [0, 0])
+        reserved[0] += cpu_cores
+        reserved[1] += memory_mb
+        if node.resources:
+            self._refresh_available(node)
+
+    def release(self, node: Node, cpu_cores: float, memory_mb: int):
+        reserved = self.reserved.get(node.id)
+        if reserved:
+            reserved[0] = max(0, reserved[0] - cpu_cores)
+            reserved[1] = max(0, reserved[1] - memory_mb)
+        if node.resources:
+            self._refresh_available(node)
+
     def deregister_node(self, node_id: str):
         """Remove a node from the cluster"""
         if node_id in self.nodes:
             del self.nodes[node_id]
+            self.reserved.pop(node_id, None)
+            self.reported.pop(node_id, None)
+            self.events.pop(node_id, None)
+            self.image_index.remove(node_id)
+            self._apply_contrib(node_id, None)
+            if self.trace:
+                self.trace.down(node_id)
             print(f"Node deregistered: {node_id}")
 
     def get_active_nodes(self) -> List[Node]:
@@ -50,5 +166,8 @@ class ClusterManager:
             else:
                 if node.status != NodeStatus.OFFLINE:
                     node.status = NodeStatus.OFFLINE
+                    self._account(node)
+                    if self.trace:
+                        self.trace.down(node.id)
                     print(f"Node {node.id} marked as OFFLINE (missed heartbeat)")
         return active_nodes
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Request, Depends
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
+import asyncio
+import json
 import os
 
 router = APIRouter()
@@ -19,6 +21,7 @@ templates = Jinja2Templates(directory=templates_dir)
 # We'll use the API endpoints themselves or shared singleton?
 # Shared singleton is easiest for this scale.
 
+from master.job_record import summarize
 from master.cluster_manager import ClusterManager
 from master.job_scheduler import JobScheduler
 
@@ -30,28 +33,86 @@ from master.job_scheduler import JobScheduler
 
 context = {} # Will be populated by api_server.py
 
+RECENT_JOBS = 50
+MAX_NODES = 200
+STATS_INTERVAL_S = 2
+
 def get_context():
     return context
 
+def _stats(cluster_manager: ClusterManager, job_scheduler: JobScheduler) -> dict:
+    # Both sides keep running counters, so this is O(1) regardless of history
+    cluster = cluster_manager.stats() if cluster_manager else {"node_count": 0, "cpu_total": 0, "cpu_used": 0.0}
+    jobs = job_scheduler.job_counts() if job_scheduler else {"total": 0}
+    return {
+        "node_count": cluster["node_count"],
+        "job_count": jobs["total"],
+        "jobs": jobs,
+        "cpu_usage": f"{cluster['cpu_used']:.1f}/{cluster['cpu_total']}" if cluster["cpu_total"] else "0/0",
+    }
+
+def _node_rows(cluster_manager: ClusterManager) -> list:
+    nodes = cluster_manager.list_nodes()[:MAX_NODES] if cluster_manager else []
+    return [{
+        "id": n.id,
+        "hostname": n.hostname,
+        "ip_address": n.ip_address,
+        "status": n.status.value if hasattr(n.status, "value") else n.status,
+        "load": f"{n.resources.cpu_total - n.resources.cpu_available:.1f} / {n.resources.cpu_total} CPU" if n.resources else "N/A",
+    } for n in nodes]
+
 @router.get("/", response_class=HTMLResponse)
 async def dashboard_home(request: Request, ctx: dict = Depends(get_context)):
+    """First view only: bounded lists plus counters; the page then follows /dashboard/stream"""
     cluster_manager: ClusterManager = ctx.get('cluster_manager')
     job_scheduler: JobScheduler = ctx.get('job_scheduler')
-    
-    nodes = cluster_manager.list_nodes() if cluster_manager else []
-    jobs = job_scheduler.list_jobs() if job_scheduler else []
-    
-    # Calculate stats
-    total_cpu = sum(n.resources.cpu_total for n in nodes if n.resources and n.status == 'active')
-    used_cpu = sum(n.resources.cpu_total - n.resources.cpu_available for n in nodes if n.resources and n.status == 'active')
-    
-    return templates.TemplateResponse("index.html", {
-        "request": request, 
-        "nodes": nodes, 
-        "jobs": jobs,
-        "stats": {
-            "node_count": len(nodes),
-            "job_count": len(jobs),
-            "cpu_usage": f"{used_cpu}/{total_cpu}" if total_cpu else "0/0"
-        }
+
+    # Only the most recent jobs are rendered; the full history is paged via /api/jobs
+    jobs = job_scheduler.query_jobs(limit=RECENT_JOBS)[0] if job_scheduler else []
+
+    return templates.TemplateResponse(request, "index.html", {
+        "nodes": _node_rows(cluster_manager),
+        "jobs": [summarize(job) for job in jobs],
+        "stats": _stats(cluster_manager, job_scheduler),
+        "recent_jobs": RECENT_JOBS,
     })
+
+@router.get("/stream")
+async def dashboard_stream(ctx: dict = Depends(get_context)):
+    """
+    SSE deltas for an open dashboard: `job` events for status transitions (only the
+    latest per job in each burst), `stats` and `nodes` snapshots when they change
+    (checked every STATS_INTERVAL_S), and `reload` if the client fell too far behind.
+    """
+    job_scheduler: JobScheduler = ctx.get('job_scheduler')
+    if not job_scheduler:
+        return StreamingResponse(iter(()), media_type="text/event-stream")
+    return StreamingResponse(_dashboard_deltas(ctx.get('cluster_manager'), job_scheduler),
+                             media_type="text/event-stream")
+
+async def _dashboard_deltas(cluster_manager: ClusterManager, job_scheduler: JobScheduler):
+    bus = job_scheduler.events
+    loop = asyncio.get_running_loop()
+    since = bus.last_seq
+    sent = {}
+    next_snapshot = 0.0
+    while True:
+        events, since, missed = bus.read(since)
+        if missed:
+            yield "event: reload\ndata: {}\n\n"
+            return
+        latest = {}
+        for event in events:
+            latest.pop(event["job_id"], None) # keep burst order by last change
+            latest[event["job_id"]] = event
+        for event in latest.values():
+            yield f"event: job\ndata: {json.dumps(event)}\n\n"
+
+        if loop.time() >= next_snapshot:
+            for name, payload in (("stats", _stats(cluster_manager, job_scheduler)), ("nodes", _node_rows(cluster_manager))):
+                data = json.dumps(payload)
+                if sent.get(name) != data:
+                    sent[name] = data
+                    yield f"event: {name}\ndata: {data}\n\n"
+            next_snapshot = loop.time() + STATS_INTERVAL_S
+        await bus.wait(since, max(0.05, next_snapshot - loop.time()))
@@ -0,0 +1,79 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Event = Dict[str, Any]
+
+class EventBus:
+    """
+    In-process feed of job state transitions for watchers.
+
+    The scheduler publishes from its own threads; every event gets the next
+    sequence number and is kept in a bounded ring, so a client that disconnects
+    can resume from the last seq it saw as long as that is still in the ring.
+    Async watchers are woken on their own event loop when something is published.
+    """
+    def __init__(self, capacity: int = 10000):
+        self.events: deque = deque(maxlen=capacity)
+        self.last_seq = 0
+        self.lock = threading.Lock()
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def publish(self, event: Event) -> int:
+        with self.lock:
+            self.last_seq += 1
+            event = dict(event, seq=self.last_seq, ts=time.time())
+            self.events.append(event)
+            waiters = list(self.waiters)
+        for loop, ready in waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                pass # loop already closed
+        return event["seq"]
+
+    def read(self, after: int, match: Optional[Callable[[Event], bool]] = None,
+             limit: int = 1000) -> Tuple[List[Event], int, bool]:
+        """
+        Events with seq > after (oldest first) that pass `match`, plus the seq to
+        resume from next time (everything up to it has been examined). The flag is
+        True when events after `after` were already dropped from the ring, i.e. the
+        caller missed some and should re-read current state.
+        """
+        with self.lock:
+            # A seq from before a master restart: everything since is unknown
+            reset = after > self.last_seq
+            if reset:
+                after = 0
+            if not self.events or after == self.last_seq:
+                return [], self.last_seq, reset
+            first = self.events[0]["seq"]
+            missed = reset or after < first - 1
+            selected = []
+            for event in itertools.islice(self.events, max(0, after + 1 - first), None):
+                if match is None or match(event):
+                    selected.append(event)
+                    if len(selected) == limit:
+                        return selected, event["seq"], missed
+            return selected, self.last_seq, missed
+
+    async def wait(self, after: int, timeout: float) -> bool:
+        """Wait until an event newer than `after` exists; False on timeout"""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        entry = (loop, ready)
+        with self.lock:
+            if self.last_seq > after:
+                return True
+            self.waiters.append(entry)
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self.lock:
+                self.waiters.remove(entry)
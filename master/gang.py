@@ -0,0 +1,43 @@
+import time
+from typing import Dict, List
+from common.models import Job, Node
+
+# A gang holds the nodes it has reserved so far for at most this long; if the rest
+# can't be found by then it gives them all back and sits out as long again
+GANG_RESERVATION_TIMEOUT_S = 30.0
+# Gangs waiting off the queue try to assemble at most this often
+GANG_RETRY_S = 1.0
+
+class GangAssembly:
+    """Nodes reserved so far for a gang job that is waiting for the rest of them"""
+    def __init__(self, job: Job, now: float = None):
+        self.job = job
+        self.nodes: List[Node] = []
+        self.since = time.monotonic() if now is None else now
+
+    def complete(self) -> bool:
+        return len(self.nodes) >= self.job.gang_size
+
+    def expired(self, now: float, timeout: float = GANG_RESERVATION_TIMEOUT_S) -> bool:
+        return not self.complete() and now - self.since > timeout
+
+def could_host(node: Node, job: Job) -> bool:
+    """Whether the node could ever run one member, were it idle"""
+    reqs = job.resource_requirements
+    resources = node.resources
+    return bool(resources and resources.cpu_total >= reqs.cpu_cores and resources.memory_total_mb >= reqs.memory_mb
+                and (resources.gpu_available or not reqs.gpu)
+                and reqs.executor in node.capabilities.get("executors", ["docker"]))
+
+def member_env(job: Job, nodes: List[Node], rank: int) -> Dict[str, str]:
+    """
+    Environment of one gang member: its rank and every member's address, in rank
+    order (rank 0 is the job's assigned node), on top of the job's own env.
+    """
+    return dict(
+        job.env,
+        DCLOUD_GANG_ID=job.id,
+        DCLOUD_GANG_SIZE=str(len(nodes)),
+        DCLOUD_GANG_RANK=str(rank),
+        DCLOUD_GANG_HOSTS=",".join(node.ip_address for node in nodes),
+    )
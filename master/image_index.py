@@ -0,0 +1,73 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+class ImageLayerIndex:
+    """
+    Which nodes hold which image layers, from the layer lists workers report.
+
+    Layers are indexed by digest -> nodes, so the bytes of an image each node already
+    has come out of one pass over the image's layers instead of a comparison per node.
+    A tag resolves to the layer list most recently seen to change on some node (it was
+    pulled or re-pulled there), so a node still sitting on a stale :latest only counts
+    the layers it shares with the current one.
+    """
+    def __init__(self):
+        self.layer_nodes: Dict[str, Set[str]] = {} # layer digest -> nodes holding it
+        self.sizes: Dict[str, int] = {} # layer digest -> bytes
+        self.images: Dict[str, Tuple[str, ...]] = {} # image reference -> its current layers
+        self.node_images: Dict[str, Dict[str, Tuple[str, ...]]] = {} # node_id -> image reference -> layers
+        self.lock = threading.Lock()
+
+    def update(self, node_id: str, image_layers: Dict[str, List[str]], layer_sizes: Dict[str, int]):
+        """Replace what a node holds with its latest report"""
+        with self.lock:
+            known = node_id in self.node_images
+            previous = self.node_images.pop(node_id, {})
+            current = {image: tuple(layers) for image, layers in image_layers.items()}
+            before = {digest for layers in previous.values() for digest in layers}
+            after = {digest for layers in current.values() for digest in layers}
+            for digest in before - after:
+                nodes = self.layer_nodes.get(digest)
+                if nodes is not None:
+                    nodes.discard(node_id)
+                    if not nodes:
+                        del self.layer_nodes[digest]
+            for image, layers in current.items():
+                # A node's first report says nothing about which of its tags are recent
+                if (known and previous.get(image) != layers) or image not in self.images:
+                    self.images[image] = layers
+            for digest in after - before:
+                self.layer_nodes.setdefault(digest, set()).add(node_id)
+            for digest in after:
+                if digest in layer_sizes:
+                    self.sizes[digest] = layer_sizes[digest]
+            gone = before - after
+            if gone:
+                # Sizes of layers nobody holds are still needed while a current image lists them
+                referenced = {digest for layers in self.images.values() for digest in layers}
+                for digest in gone - referenced - self.layer_nodes.keys():
+                    self.sizes.pop(digest, None)
+            if current:
+                self.node_images[node_id] = current
+
+    def remove(self, node_id: str):
+        self.update(node_id, {}, {})
+
+    def present_bytes(self, image: str) -> Optional[Tuple[int, Dict[str, int]]]:
+        """
+        (size of the image, node_id -> bytes of it already on that node), or None if
+        no node ever reported the image.
+        """
+        with self.lock:
+            layers = self.images.get(image)
+            if layers is None:
+                return None
+            total = 0
+            present: Dict[str, int] = defaultdict(int)
+            for digest in dict.fromkeys(layers):
+                size = self.sizes.get(digest, 0)
+                total += size
+                for node_id in self.layer_nodes.get(digest, ()):
+                    present[node_id] += size
+            return total, present
@@ -0,0 +1,168 @@
+import bisect
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from common.models import Job
+
+class _SeqList:
+    """
+    Ascending job sequence numbers under one index key. Entries for jobs that have
+    moved to another key are left in place and skipped when read (the caller
+    checks the live job), then compacted away once they outnumber live ones.
+    """
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.stale = 0
+
+    def add(self, seq: int):
+        # Nearly always an append: new jobs and most transitions are recent
+        if not self.seqs or seq > self.seqs[-1]:
+            self.seqs.append(seq)
+        else:
+            bisect.insort(self.seqs, seq)
+
+    def mark_stale(self, is_live: Callable[[int], bool]):
+        self.stale += 1
+        if self.stale > 64 and self.stale * 2 > len(self.seqs):
+            seqs = self.seqs
+            self.seqs = [s for i, s in enumerate(seqs) if is_live(s) and (i == 0 or seqs[i - 1] != s)]
+            self.stale = 0
+
+    def live_count(self) -> int:
+        return len(self.seqs) - self.stale
+
+
+class JobIndex:
+    """
+    Secondary indexes over the scheduler's jobs for listing without scanning history.
+
+    Every job gets a sequence number in submission order; indexes by status, node,
+    name and tag hold those numbers sorted. A listing walks the smallest applicable
+    index newest-first from the cursor and stops after `limit` matches, so its cost
+    follows the page size and the filters' selectivity, not the total job count.
+    Call update() whenever a job's status or assigned node changes.
+    """
+    def __init__(self):
+        self.jobs: Dict[int, Job] = {}
+        self.seq_of: Dict[str, int] = {}
+        self.next_seq = 1
+        # Submit times by seq, kept non-decreasing so they can be bisected
+        self.seq_list: List[int] = []
+        self.times: List[float] = []
+        self.indexed: Dict[int, Tuple[Hashable, Hashable]] = {} # seq -> (status, node) as last indexed
+        self.by_status: Dict[Hashable, _SeqList] = {}
+        self.by_node: Dict[Hashable, _SeqList] = {}
+        self.by_name: Dict[str, _SeqList] = {}
+        self.by_tag: Dict[str, _SeqList] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def add(self, job: Job):
+        with self.lock:
+            if job.id in self.seq_of:
+                self._update(job)
+                return
+            seq = self.next_seq
+            self.next_seq += 1
+            self.jobs[seq] = job
+            self.seq_of[job.id] = seq
+            ts = job.submitted_at.timestamp()
+            self.seq_list.append(seq)
+            self.times.append(max(ts, self.times[-1]) if self.times else ts)
+            self.indexed[seq] = (job.status, job.assigned_node)
+            self.by_status.setdefault(job.status, _SeqList()).add(seq)
+            self.by_node.setdefault(job.assigned_node, _SeqList()).add(seq)
+            self.by_name.setdefault(job.name, _SeqList()).add(seq)
+            for tag in set(job.tags):
+                self.by_tag.setdefault(tag, _SeqList()).add(seq)
+
+    def replace(self, job):
+        """Swap in another object for the same job (e.g. its JobRecord) without reindexing"""
+        with self.lock:
+            seq = self.seq_of.get(job.id)
+            if seq is not None:
+                self.jobs[seq] = job
+
+    def update(self, job: Job):
+        with self.lock:
+            self._update(job)
+
+    def _update(self, job: Job):
+        seq = self.seq_of.get(job.id)
+        if seq is None:
+            return
+        old_status, old_node = self.indexed[seq]
+        if old_status == job.status and old_node == job.assigned_node:
+            return
+        self.indexed[seq] = (job.status, job.assigned_node)
+        if old_status != job.status:
+            self.by_status[old_status].mark_stale(lambda s: self.jobs[s].status == old_status)
+            self.by_status.setdefault(job.status, _SeqList()).add(seq)
+        if old_node != job.assigned_node:
+            self.by_node[old_node].mark_stale(lambda s: self.jobs[s].assigned_node == old_node)
+            self.by_node.setdefault(job.assigned_node, _SeqList()).add(seq)
+
+    def count(self, status=None) -> int:
+        with self.lock:
+            if status is None:
+                return len(self.jobs)
+            entry = self.by_status.get(status)
+            return entry.live_count() if entry else 0
+
+    def query(self, status=None, node: str = None, name: str = None, tag: str = None,
+              submitted_after: datetime = None, submitted_before: datetime = None,
+              cursor: int = None, limit: int = 100) -> Tuple[List[Job], Optional[int]]:
+        """
+        Jobs matching all given filters, newest first. Returns the page and the
+        cursor for the next one (None when exhausted); pass it back as `cursor`.
+        """
+        with self.lock:
+            candidates = [self.seq_list]
+            if status is not None:
+                candidates.append(self.by_status.get(status, _SeqList()).seqs)
+            if node is not None:
+                candidates.append(self.by_node.get(node, _SeqList()).seqs)
+            if name is not None:
+                candidates.append(self.by_name.get(name, _SeqList()).seqs)
+            if tag is not None:
+                candidates.append(self.by_tag.get(tag, _SeqList()).seqs)
+            seqs = min(candidates, key=len)
+
+            # Upper bound: the cursor, tightened by submitted_before
+            upper = cursor if cursor is not None else self.next_seq
+            if submitted_before is not None:
+                pos = bisect.bisect_left(self.times, submitted_before.timestamp())
+                upper = min(upper, self.seq_list[pos] if pos < len(self.seq_list) else self.next_seq)
+            lower = 0
+            if submitted_after is not None:
+                pos = bisect.bisect_right(self.times, submitted_after.timestamp())
+                lower = self.seq_list[pos] - 1 if pos < len(self.seq_list) else self.next_seq
+
+            page: List[Job] = []
+            i = bisect.bisect_left(seqs, upper) - 1
+            last = None
+            while i >= 0 and seqs[i] > lower:
+                seq = seqs[i]
+                i -= 1
+                if seq == last:
+                    continue # a job can re-enter an index it left (e.g. requeued)
+                last = seq
+                job = self.jobs[seq]
+                if status is not None and job.status != status:
+                    continue
+                if node is not None and job.assigned_node != node:
+                    continue
+                if name is not None and job.name != name:
+                    continue
+                if tag is not None and tag not in job.tags:
+                    continue
+                if submitted_after is not None and job.submitted_at <= submitted_after:
+                    continue
+                if submitted_before is not None and job.submitted_at >= submitted_before:
+                    continue
+                page.append(job)
+                if len(page) == limit:
+                    return page, seq
+            return page, None
@@ -0,0 +1,99 @@
+import json
+import sys
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Optional, Set, Union
+from common.models import Job, JobStatus, JobSummary
+
+try:
+    import orjson # optional: several times faster for list and bulk responses
+except ImportError:
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+def dumps(value: Any) -> bytes:
+    """JSON bytes for API responses (datetimes as ISO strings, enums as their values)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+class JobRecord:
+    """
+    A finished job as the scheduler keeps it. What listings, filters and dependency
+    checks read is held in slots, with name, image and node interned and status the
+    shared enum member; everything else stays packed as the job's compressed JSON
+    and is only expanded into a Job when an API caller asks for the whole job.
+    Finished jobs never change, so a record is read-only.
+    """
+    __slots__ = ("id", "name", "status", "priority", "tags", "assigned_node", "submitted_at", "started_at",
+                 "completed_at", "retry_count", "dependencies", "workflow_id", "critical_path_s", "image",
+                 "exit_code", "execution_time_ms", "packed")
+
+    def __init__(self, job: Job):
+        self.id = job.id
+        self.name = sys.intern(job.name)
+        self.status = job.status
+        self.priority = job.priority
+        self.tags = tuple(sys.intern(tag) for tag in job.tags)
+        self.assigned_node = sys.intern(job.assigned_node) if job.assigned_node else None
+        self.submitted_at = job.submitted_at
+        self.started_at = job.started_at
+        self.completed_at = job.completed_at
+        self.retry_count = job.retry_count
+        self.dependencies = tuple(job.dependencies)
+        self.workflow_id = job.workflow_id
+        self.critical_path_s = job.critical_path_s
+        image = job.resource_requirements.docker_image
+        self.image = sys.intern(image) if image else None
+        self.exit_code = job.result.exit_code if job.result else None
+        self.execution_time_ms = job.result.execution_time_ms if job.result else None
+        self.packed = zlib.compress(dumps(job.dict()), 1)
+
+    def json(self) -> bytes:
+        return zlib.decompress(self.packed)
+
+    def to_job(self) -> Job:
+        return Job.parse_raw(self.json())
+
+    def summary(self) -> JobSummary:
+        return JobSummary(
+            id=self.id, name=self.name, status=self.status, priority=self.priority, tags=list(self.tags),
+            assigned_node=self.assigned_node, submitted_at=self.submitted_at, started_at=self.started_at,
+            completed_at=self.completed_at, exit_code=self.exit_code, execution_time_ms=self.execution_time_ms,
+            retry_count=self.retry_count,
+        )
+
+    def fields(self, include: Set[str]) -> Dict[str, Any]:
+        if include <= _SLOT_FIELDS:
+            return {name: _plain(getattr(self, name)) for name in include}
+        return self.to_job().dict(include=include)
+
+# Job fields a record answers from its slots without unpacking
+_SLOT_FIELDS = {name for name in JobRecord.__slots__ if name in Job.__fields__}
+
+def _plain(value):
+    return list(value) if isinstance(value, tuple) else value
+
+AnyJob = Union[Job, JobRecord]
+
+def expand(job: Optional[AnyJob]) -> Optional[Job]:
+    """The full Job behind a live job or a record"""
+    return job.to_job() if isinstance(job, JobRecord) else job
+
+def summarize(job: AnyJob) -> JobSummary:
+    return job.summary() if isinstance(job, JobRecord) else JobSummary.of(job)
+
+def job_json(job: AnyJob) -> bytes:
+    return job.json() if isinstance(job, JobRecord) else dumps(job.dict())
+
+def jobs_json(jobs: Iterable[AnyJob]) -> bytes:
+    """A JSON array of full jobs; records are spliced in from their packed JSON as is"""
+    return b"[" + b",".join(job_json(job) for job in jobs) + b"]"
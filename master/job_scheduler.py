@@ -1,24 +1,88 @@
+import itertools
 import queue
+import shlex
 import threading
 import time
 import json
-from typing import Dict, List, Optional
-from common.models import Job, JobStatus, Node, NodeStatus, JobResult
+from datetime import datetime
+from collections import Counter, OrderedDict, deque
+from typing import Any, Dict, List, Optional
+from common.models import Job, JobStatus, Node, NodeStatus, JobResult, ParentWorkspace, JOB_STAGES, TERMINAL_STATUSES, attempt_id
+from common.timing import elapsed_ms, timed
+from common.log_protocol import parse_log_frame
 from master.cluster_manager import ClusterManager
 from master.load_balancer import LoadBalancer
+from master.log_store import JobLogStore
+from master.job_index import JobIndex
+from master.event_bus import EventBus
+from master.workflow import critical_path
+from master.placement_shards import ShardedPlacer, PLACE_BATCH
+from master.timer_wheel import TimerWheel
+from master.job_record import AnyJob, JobRecord, expand
+from master.gang import GangAssembly, GANG_RESERVATION_TIMEOUT_S, GANG_RETRY_S, could_host, member_env
 from common.ssh_client import SSHClient
+from common.exceptions import SSHConnectionError
+from common.security import EXECUTOR_TOKEN_FILE
+
+RECENT_FINISHED = 1000 # finished jobs kept for the slowest-jobs report
+# Order of the queue: by priority, then remaining critical path (longest first, workflow tasks
+# only, so plain jobs stay first come first served), then submit time; or by submit time only
+QUEUE_POLICIES = ("priority", "fifo")
+DEFAULT_RUNTIME_ESTIMATE_S = 60.0 # for jobs with no estimate and no completed run of the same name
+# The worker enforces ResourceRequirements.timeout itself; the master steps in this much
+# later (covering image pull, staging and artifact upload) in case the worker hangs
+DEADLINE_GRACE_S = 120
+# Finished jobs are swapped for compact JobRecords this long after they finish
+ARCHIVE_AFTER_S = 60
+RETAINED_WORKSPACES = 100000 # finished jobs whose workspace location is remembered for their dependents
 
 class JobScheduler:
-    def __init__(self, cluster_manager: ClusterManager, metrics_server=None):
+    def __init__(self, cluster_manager: ClusterManager, metrics_server=None, trace=None,
+                 queue_policy: str = "priority", result_cache=None, placement_shards: int = 0):
+        if queue_policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{queue_policy}'")
         self.cluster_manager = cluster_manager
         self.job_queue = queue.PriorityQueue()
         self.jobs: Dict[str, Job] = {}
         self.running = False
         self.lock = threading.Lock()
-        self.load_balancer = LoadBalancer()
+        self.load_balancer = LoadBalancer(image_index=cluster_manager.image_index)
         self.metrics_server = metrics_server
         self.ssh_pool = {} # Map node_id -> SSHClient instance
+        self.executor_tokens: Dict[tuple, str] = {} # (node_id, executor_instance) -> executor daemon token
         self.pool_lock = threading.Lock()
+        self.log_store = JobLogStore()
+        self.queue_seq = itertools.count() # tie-breaker so equal-priority entries never compare Jobs
+        self.queued_images = Counter() # docker_image -> number of queued jobs wanting it
+        self.reservations = set() # (job_id, node_id) while _assign_job's reservation is held
+        self.index = JobIndex() # status/node/name/tag lookups for listing; see _set_status
+        self.events = EventBus() # every status transition, for watch/long-poll clients
+        self.stage_marks: Dict[str, float] = {} # job_id -> perf_counter() at the start of its current stage
+        self.finished = deque(maxlen=RECENT_FINISHED) # recently finished jobs, for slowest_jobs()
+        self.trace = trace # optional master.trace.TraceRecorder
+        self.result_cache = result_cache # optional master.result_cache.ResultCache for cacheable jobs
+        self.inflight: Dict[str, Job] = {} # cache_key -> the job computing it
+        self.followers: Dict[str, List[Job]] = {} # leader job_id -> identical jobs waiting for its result
+        # Jobs with unfinished dependencies stay out of the queue until the last one completes
+        self.dependents: Dict[str, List[Job]] = {} # job_id -> parked jobs waiting on it
+        self.unmet: Dict[str, int] = {} # parked job_id -> dependencies not yet completed
+        self.park_lock = threading.Lock()
+        self.runtime_estimates: Dict[str, float] = {} # job name -> smoothed run time (s)
+        self.workflows: Dict[str, Dict[str, str]] = {} # workflow_id -> task name -> job_id
+        self.queue_policy = queue_policy
+        self.placement_shards = placement_shards # >0: place in batches across this many processes
+        self.placer: Optional[ShardedPlacer] = None # started with the loop
+        # Master-side deadlines of running attempts, keyed (job_id, started_at)
+        self.deadlines = TimerWheel(tick_s=1.0)
+        self.timed_out = set() # attempts expired by the master; their dispatch threads back off
+        self.deadline_lock = threading.Lock()
+        self.archive = deque() # (monotonic time, job) in the order jobs finished; see _archive_finished
+        self.workspaces: "OrderedDict[str, str]" = OrderedDict() # job_id -> node keeping its workspace
+        self.gangs: Dict[str, GangAssembly] = {} # gang job_id -> nodes reserved so far, while incomplete
+        self.gang_backoff: Dict[str, float] = {} # gang job_id -> monotonic time it may assemble again
+        # Gangs that couldn't assemble wait here instead of at the head of the queue
+        self.waiting_gangs: "OrderedDict[str, Job]" = OrderedDict()
+        self.gangs_retried = 0.0
 
     def _get_ssh_client(self, node: Node) -> SSHClient:
         with self.pool_lock:
@@ -32,10 +96,10 @@ class JobScheduler:
             
             # Create new
             client = SSHClient(
-                host=node.ip_address,
-                user=node.ssh_user,
+                hostname=node.ip_address,
+                username=node.ssh_user,
                 port=node.ssh_port,
-                key_path=f"keys/{node.id}_id_rsa"
+                key_filename=f"keys/{node.id}_id_rsa"
             )
             # connect immediately? handled by exec_command but better here to cache
             # The SSHClient wrapper calls connect() lazily or explicitly.
@@ -47,64 +111,474 @@ class JobScheduler:
 
     def submit_job(self, job: Job) -> Job:
         with self.lock:
-            job.status = JobStatus.QUEUED
-            self.jobs[job.id] = job
-            self.job_queue.put((-job.priority, job.submitted_at.timestamp(), job))
+            self._admit(job)
             print(f"Job submitted: {job.id}")
         return job
 
+    def submit_jobs(self, jobs: List[Job]) -> List[Job]:
+        """Queue a batch of jobs under a single lock acquisition"""
+        with self.lock:
+            for job in jobs:
+                self._admit(job)
+        print(f"Jobs submitted: {len(jobs)}")
+        return jobs
+
+    def submit_workflow(self, workflow_id: str, tasks: Dict[str, Job]) -> Dict[str, Job]:
+        """
+        Queue a workflow's jobs (task name -> Job, dependencies already resolved to job
+        IDs and checked for cycles) with each ranked by its remaining critical path.
+        """
+        by_id = {job.id: job for job in tasks.values()}
+        deps = {job.id: [dep for dep in job.dependencies if dep in by_id] for job in by_id.values()}
+        ranks = critical_path(deps, lambda job_id: self.estimate_runtime(by_id[job_id]))
+        for job in by_id.values():
+            job.workflow_id = workflow_id
+            job.critical_path_s = round(ranks[job.id], 3)
+            for dep_id in deps[job.id]:
+                by_id[dep_id].keep_workspace = True
+        self.workflows[workflow_id] = {name: job.id for name, job in tasks.items()}
+        # Parents first, so each dependency is known by the time its dependents are admitted
+        self.submit_jobs(sorted(by_id.values(), key=lambda job: -job.critical_path_s))
+        return tasks
+
+    def estimate_runtime(self, job: Job) -> float:
+        if job.estimated_runtime_s is not None:
+            return job.estimated_runtime_s
+        return self.runtime_estimates.get(job.name, DEFAULT_RUNTIME_ESTIMATE_S)
+
+    def _admit(self, job: Job):
+        """A newly submitted job (lock held): register it, then park, memoize or queue it"""
+        job.status = JobStatus.QUEUED
+        self.jobs[job.id] = job
+        self.index.add(job)
+        self._publish(job)
+        if self.trace:
+            self.trace.submit(job)
+        if self._park(job):
+            return
+        if job.dependencies or not self._memoized(job):
+            self._enqueue(job, job.submitted_at.timestamp())
+
+    def _park(self, job: Job) -> bool:
+        """Hold a job until its dependencies complete; False if they already have"""
+        pending, failed = [], None
+        # Dispatch threads finish jobs without self.lock; reading their status under park_lock
+        # means a dependency either counts as done here or finds this job in self.dependents
+        with self.park_lock:
+            for dep_id in set(job.dependencies):
+                dep = self.jobs.get(dep_id)
+                if dep and dep.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+                    failed = dep
+                    break
+                if not dep or dep.status != JobStatus.COMPLETED:
+                    pending.append(dep_id)
+            else:
+                for dep_id in pending:
+                    self.dependents.setdefault(dep_id, []).append(job)
+                if pending:
+                    self.unmet[job.id] = len(pending)
+        if failed:
+            self._fail_dependents(failed, [job])
+            return True
+        if not pending:
+            return False
+        for dep_id in pending:
+            dep = self.jobs.get(dep_id)
+            if dep and dep.status == JobStatus.QUEUED:
+                dep.keep_workspace = True # not dispatched yet, so its worker can still keep it
+        # Time parked counts towards submit_to_ready
+        job.stages = {}
+        self.stage_marks[job.id] = time.perf_counter()
+        return True
+
+    def _unpark(self, job: Job) -> bool:
+        with self.park_lock:
+            if self.unmet.pop(job.id, None) is None:
+                return False
+        self.stage_marks.pop(job.id, None)
+        return True
+
+    def _dependency_done(self, job: Job):
+        """
+        A job reached a terminal state: queue dependents that were waiting only on it,
+        or fail them (and, in turn, theirs) if it didn't complete.
+        """
+        finished = [job]
+        while finished:
+            done = finished.pop()
+            ready, doomed = [], []
+            with self.park_lock:
+                for child in self.dependents.pop(done.id, []):
+                    if child.id not in self.unmet:
+                        continue # cancelled or already failed
+                    if done.status == JobStatus.COMPLETED:
+                        self.unmet[child.id] -= 1
+                        if self.unmet[child.id] == 0:
+                            del self.unmet[child.id]
+                            ready.append(child)
+                    else:
+                        del self.unmet[child.id]
+                        doomed.append(child)
+            for child in ready:
+                self._enqueue(child, child.submitted_at.timestamp())
+            finished.extend(self._fail_dependents(done, doomed))
+
+    def _fail_dependents(self, dep: Job, children: List[Job]) -> List[Job]:
+        failed = []
+        for child in children:
+            if child.status != JobStatus.QUEUED:
+                continue
+            self.stage_marks.pop(child.id, None)
+            child.result = JobResult(exit_code=1, stdout="", stderr=f"Dependency {dep.id} {dep.status.value}",
+                                     execution_time_ms=0)
+            self._apply_status(child, JobStatus.FAILED, completed_at=datetime.utcnow())
+            print(f"Job {child.id} failed: dependency {dep.id} {dep.status.value}")
+            failed.append(child)
+        return failed
+
+    def _enqueue(self, job: Job, timestamp: float = None):
+        """Put a job (back) in the queue as newly waiting for placement"""
+        if timestamp is None:
+            timestamp = datetime.utcnow().timestamp()
+        if job.id not in self.stage_marks:
+            # Stage timings describe the latest attempt; a requeue starts a fresh one
+            job.stages = {}
+            self.stage_marks[job.id] = time.perf_counter()
+        self.queued_images[job.resource_requirements.docker_image] += 1
+        if self.queue_policy == "priority":
+            # Runtime estimates would turn plain jobs longest-first and starve short ones
+            rank = (-job.priority, -job.critical_path_s if job.workflow_id else 0.0)
+        else:
+            rank = 0
+        self.job_queue.put((rank, timestamp, next(self.queue_seq), job))
+
+    def _dequeued(self, job: Job):
+        self.stage_marks.pop(job.id, None)
+        image = job.resource_requirements.docker_image
+        self.queued_images[image] -= 1
+        if self.queued_images[image] <= 0:
+            del self.queued_images[image]
+
+    def _memoized(self, job: Job) -> bool:
+        """
+        For a cacheable job about to be queued (lock held): complete it from the result
+        cache, or attach it to an identical job already queued or running. False if it
+        has to run; it then becomes the one its duplicates wait for.
+        """
+        if not (self.result_cache and job.cacheable):
+            return False
+        job.cache_key = self.result_cache.key_for(job)
+        result = self.result_cache.get(job.cache_key)
+        if result:
+            job.result = result.copy(deep=True)
+            job.started_at = datetime.utcnow()
+            self._set_status(job, JobStatus.COMPLETED, completed_at=job.started_at)
+            print(f"Job {job.id} completed from cache (result of {result.cached_from})")
+            return True
+        leader = self.inflight.get(job.cache_key)
+        if leader is not None and leader is not job and leader.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+            self.followers.setdefault(leader.id, []).append(job)
+            self.result_cache.counters["merged"] += 1
+            print(f"Job {job.id} is a duplicate of in-flight job {leader.id}; waiting for its result")
+            return True
+        self.inflight[job.cache_key] = job
+        return False
+
+    def _settle_duplicates(self, job: Job):
+        """
+        A cacheable job is done (lock held): cache its result and hand it to the jobs
+        waiting on it, or, if it didn't succeed, let the first of them run instead.
+        """
+        if not job.cache_key or self.inflight.get(job.cache_key) is not job:
+            return
+        del self.inflight[job.cache_key]
+        followers = [f for f in self.followers.pop(job.id, []) if f.status == JobStatus.QUEUED]
+        if job.status == JobStatus.COMPLETED and self.result_cache.put(job, job.result):
+            for follower in followers:
+                follower.result = job.result.copy(deep=True)
+                follower.result.cached_from = job.id
+                follower.started_at = datetime.utcnow()
+                self._set_status(follower, JobStatus.COMPLETED, completed_at=follower.started_at)
+            return
+        if followers:
+            leader = followers[0]
+            self.inflight[job.cache_key] = leader
+            if followers[1:]:
+                self.followers[leader.id] = followers[1:]
+            self._enqueue(leader)
+
+    def _drop_follower(self, job: Job) -> bool:
+        """Detach a job waiting on a duplicate (lock held); False if it isn't one"""
+        for waiting in self.followers.values():
+            if job in waiting:
+                waiting.remove(job)
+                return True
+        return False
+
+    def image_hints(self, node: Node, limit: int = 3) -> List[str]:
+        """Images most wanted by queued jobs that the node doesn't have yet"""
+        cached = set(node.resources.cached_images) if node.resources else set()
+        demand = dict(self.queued_images) # snapshot; dispatch threads update it concurrently
+        ranked = sorted(demand, key=demand.get, reverse=True)
+        return [image for image in ranked if image and image not in cached][:limit]
+
+    def _set_status(self, job: Job, status: JobStatus, **changes):
+        """Change a job's status (and e.g. assigned_node) keeping the listing index in step"""
+        self._apply_status(job, status, **changes)
+        if status == JobStatus.COMPLETED and job.keep_workspace and job.assigned_node:
+            # Before releasing dependents, so they are placed knowing where it is
+            self.workspaces[job.id] = job.assigned_node
+            while len(self.workspaces) > RETAINED_WORKSPACES:
+                self.workspaces.popitem(last=False)
+        if status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED):
+            with self.park_lock: # see _park
+                waiting = job.id in self.dependents
+            if waiting:
+                self._dependency_done(job)
+
+    def _apply_status(self, job: Job, status: JobStatus, **changes):
+        job.status = status
+        for field, value in changes.items():
+            setattr(job, field, value)
+        self.index.update(job)
+        self._publish(job)
+        if status in TERMINAL_STATUSES:
+            self.archive.append((time.monotonic(), job))
+
+    def _archive_finished(self):
+        """
+        Replace jobs that finished more than ARCHIVE_AFTER_S ago with JobRecords in the
+        job table and index. The delay lets code still holding the Job (result cache
+        followers, watchers, metrics) finish with it first.
+        """
+        cutoff = time.monotonic() - ARCHIVE_AFTER_S
+        while self.archive and self.archive[0][0] < cutoff:
+            _, job = self.archive.popleft()
+            if self.jobs.get(job.id) is not job or job.status not in TERMINAL_STATUSES:
+                continue
+            if job.assigned_node and (job.id, job.assigned_node) in self.reservations:
+                # Cancelled while its dispatch is still out; that may yet change it
+                self.archive.append((time.monotonic(), job))
+                continue
+            record = JobRecord(job)
+            with self.lock:
+                self.jobs[job.id] = record
+            self.index.replace(record)
+
+    def _publish(self, job: Job):
+        self.events.publish({
+            "job_id": job.id,
+            "status": job.status.value,
+            "node": job.assigned_node,
+            "tags": job.tags,
+            "priority": job.priority,
+            "exit_code": job.result.exit_code if job.result else None,
+            "execution_time_ms": job.result.execution_time_ms if job.result else None,
+        })
+
     def get_job(self, job_id: str) -> Optional[Job]:
+        """The full job; unpacks it if it has been archived (see lookup for a cheap check)"""
+        return expand(self.jobs.get(job_id))
+
+    def lookup(self, job_id: str) -> Optional[AnyJob]:
+        """The job as held: a live Job, or a JobRecord once finished and archived"""
         return self.jobs.get(job_id)
 
     def list_jobs(self) -> List[Job]:
-        return list(self.jobs.values())
+        return [expand(job) for job in self.jobs.values()]
+
+    def job_counts(self) -> Dict[str, int]:
+        """Jobs per status, from the index's counters (no scan)"""
+        counts = {status.value: self.index.count(status) for status in JobStatus}
+        counts["total"] = self.index.count()
+        return counts
+
+    def query_jobs(self, **filters):
+        """Filtered, newest-first page of jobs and the next cursor; see JobIndex.query"""
+        return self.index.query(**filters)
+
+    def slowest_jobs(self, limit: int = 20, stage: str = None) -> List[Dict[str, Any]]:
+        """
+        Recently finished jobs ranked by total stage time (or by one stage), slowest
+        first, each with its per-stage breakdown in lifecycle order.
+        """
+        jobs = list(self.finished)
+        if stage:
+            jobs = [job for job in jobs if stage in job.stages]
+            key = lambda job: job.stages[stage]
+        else:
+            key = lambda job: sum(job.stages.values())
+        return [{
+            "id": job.id,
+            "name": job.name,
+            "status": job.status.value,
+            "node": job.assigned_node,
+            "total_ms": round(sum(job.stages.values()), 1),
+            "stages": {name: job.stages[name] for name in JOB_STAGES if name in job.stages},
+        } for job in sorted(jobs, key=key, reverse=True)[:limit]]
+
+    def _finished(self, job: Job):
+        """Record a job that reached a terminal state through dispatch"""
+        self.finished.append(job)
+        if job.status == JobStatus.COMPLETED and job.result:
+            # Learn run times per job name for critical-path estimates
+            run_s = job.result.execution_time_ms / 1000
+            previous = self.runtime_estimates.get(job.name)
+            self.runtime_estimates[job.name] = run_s if previous is None else 0.7 * previous + 0.3 * run_s
+        if self.metrics_server:
+            self.metrics_server.track_job_stages(job)
+        with self.lock:
+            self._settle_duplicates(job)
 
     def cancel_job(self, job_id: str):
         with self.lock:
             if job_id in self.jobs:
                 job = self.jobs[job_id]
                 if job.status in [JobStatus.QUEUED, JobStatus.RUNNING]:
-                    job.status = JobStatus.CANCELLED
+                    if job.status == JobStatus.QUEUED and not self._drop_follower(job) and not self._unpark(job):
+                        self._dequeued(job)
+                        self._drop_gang(job)
+                    self._set_status(job, JobStatus.CANCELLED)
+                    self._settle_duplicates(job)
                     print(f"Job cancelled: {job_id}")
 
     def _schedule_loop(self):
         while self.running:
-            try:
-                if self.job_queue.empty():
-                    time.sleep(1)
-                    continue
+            self._archive_finished()
+            delay = self._schedule_step()
+            if delay:
+                time.sleep(delay)
 
-                priority, timestamp, job = self.job_queue.get(timeout=1)
-                
-                if job.status != JobStatus.QUEUED:
-                    continue
+    def _schedule_step(self) -> float:
+        """
+        One iteration of the scheduling loop: take the head of the queue and place it
+        or put it back. Returns how long to wait before the next iteration.
+        """
+        if self.placer:
+            return self._schedule_batch()
+        self._retry_gangs()
+        try:
+            if self.job_queue.empty():
+                return 1
+
+            priority, timestamp, seq, job = self.job_queue.get(timeout=1)
+            
+            if job.status != JobStatus.QUEUED:
+                return 0
 
-                # Check dependencies
-                if job.dependencies:
-                    force_push_back = False
-                    for dep_id in job.dependencies:
-                        dep_job = self.jobs.get(dep_id)
-                        if not dep_job or dep_job.status != JobStatus.COMPLETED:
-                            force_push_back = True
-                            break
-                    
-                    if force_push_back:
-                        self.job_queue.put((priority, timestamp, job))
-                        time.sleep(0.5)
-                        continue
+            # Check dependencies
+            if job.dependencies and not self._dependencies_met(job):
+                self.job_queue.put((priority, timestamp, seq, job))
+                return 0.5
+            if not self._ready(job):
+                return 0
+            if job.gang_size > 1:
+                if not self._place_gang(job):
+                    self._wait_gang(job)
+                return 0
 
+            with timed(job.stages, "placement"):
                 node = self._find_node_for_job(job)
-                if node:
-                    self._assign_job(job, node)
+            if node:
+                self._assign_job(job, node)
+                return 0
+            self.job_queue.put((priority, timestamp, seq, job)) 
+            return 1
+
+        except queue.Empty:
+            self._recover_stranded_jobs()
+            return 0
+        except Exception as e:
+            print(f"Scheduler error: {e}")
+            return 0
+
+    def _dependencies_met(self, job: Job) -> bool:
+        # Parked jobs are only queued once these hold; this covers anything queued otherwise
+        for dep_id in job.dependencies:
+            dep_job = self.jobs.get(dep_id)
+            if not dep_job or dep_job.status != JobStatus.COMPLETED:
+                return False
+        return True
+
+    def _ready(self, job: Job) -> bool:
+        """A dequeued job is about to be placed; False if the result cache settled it instead"""
+        # Dependencies are only ordering; now it's runnable, an identical earlier run counts
+        if job.dependencies and job.cacheable and job.cache_key is None:
+            with self.lock:
+                if self._memoized(job):
+                    self._dequeued(job)
+                    return False
+        if job.dependencies and not job.parent_workspaces:
+            job.parent_workspaces = [self._parent_workspace(dep_id) for dep_id in dict.fromkeys(job.dependencies)]
+        if "submit_to_ready" not in job.stages:
+            job.stages["submit_to_ready"] = elapsed_ms(self.stage_marks.get(job.id, time.perf_counter()))
+            self.stage_marks[job.id] = time.perf_counter()
+        return True
+
+    def _parent_workspace(self, dep_id: str) -> ParentWorkspace:
+        """Where a child can find a finished dependency's data: its node, else its uploaded outputs"""
+        dep = self.jobs.get(dep_id)
+        artifacts = []
+        if dep and dep.status == JobStatus.COMPLETED:
+            dep = expand(dep)
+            artifacts = dep.result.artifacts if dep.result else []
+        return ParentWorkspace(job_id=dep_id, node_id=self.workspaces.get(dep_id), artifacts=artifacts)
+
+    def _schedule_batch(self) -> float:
+        """
+        _schedule_step with placement_shards: take up to PLACE_BATCH ready jobs off the
+        queue, have the shard processes propose nodes for all of them at once, then
+        check and reserve each proposal here as the single-threaded path would.
+        """
+        self._retry_gangs()
+        try:
+            batch, gangs, held = [], [], []
+            while len(batch) < PLACE_BATCH:
+                try:
+                    entry = self.job_queue.get_nowait()
+                except queue.Empty:
+                    break
+                job = entry[3]
+                if job.status != JobStatus.QUEUED:
+                    continue
+                if job.dependencies and not self._dependencies_met(job):
+                    held.append(entry)
+                elif self._ready(job):
+                    # Gangs need several nodes at once; they're assembled here, not by the shards
+                    (gangs if job.gang_size > 1 else batch).append(entry)
+            assigned = 0
+            for entry in gangs:
+                if self._place_gang(entry[3]):
+                    assigned += 1
                 else:
-                    self.job_queue.put((priority, timestamp, job)) 
-                    time.sleep(1)
+                    self._wait_gang(entry[3])
+            if not batch:
+                for entry in held:
+                    self.job_queue.put(entry)
+                if not held and not gangs:
+                    self._recover_stranded_jobs()
+                return 0 if assigned or gangs else 0.5 if held else 1
 
-            except queue.Empty:
-                self._recover_stranded_jobs()
-                continue
-            except Exception as e:
-                print(f"Scheduler error: {e}")
+            started = time.perf_counter()
+            self.placer.sync(self.cluster_manager.get_active_nodes())
+            proposals = self.placer.place([entry[3] for entry in batch])
+            placement_ms = elapsed_ms(started)
+            for entry, node_id in zip(batch, proposals):
+                job = entry[3]
+                job.stages["placement"] = job.stages.get("placement", 0.0) + placement_ms
+                node = self.cluster_manager.nodes.get(node_id) if node_id else None
+                # Capacity may have moved since the shard saw it (heartbeats, earlier proposals)
+                if node and node.status == NodeStatus.ACTIVE and self.load_balancer._satisfies_requirements(node, job):
+                    self._assign_job(job, node)
+                    assigned += 1
+                else:
+                    held.append(entry)
+            for entry in held:
+                self.job_queue.put(entry)
+            return 0 if assigned else 1
+        except Exception as e:
+            print(f"Scheduler error: {e}")
+            return 0
 
     def _recover_stranded_jobs(self):
         """Check for jobs running on nodes that are no longer active"""
@@ -118,14 +592,14 @@ class JobScheduler:
                     # If assigned node is NOT active (OFFLINE or missing)
                     # Note: get_active_nodes filter returns only ACTIVE. 
                     # If a node missed heartbeat, it won't be in the set.
-                    if job.assigned_node not in active_nodes:
-                        print(f"Detected stranded job {job.id} on dead node {job.assigned_node}. Re-queueing.")
-                        job.status = JobStatus.QUEUED
-                        job.assigned_node = None
+                    lost = [node_id for node_id in job.gang_nodes or [job.assigned_node] if node_id not in active_nodes]
+                    if lost:
+                        print(f"Detected stranded job {job.id} on dead node {lost[0]}. Re-queueing.")
+                        self._set_status(job, JobStatus.QUEUED, assigned_node=None, gang_nodes=[])
                         job.retry_count += 1 # Count as a retry? Or separate "recovery"? Let's count it.
                         
                         # Re-queue
-                        self.job_queue.put((-job.priority, datetime.utcnow().timestamp(), job))
+                        self._enqueue(job)
                         
                         if self.metrics_server:
                              # Maybe track detailed metric here?
@@ -137,107 +611,499 @@ class JobScheduler:
 
     def _assign_job(self, job: Job, node: Node):
         with self.lock:
-            job.status = JobStatus.RUNNING
-            job.assigned_node = node.id
+            if job.id in self.stage_marks:
+                job.stages["ready_to_placed"] = elapsed_ms(self.stage_marks[job.id])
+            self._dequeued(job)
+            self._set_status(job, JobStatus.RUNNING, assigned_node=node.id)
             job.started_at = datetime.utcnow()
             
-            # Update Node resources locally as a reservation
-            if node.resources:
-                node.resources.cpu_available -= job.resource_requirements.cpu_cores
-                node.resources.memory_available_mb -= job.resource_requirements.memory_mb
+            # Update Node resources locally as a reservation, released when the dispatch ends
+            self.cluster_manager.reserve(node, job.resource_requirements.cpu_cores, job.resource_requirements.memory_mb)
+            self.reservations.add((job.id, node.id))
+            with self.deadline_lock:
+                self.deadlines.schedule((job.id, job.started_at),
+                                        time.monotonic() + job.resource_requirements.timeout + DEADLINE_GRACE_S)
             
             print(f"Assigned job {job.id} to node {node.id}")
+            if self.trace:
+                self.trace.place(job, node)
             
             # Dispatch async
-            threading.Thread(target=self._dispatch_to_worker, args=(job, node)).start()
+            self._start_dispatch(job, node)
+
+    def _start_dispatch(self, job: Job, node: Node):
+        """Run _dispatch_to_worker in the background (the simulator replaces this)"""
+        threading.Thread(target=self._dispatch_to_worker, args=(job, node)).start()
+
+    def _place_gang(self, job: Job) -> bool:
+        """
+        Reserve nodes for a gang job until it holds gang_size distinct ones, keeping
+        those it got on earlier passes, and start it once it has them all. A gang that
+        stays incomplete for GANG_RESERVATION_TIMEOUT_S gives its nodes back and waits
+        as long again before assembling anew. False while it can't start.
+        """
+        now = time.monotonic()
+        if self.gang_backoff.get(job.id, 0) > now:
+            return False
+        reqs = job.resource_requirements
+        with timed(job.stages, "placement"), self.lock:
+            assembly = self.gangs.get(job.id)
+            if assembly and assembly.expired(now):
+                print(f"Gang job {job.id} held {len(assembly.nodes)}/{job.gang_size} nodes for "
+                      f"{GANG_RESERVATION_TIMEOUT_S:.0f}s; releasing them")
+                self._drop_gang(job)
+                self.gang_backoff[job.id] = now + GANG_RESERVATION_TIMEOUT_S
+                return False
+            active = {node.id: node for node in self.cluster_manager.get_active_nodes()}
+            if assembly is None:
+                # Hold nothing while the cluster couldn't fit the gang even if it were idle
+                if sum(1 for node in active.values() if could_host(node, job)) < job.gang_size:
+                    return False
+                assembly = GangAssembly(job, now)
+            for node in [node for node in assembly.nodes if node.id not in active]:
+                self._unreserve(job, node)
+                assembly.nodes.remove(node)
+            for node in assembly.nodes:
+                del active[node.id]
+            candidates = list(active.values())
+            while not assembly.complete():
+                node = self.load_balancer.select_node(candidates, job)
+                if not node:
+                    break
+                self.cluster_manager.reserve(node, reqs.cpu_cores, reqs.memory_mb)
+                self.reservations.add((job.id, node.id))
+                assembly.nodes.append(node)
+                candidates.remove(node)
+            if not assembly.complete():
+                if assembly.nodes:
+                    self.gangs[job.id] = assembly
+                else:
+                    self.gangs.pop(job.id, None)
+                return False
+            self.gangs.pop(job.id, None)
+            self.gang_backoff.pop(job.id, None)
+        self._assign_gang(job, assembly.nodes)
+        return True
+
+    def _wait_gang(self, job: Job):
+        """Take a gang that can't start yet off the queue; _retry_gangs keeps trying it"""
+        with self.lock:
+            if job.status == JobStatus.QUEUED:
+                self.waiting_gangs[job.id] = job
+
+    def _retry_gangs(self):
+        """Try to assemble the waiting gangs again, at most every GANG_RETRY_S"""
+        now = time.monotonic()
+        if not self.waiting_gangs or now - self.gangs_retried < GANG_RETRY_S:
+            return
+        self.gangs_retried = now
+        for job in list(self.waiting_gangs.values()):
+            if job.status != JobStatus.QUEUED or self._place_gang(job):
+                self.waiting_gangs.pop(job.id, None)
+
+    def _drop_gang(self, job: Job):
+        """Give back the nodes a partially assembled gang holds (lock held)"""
+        assembly = self.gangs.pop(job.id, None)
+        self.gang_backoff.pop(job.id, None)
+        self.waiting_gangs.pop(job.id, None)
+        for node in assembly.nodes if assembly else []:
+            self._unreserve(job, node)
+
+    def _assign_gang(self, job: Job, nodes: List[Node]):
+        """_assign_job for a gang whose nodes _place_gang has already reserved"""
+        with self.lock:
+            if job.id in self.stage_marks:
+                job.stages["ready_to_placed"] = elapsed_ms(self.stage_marks[job.id])
+            self._dequeued(job)
+            self._set_status(job, JobStatus.RUNNING, assigned_node=nodes[0].id, gang_nodes=[node.id for node in nodes])
+            job.started_at = datetime.utcnow()
+            with self.deadline_lock:
+                self.deadlines.schedule((job.id, job.started_at),
+                                        time.monotonic() + job.resource_requirements.timeout + DEADLINE_GRACE_S)
+            print(f"Assigned gang job {job.id} to nodes {', '.join(job.gang_nodes)}")
+            if self.trace:
+                self.trace.place(job, nodes[0])
+            threading.Thread(target=self._dispatch_gang, args=(job, nodes)).start()
 
     def _dispatch_to_worker(self, job: Job, node: Node):
         print(f"Dispatching job {job.id} to {node.ip_address}...")
+        code, parsed = None, None
+        attempt = job.started_at
+        abandoned = False
         try:
-            # Note: Assuming key-based auth is set up or shared key
-            # In a real system, we'd manage keys securely.
-            # Here we assume the user running the master can SSH to the worker user.
-            
-            # Use pooled connection
-            ssh = self._get_ssh_client(node)
-            
-            # Serialize job to JSON for the CLI
-            try:
-                job_json = job.json()
-            except AttributeError:
-                 job_json = job.model_dump_json()
-            
-            # Escape inner quotas for shell? 
-            job_json = job_json.replace("'", "'\\''")
+            # The worker streams output as log frames while the job runs;
+            # the last non-frame line is the JobResult JSON.
+            other_lines = []
+            def on_line(line: str):
+                frame = parse_log_frame(line)
+                if frame:
+                    self.log_store.append(job.id, frame["stream"], frame["data"])
+                elif line.strip():
+                    other_lines.append(line)
+                    del other_lines[:-20]
 
-            cmd = f"venv/bin/python3 -m worker.execute_job '{job_json}'" # Assuming same venv path on worker for simplicity in Phase 2
-            
-            # Don't use 'with ssh:' as it might close it? 
-            # SSHClient in common/ssh_client.py: __enter__ returns self, __exit__ calls close().
-            # So we MUST NOT use context manager if we want to pool.
-            
-            code, stdout, stderr = ssh.exec_command(cmd, timeout=job.resource_requirements.timeout + 10)
+            code, stderr = self._run_on_worker(job, node, on_line)
+            if self._attempt_over(job, attempt):
+                abandoned = True # the master already gave up on this attempt and moved on
+                return
+            stdout = "\n".join(other_lines)
+
+            with timed(job.stages, "result_parse"):
+                parsed = self._parse_result(other_lines)
+            if parsed:
+                job.stages.update(parsed.stages)
+            if code is None:
+                # The daemon has no exit status of its own; the job's is in the result
+                code = parsed.exit_code if parsed else 1
+                stderr = "" if parsed else stderr or "Executor daemon returned no result"
+            if parsed and parsed.rejected:
+                # Worker's own slot accounting says it's full; nothing ran, so no retry is used
+                print(f"Job {job.id} rejected by {node.id}: {parsed.stderr}")
+                self._release_reservation(job, node)
+                self._set_status(job, JobStatus.QUEUED, assigned_node=None)
+                time.sleep(1)
+                self._enqueue(job)
+                return
                 
             if code == 0:
                 # Parse result from stdout (last line?)
                 # The CLI prints the result JSON to stdout.
                 try:
-                    result_data = json.loads(stdout.strip().split('\n')[-1])
+                    result_data = json.loads(other_lines[-1])
                     job.result = JobResult(**result_data)
-                    job.status = JobStatus.COMPLETED
-                    job.completed_at = datetime.utcnow()
+                    self._set_status(job, JobStatus.COMPLETED, completed_at=datetime.utcnow())
                     print(f"Job {job.id} completed successfully.")
+                    self._finished(job)
                     if self.metrics_server:
                         self.metrics_server.track_job_completion(job)
                 except Exception as e:
-                    job.status = JobStatus.FAILED
                     job.result = JobResult(exit_code=1, stdout=stdout, stderr=f"Failed to parse result: {e}\n{stderr}", execution_time_ms=0)
+                    self._set_status(job, JobStatus.FAILED)
+                    self._finished(job)
                     if self.metrics_server:
                         self.metrics_server.track_job_failure(job)
             else:
                 # Job failed with non-zero exit code
                 if job.retry_count < job.max_retries:
                     job.retry_count += 1
-                    job.status = JobStatus.QUEUED
-                    job.assigned_node = None
-                    job.result = None # Clear result
+                    self._set_status(job, JobStatus.QUEUED, assigned_node=None, result=None) # clear result
                     print(f"Job {job.id} failed. Retrying ({job.retry_count}/{job.max_retries})...")
-                    self.job_queue.put((-job.priority, datetime.utcnow().timestamp(), job))
+                    self._enqueue(job)
                 else:
-                    job.status = JobStatus.FAILED
-                    job.result = JobResult(exit_code=code, stdout=stdout, stderr=stderr, execution_time_ms=0)
+                    job.result = parsed or JobResult(exit_code=code, stdout=stdout, stderr=stderr, execution_time_ms=0)
+                    self._set_status(job, JobStatus.FAILED)
                     print(f"Job {job.id} failed with exit code {code}. Max retries reached.")
+                    self._finished(job)
                     if self.metrics_server:
                         self.metrics_server.track_job_failure(job)
                 
         except Exception as e:
             print(f"Dispatch failed for job {job.id}: {e}")
+            if self._attempt_over(job, attempt):
+                abandoned = True
+                return
             
             # Transport failure (SSH), usually worth a retry if node is transient, 
             # but if we just failed to connect, maybe we should re-queue?
             if job.retry_count < job.max_retries:
                 job.retry_count += 1
-                job.status = JobStatus.QUEUED
-                job.assigned_node = None
+                self._set_status(job, JobStatus.QUEUED, assigned_node=None)
                 print(f"Job {job.id} dispatch error. Retrying ({job.retry_count}/{job.max_retries})...")
-                self.job_queue.put((-job.priority, datetime.utcnow().timestamp(), job))
+                self._enqueue(job)
             else:
-                job.status = JobStatus.FAILED
+                self._set_status(job, JobStatus.FAILED)
+                self._finished(job)
                 if self.metrics_server:
                     self.metrics_server.track_job_failure(job)
-            # Release resources
-            # (In a better design, the periodic resource report would correct this)
+        finally:
+            # Give back what _assign_job reserved on this node (already done if abandoned)
+            if not abandoned:
+                self._release_reservation(job, node)
+            if self.trace and not abandoned and not (parsed and parsed.rejected):
+                self.trace.end(job, node, code, parsed.execution_time_ms / 1000 if parsed else None)
+
+    def _dispatch_gang(self, job: Job, nodes: List[Node]):
+        """
+        Run all members of a gang job at once, one per node, each told its rank and
+        its peers' addresses (see master.gang.member_env). The first member to fail
+        takes the others down with it, since they would only wait on it, and the
+        gang is retried or failed as a whole. Rank 0's output is the job's stdout and
+        stderr, rank N's goes to the streams stdout.N and stderr.N; the job's result
+        is rank 0's.
+        """
+        print(f"Dispatching gang job {job.id} to {', '.join(node.ip_address for node in nodes)}...")
+        attempt = job.started_at
+        outcomes: List[Optional[tuple]] = [None] * len(nodes) # rank -> (code, parsed, stderr)
+        failures: List[int] = [] # ranks, in the order they failed
+        stages: Dict[str, float] = {}
+
+        def run_member(rank: int, node: Node):
+            member = job.copy(update={"env": member_env(job, nodes, rank), "stages": stages if rank == 0 else {}})
+            suffix = f".{rank}" if rank else ""
+            lines = []
+            def on_line(line: str):
+                frame = parse_log_frame(line)
+                if frame:
+                    self.log_store.append(job.id, frame["stream"] + suffix, frame["data"])
+                elif line.strip():
+                    lines.append(line)
+                    del lines[:-20]
+            try:
+                if failures:
+                    raise RuntimeError("another member already failed")
+                code, stderr = self._run_on_worker(member, node, on_line)
+                parsed = self._parse_result(lines)
+                if code is None:
+                    code = parsed.exit_code if parsed else 1
+                    stderr = "" if parsed else stderr or "Executor daemon returned no result"
+            except Exception as e:
+                code, parsed, stderr = 1, None, f"Dispatch failed: {e}"
+            outcomes[rank] = (code, parsed, stderr)
+            if code != 0:
+                first = not failures
+                failures.append(rank)
+                if first:
+                    for other in nodes:
+                        if other is not node:
+                            self._kill_on_worker(job.id, attempt, other)
+
+        members = [threading.Thread(target=run_member, args=(rank, node)) for rank, node in enumerate(nodes)]
+        for member in members:
+            member.start()
+        for member in members:
+            member.join()
+        if self._attempt_over(job, attempt):
+            return # _expire already released the nodes and moved the job on
+        for node in nodes:
+            self._release_reservation(job, node)
+        job.stages.update(stages)
+        code, parsed, stderr = outcomes[failures[0] if failures else 0]
+        if parsed and not failures:
+            job.stages.update(parsed.stages)
+        if self.trace:
+            self.trace.end(job, nodes[0], code, parsed.execution_time_ms / 1000 if parsed else None)
+
+        if any(outcome[1] and outcome[1].rejected for outcome in outcomes):
+            # A worker had no free slot after all; nothing ran to completion, so no retry is used
+            print(f"Gang job {job.id} rejected by a worker; re-queueing the whole gang")
+            self._set_status(job, JobStatus.QUEUED, assigned_node=None, gang_nodes=[])
+            time.sleep(1)
+            self._enqueue(job)
+        elif not failures and parsed:
+            job.result = parsed
+            self._set_status(job, JobStatus.COMPLETED, completed_at=datetime.utcnow())
+            print(f"Gang job {job.id} completed successfully on {len(nodes)} nodes.")
+            self._finished(job)
+            if self.metrics_server:
+                self.metrics_server.track_job_completion(job)
+        elif job.retry_count < job.max_retries:
+            job.retry_count += 1
+            self._set_status(job, JobStatus.QUEUED, assigned_node=None, gang_nodes=[], result=None)
+            print(f"Gang job {job.id} failed on rank {failures[0] if failures else 0}. "
+                  f"Retrying ({job.retry_count}/{job.max_retries})...")
+            self._enqueue(job)
+        else:
+            rank = failures[0] if failures else 0
+            job.result = parsed or JobResult(exit_code=code or 1, stdout="", execution_time_ms=0,
+                                             stderr=f"Rank {rank} on {nodes[rank].id}: {stderr or 'no result'}")
+            self._set_status(job, JobStatus.FAILED)
+            print(f"Gang job {job.id} failed on rank {rank} ({nodes[rank].id}). Max retries reached.")
+            self._finished(job)
+            if self.metrics_server:
+                self.metrics_server.track_job_failure(job)
+
+    def _run_on_worker(self, job: Job, node: Node, on_line) -> tuple:
+        """
+        Send a job to a worker and feed each line it writes back to on_line until it
+        finishes. Returns (exit code, stderr); the code is None from the executor daemon,
+        which only reports the job's own in its result line, and stderr is then the
+        daemon's own error if it refused the job. Transport errors raise.
+        """
+        # Note: Assuming key-based auth is set up or shared key
+        # In a real system, we'd manage keys securely.
+        # Here we assume the user running the master can SSH to the worker user.
+
+        # Use pooled connection
+        with timed(job.stages, "ssh_connect"):
+            ssh = self._get_ssh_client(node)
+            ssh.ensure_connected()
+            tunnel = self._open_executor_channel(ssh, node)
+
+        # Serialize job to JSON for the CLI
+        try:
+            job_json = job.json()
+        except AttributeError:
+             job_json = job.model_dump_json()
+
+        timeout = job.resource_requirements.timeout + 10
+        if tunnel:
+            # Resident executor: no interpreter startup on the worker
+            channel, token = tunnel
+            errors = []
+            def on_daemon_line(line: str):
+                error = self._parse_daemon_error(line)
+                if error is None:
+                    on_line(line)
+                else:
+                    errors.append(error)
+            ssh.stream_channel(channel, '{"token": ' + json.dumps(token) + ', "job": ' + job_json + '}', on_daemon_line,
+                               timeout=timeout, stages=job.stages)
+            if "unauthorized" in errors:
+                # The daemon restarted with a new token; re-read it on the next dispatch
+                self.executor_tokens.pop(self._executor_key(node), None)
+            return None, "Executor daemon: " + "; ".join(errors) if errors else ""
+        # Escape inner quotas for shell? 
+        job_json = job_json.replace("'", "'\\''")
+
+        cmd = f"venv/bin/python3 -m worker.execute_job '{job_json}'" # Assuming same venv path on worker for simplicity in Phase 2
+
+        # Don't use 'with ssh:' as it might close it? 
+        # SSHClient in common/ssh_client.py: __enter__ returns self, __exit__ calls close().
+        # So we MUST NOT use context manager if we want to pool.
+        return ssh.exec_command_stream(cmd, on_line, timeout=timeout, stages=job.stages)
+
+    def _attempt_over(self, job: Job, attempt: datetime) -> bool:
+        """The worker answered (or the transport failed): disarm the deadline; True if it had already expired"""
+        with self.deadline_lock:
+            self.deadlines.cancel((job.id, attempt))
+            if (job.id, attempt) in self.timed_out:
+                self.timed_out.discard((job.id, attempt))
+                return True
+            return False
+
+    def _deadline_loop(self):
+        while self.running:
+            time.sleep(self.deadlines.tick_s)
+            self._check_deadlines()
+
+    def _check_deadlines(self):
+        with self.deadline_lock:
+            expired = self.deadlines.advance(time.monotonic())
+            self.timed_out.update(expired)
+        for job_id, attempt in expired:
+            try:
+                self._expire(job_id, attempt)
+            except Exception as e:
+                print(f"Deadline handling failed for job {job_id}: {e}")
+
+    def _expire(self, job_id: str, attempt: datetime):
+        """
+        A running attempt outlived its timeout plus grace without the worker answering:
+        kill it on the worker, release its reservation and retry or fail the job. The
+        dispatch thread still waiting on it leaves the job alone when it returns.
+        """
+        job = self.jobs.get(job_id)
+        if not job or job.status != JobStatus.RUNNING or job.started_at != attempt:
+            return
+        timeout = job.resource_requirements.timeout
+        node_ids = job.gang_nodes or [job.assigned_node]
+        print(f"Job {job.id} exceeded its {timeout}s timeout on {', '.join(node_ids)}; killing it there")
+        for rank, node_id in enumerate(node_ids):
+            node = self.cluster_manager.nodes.get(node_id)
+            if not node:
+                continue
+            self._release_reservation(job, node)
+            # Only this attempt: the retry queued below may land on the same node before the kill does
+            threading.Thread(target=self._kill_on_worker, args=(job.id, attempt, node), daemon=True).start()
+            if self.trace and rank == 0:
+                self.trace.end(job, node, None, None)
+        if job.retry_count < job.max_retries:
+            job.retry_count += 1
+            self._set_status(job, JobStatus.QUEUED, assigned_node=None, gang_nodes=[], result=None)
+            print(f"Job {job.id} timed out. Retrying ({job.retry_count}/{job.max_retries})...")
+            self._enqueue(job)
+        else:
+            job.result = JobResult(exit_code=124, stdout="", stderr=f"Timed out after {timeout}s (enforced by the master)",
+                                   execution_time_ms=int((datetime.utcnow() - attempt).total_seconds() * 1000))
+            self._set_status(job, JobStatus.FAILED, completed_at=datetime.utcnow())
+            self._finished(job)
+            if self.metrics_server:
+                self.metrics_server.track_job_failure(job)
+
+    def _kill_on_worker(self, job_id: str, attempt: datetime, node: Node):
+        """Stop one attempt of a job on a worker; a later attempt of it there keeps running"""
+        try:
+            ssh = self._get_ssh_client(node)
+            cmd = f"venv/bin/python3 -m worker.kill_job {shlex.quote(job_id)} {shlex.quote(attempt_id(attempt))}"
+            code, out, err = ssh.exec_command(cmd, timeout=30)
+            print(f"Killed {out or 0} process(es) of job {job_id} on {node.id}" if code == 0 else
+                  f"Could not kill job {job_id} on {node.id}: {err}")
+        except Exception as e:
+            print(f"Could not kill job {job_id} on {node.id}: {e}")
+
+    def _release_reservation(self, job: Job, node: Node):
+        """Undo the reservation made in _assign_job (idempotent per dispatch)"""
+        with self.lock:
+            self._unreserve(job, node)
+
+    def _unreserve(self, job: Job, node: Node):
+        key = (job.id, node.id)
+        if key not in self.reservations:
+            return
+        self.reservations.discard(key)
+        self.cluster_manager.release(node, job.resource_requirements.cpu_cores, job.resource_requirements.memory_mb)
+
+    def _open_executor_channel(self, ssh: SSHClient, node: Node):
+        """
+        (channel, token) for the worker's resident executor daemon, if it advertised
+        one. The token is read over SSH once per daemon start. Returns None to fall
+        back to spawning worker.execute_job over SSH exec.
+        """
+        port = node.capabilities.get("executor_port")
+        if not port:
+            return None
+        key = self._executor_key(node)
+        try:
+            token = self.executor_tokens.get(key)
+            if token is None:
+                code, out, err = ssh.exec_command(f"cat {EXECUTOR_TOKEN_FILE}", timeout=10)
+                if code != 0 or not out:
+                    raise SSHConnectionError(f"no executor token: {err or 'empty'}")
+                token = self.executor_tokens[key] = out
+            return ssh.open_tunnel(int(port)), token
+        except SSHConnectionError as e:
+            print(f"Executor daemon on {node.id} unreachable, falling back to exec: {e}")
+            return None
+
+    def _executor_key(self, node: Node) -> tuple:
+        return (node.id, node.capabilities.get("executor_instance"))
+
+    def _parse_daemon_error(self, line: str) -> Optional[str]:
+        """The message of an executor daemon {"error": ...} line, None for any other line"""
+        if not line.startswith('{"error"'):
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        return str(data["error"]) if isinstance(data, dict) and list(data) == ["error"] else None
+
+    def _parse_result(self, lines: List[str]) -> Optional[JobResult]:
+        """Best-effort parse of the worker's trailing JobResult line"""
+        if not lines:
+            return None
+        try:
+            return JobResult(**json.loads(lines[-1]))
+        except Exception:
+            return None
 
     def start(self):
         self.running = True
+        if self.placement_shards and not self.placer:
+            self.placer = ShardedPlacer(self.placement_shards, self.load_balancer.weights)
         self.thread = threading.Thread(target=self._schedule_loop, daemon=True)
         self.thread.start()
+        self.deadline_thread = threading.Thread(target=self._deadline_loop, daemon=True)
+        self.deadline_thread.start()
         print("Job Scheduler started.")
 
     def stop(self):
         self.running = False
         if hasattr(self, 'thread'):
             self.thread.join()
+        if self.placer:
+            self.placer.close()
+            self.placer = None
 
 
 
@@ -1,15 +1,35 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from common.models import Node, Job, NodeStatus
 
+# Scoring knobs; override per instance to try alternatives (e.g. in a trace replay)
+DEFAULT_WEIGHTS = {
+    "cpu": 0.6,             # weight of CPU usage in the load score
+    "memory": 0.4,          # weight of memory usage
+    "image_locality": 0.15, # bonus scaled by the bytes of the job's image already on the node
+    "input_locality": 0.2,  # bonus scaled by the share of input bytes already cached
+    "parent_locality": 0.3, # bonus scaled by the share of finished dependencies whose workspace is on the node
+    "max_load": 0.9,        # nodes scoring above this are skipped
+}
+# Images count as at least this big when weighing the bytes a node already has: pulling a
+# few MB is cheap wherever the job lands, so small images earn only a small bonus
+IMAGE_LOCALITY_MIN_BYTES = 200 * 1024 * 1024
+
 class LoadBalancer:
-    def __init__(self):
-        pass
+    def __init__(self, weights: Optional[Dict[str, float]] = None, image_index=None):
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown load balancer weights: {', '.join(sorted(unknown))}")
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        # Optional master.image_index.ImageLayerIndex; without it (or for images no node has
+        # reported layers of) image locality falls back to matching the tag
+        self.image_index = image_index
 
     def select_node(self, nodes: List[Node], job: Job) -> Optional[Node]:
         """
         Select the best node for the job based on load score and constraints.
         """
         candidates = []
+        image_bytes = self._image_bytes(job)
         for node in nodes:
             if node.status != NodeStatus.ACTIVE:
                 continue
@@ -18,9 +38,9 @@ class LoadBalancer:
             if not self._satisfies_requirements(node, job):
                 continue
                 
-            score = self._calculate_load_score(node, job)
-            # Filter overloaded nodes (load > 0.9)
-            if score > 0.9:
+            score = self._calculate_load_score(node, job, image_bytes)
+            # Filter overloaded nodes (load > 0.9 by default)
+            if score > self.weights["max_load"]:
                 continue
                 
             candidates.append((score, node))
@@ -45,14 +65,27 @@ class LoadBalancer:
             
         if reqs.gpu and not node.resources.gpu_available:
             return False
+
+        # Nodes that predate executor advertising only run containers
+        if reqs.executor not in node.capabilities.get("executors", ["docker"]):
+            return False
             
         return True
 
-    def _calculate_load_score(self, node: Node, job: Job = None) -> float:
+    def _image_bytes(self, job: Job) -> Optional[Tuple[int, Dict[str, int]]]:
+        """(image size, node_id -> bytes of it cached there) from the layer index, if it knows the image"""
+        image = job.resource_requirements.docker_image
+        if not (self.image_index and image):
+            return None
+        return self.image_index.present_bytes(image)
+
+    def _calculate_load_score(self, node: Node, job: Job = None,
+                              image_bytes: Optional[Tuple[int, Dict[str, int]]] = None) -> float:
         """
-        Calculate load score: (cpu_used/total)*0.6 + (mem_used/total)*0.4
+        Calculate load score: (cpu_used/total)*0.6 + (mem_used/total)*0.4 (default weights)
         Lower is better.
         If job is provided, we can subtract a 'locality bonus' to prefer this node.
+        image_bytes is _image_bytes(job), computed once per placement.
         """
         if not node.resources or node.resources.cpu_total == 0 or node.resources.memory_total_mb == 0:
             return 1.0 # Treat as full if no resource info
@@ -60,10 +93,14 @@ class LoadBalancer:
         cpu_usage = 1.0 - (node.resources.cpu_available / node.resources.cpu_total)
         mem_usage = 1.0 - (node.resources.memory_available_mb / node.resources.memory_total_mb)
         
-        score = (cpu_usage * 0.6) + (mem_usage * 0.4)
+        score = (cpu_usage * self.weights["cpu"]) + (mem_usage * self.weights["memory"])
         
         # Locality Bonus
-        if job and job.resource_requirements.docker_image:
+        if job and image_bytes is not None:
+            # By the layers already there: the bonus shrinks with the bytes left to pull
+            total, present = image_bytes
+            score -= self.weights["image_locality"] * present.get(node.id, 0) / max(total, IMAGE_LOCALITY_MIN_BYTES)
+        elif job and job.resource_requirements.docker_image:
              if job.resource_requirements.docker_image in node.resources.cached_images:
                  # Reduce score by 0.2 to prioritize this node (even if slightly more loaded)
                  # e.g. 0.5 (50% load) becomes 0.3, beating an idle node (0.0)? 
@@ -73,8 +110,20 @@ class LoadBalancer:
                  # Idle node is instant start + pull.
                  # Busy node is wait + no pull.
                  # Let's say we prefer locality unless node is very busy.
-                 score -= 0.15 
-        
+                 score -= self.weights["image_locality"]
+
+        # Input locality: skip re-fetching large inputs, weighted by the bytes already there
+        if job and job.inputs:
+            total = sum(max(blob.size, 1) for blob in job.inputs)
+            cached = set(node.resources.cached_blobs)
+            hit = sum(max(blob.size, 1) for blob in job.inputs if blob.digest in cached)
+            score -= self.weights["input_locality"] * hit / total
+
+        # Parent locality: mount a dependency's workspace in place instead of fetching its outputs
+        if job and job.parent_workspaces:
+            local = sum(1 for parent in job.parent_workspaces if parent.node_id == node.id)
+            score -= self.weights["parent_locality"] * local / len(job.parent_workspaces)
+
         return score
 
 
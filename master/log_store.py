@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Iterable, List, Optional, Tuple
+
+# (seq, stream, data)
+LogEntry = Tuple[int, str, str]
+
+
+class _JobLog:
+    def __init__(self):
+        self.entries = deque()
+        self.size = 0
+        self.next_seq = 1
+        self.dropped = 0 # number of entries evicted to stay within budget
+
+
+class JobLogStore:
+    """
+    Bounded in-memory store for job output streamed from workers.
+
+    Each job keeps a ring of (seq, stream, data) entries capped at `max_bytes_per_job`;
+    the oldest entries fall off first. Only the `max_jobs` most recently written
+    logs are kept. Sequence numbers let followers resume where they left off.
+    """
+    def __init__(self, max_bytes_per_job: int = 1024 * 1024, max_jobs: int = 1000):
+        self.max_bytes_per_job = max_bytes_per_job
+        self.max_jobs = max_jobs
+        self.logs: "OrderedDict[str, _JobLog]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def append(self, job_id: str, stream: str, data: str) -> int:
+        """Store a chunk of output and return its sequence number"""
+        with self.lock:
+            log = self.logs.get(job_id)
+            if log is None:
+                log = _JobLog()
+                self.logs[job_id] = log
+                while len(self.logs) > self.max_jobs:
+                    self.logs.popitem(last=False)
+            else:
+                self.logs.move_to_end(job_id)
+
+            seq = log.next_seq
+            log.next_seq += 1
+            log.entries.append((seq, stream, data))
+            log.size += len(data)
+            while log.size > self.max_bytes_per_job and len(log.entries) > 1:
+                _, _, old = log.entries.popleft()
+                log.size -= len(old)
+                log.dropped += 1
+            return seq
+
+    def read(self, job_id: str, after: int = 0, streams: Optional[Iterable[str]] = None) -> List[LogEntry]:
+        """Entries with seq > after, optionally limited to some streams"""
+        with self.lock:
+            log = self.logs.get(job_id)
+            if log is None or log.next_seq - 1 <= after:
+                return []
+            entries = [e for e in log.entries if e[0] > after]
+        if streams:
+            entries = [e for e in entries if e[1] in streams]
+        return entries
+
+    def text(self, job_id: str, streams: Optional[Iterable[str]] = None) -> str:
+        """Everything still buffered for the job, concatenated"""
+        return "".join(data for _, _, data in self.read(job_id, streams=streams))
+
+    def discard(self, job_id: str):
+        with self.lock:
+            self.logs.pop(job_id, None)
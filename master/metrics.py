@@ -1,4 +1,4 @@
-from prometheus_client import start_http_server, Gauge, Counter, Summary
+from prometheus_client import start_http_server, Gauge, Counter, Summary, Histogram
 import time
 import threading
 
@@ -10,6 +10,9 @@ CLUSTER_CPU_USED = Gauge('dcloud_cluster_cpu_used', 'Used CPU cores in cluster')
 JOBS_COMPLETED = Counter('dcloud_jobs_completed_total', 'Total number of completed jobs')
 JOBS_FAILED = Counter('dcloud_jobs_failed_total', 'Total number of failed jobs')
 JOB_DURATION = Summary('dcloud_job_duration_seconds', 'Time spent processing jobs')
+# One series per lifecycle stage (common.models.JOB_STAGES); buckets from 1ms to 10min
+JOB_STAGE_DURATION = Histogram('dcloud_job_stage_seconds', 'Time spent in each job lifecycle stage', ['stage'],
+                               buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600))
 
 class MetricsServer:
     def __init__(self, port=9090):
@@ -21,19 +24,17 @@ class MetricsServer:
         self.running = True
         print(f"Metrics server started on port {self.port}")
 
-    def update_cluster_stats(self, cluster_manager):
+    def update_cluster_stats(self, cluster_manager, job_scheduler=None):
         """Periodic update of gauge metrics"""
         while self.running:
             try:
-                nodes = cluster_manager.list_nodes()
-                active = [n for n in nodes if n.status == 'active']
-                ACTIVE_NODES.set(len(active))
-                
-                total_cpu = sum(n.resources.cpu_total for n in active if n.resources)
-                avail_cpu = sum(n.resources.cpu_available for n in active if n.resources)
-                
-                CLUSTER_CPU_TOTAL.set(total_cpu)
-                CLUSTER_CPU_USED.set(total_cpu - avail_cpu)
+                # Running totals on both sides, so this doesn't scan nodes or jobs
+                stats = cluster_manager.stats()
+                ACTIVE_NODES.set(stats["active_nodes"])
+                CLUSTER_CPU_TOTAL.set(stats["cpu_total"])
+                CLUSTER_CPU_USED.set(stats["cpu_used"])
+                if job_scheduler:
+                    JOB_QUEUE_SIZE.set(job_scheduler.job_counts()["queued"])
                 
             except Exception as e:
                 print(f"Error updating metrics: {e}")
@@ -49,5 +50,10 @@ class MetricsServer:
     def track_job_failure(self, job):
         JOBS_FAILED.inc()
 
+    def track_job_stages(self, job):
+        """Observe the finished attempt's per-stage latencies (job.stages, ms)"""
+        for stage, ms in job.stages.items():
+            JOB_STAGE_DURATION.labels(stage=stage).observe(ms / 1000.0)
+
 
 
@@ -0,0 +1,190 @@
+import multiprocessing
+from typing import Dict, List, Optional
+from common.models import Job, Node, NodeStatus
+from master.load_balancer import LoadBalancer
+
+# Ready jobs taken off the queue per placement round when sharded
+PLACE_BATCH = 256
+# Move nodes between shards once one holds this much more CPU than another
+REBALANCE_RATIO = 1.5
+
+def _shard_main(conn, weights: Optional[Dict[str, float]]):
+    """
+    Shard process: keeps its slice of the nodes and answers placement batches.
+    Messages are (kind, payload) tuples:
+      ("nodes", [Node])                                    add or replace nodes
+      ("capacity", [(node_id, cpu, memory_mb, active)])    capacity/status changes
+      ("drop", [node_id])                                  nodes no longer owned
+      ("place", [Job])                                     reply: [node_id or None] per job
+    """
+    balancer = LoadBalancer(weights)
+    nodes: Dict[str, Node] = {}
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except (EOFError, OSError):
+            return
+        if kind == "nodes":
+            for node in payload:
+                nodes[node.id] = node
+        elif kind == "capacity":
+            for node_id, cpu, memory_mb, active in payload:
+                node = nodes.get(node_id)
+                if node:
+                    node.resources.cpu_available = cpu
+                    node.resources.memory_available_mb = memory_mb
+                    node.status = NodeStatus.ACTIVE if active else NodeStatus.OFFLINE
+        elif kind == "drop":
+            for node_id in payload:
+                nodes.pop(node_id, None)
+        elif kind == "place":
+            candidates = [node for node in nodes.values() if node.status == NodeStatus.ACTIVE]
+            placed = []
+            for job in payload:
+                node = balancer.select_node(candidates, job)
+                if node:
+                    # Hold the capacity locally until the master syncs this node again
+                    node.resources.cpu_available -= job.resource_requirements.cpu_cores
+                    node.resources.memory_available_mb -= job.resource_requirements.memory_mb
+                placed.append(node.id if node else None)
+            conn.send(placed)
+        elif kind == "stop":
+            return
+
+
+class ShardedPlacer:
+    """
+    Placement spread over worker processes, each owning a slice of the nodes.
+
+    The scheduler calls sync() with the live node registry before each round; new
+    nodes go to the shard with the least CPU, changed ones are sent as compact
+    capacity updates, and nodes are moved between shards when departures leave
+    the slices uneven. place() routes each job to the shard with the most free CPU
+    left (so routing follows queue depth against capacity), scores all shards in
+    parallel, and retries unplaced jobs on the next shard. The result is only a
+    proposal: the master still checks and reserves the node before dispatching.
+    """
+    def __init__(self, shards: int, weights: Optional[Dict[str, float]] = None):
+        if shards < 1:
+            raise ValueError("At least one placement shard is required")
+        self.conns = []
+        self.procs = []
+        for i in range(shards):
+            conn, proc = self._start_shard(i, weights)
+            self.conns.append(conn)
+            self.procs.append(proc)
+        self.owner: Dict[str, int] = {} # node_id -> shard
+        self.sent: Dict[str, tuple] = {} # node_id -> (resources object, capacity state) as last sent
+        self.cpu_total = [0.0] * shards # CPU owned per shard
+        self.cpu_free = [0.0] * shards # CPU available per shard, as last synced
+
+    def _start_shard(self, index: int, weights: Optional[Dict[str, float]]):
+        """Start one shard process; returns (connection to it, the process)"""
+        ctx = multiprocessing.get_context("spawn") # never fork the master's threads
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_shard_main, args=(child, weights), name=f"dcloud-placement-{index}", daemon=True)
+        proc.start()
+        child.close()
+        return parent, proc
+
+    def sync(self, nodes: List[Node]):
+        """Bring the shards up to date with the active nodes"""
+        shards = len(self.conns)
+        full = [[] for _ in range(shards)]
+        capacity = [[] for _ in range(shards)]
+        drop = [[] for _ in range(shards)]
+        nodes = [node for node in nodes if node.resources]
+        live = {node.id for node in nodes}
+        for node_id in [node_id for node_id in self.owner if node_id not in live]:
+            drop[self.owner.pop(node_id)].append(node_id)
+            self.sent.pop(node_id, None)
+        self.cpu_total = [0.0] * shards
+        for node in nodes:
+            if node.id in self.owner:
+                self.cpu_total[self.owner[node.id]] += node.resources.cpu_total
+        self.cpu_free = [0.0] * shards
+        for node in nodes:
+            shard = self.owner.get(node.id)
+            if shard is None:
+                shard = min(range(shards), key=self.cpu_total.__getitem__)
+                self.owner[node.id] = shard
+                self.cpu_total[shard] += node.resources.cpu_total
+            state = (node.resources.cpu_available, node.resources.memory_available_mb, node.status == NodeStatus.ACTIVE)
+            previous = self.sent.get(node.id)
+            # Heartbeats replace the resources object; reservations only change the numbers
+            if previous is None or previous[0] is not node.resources:
+                full[shard].append(node)
+            elif previous[1] != state:
+                capacity[shard].append((node.id,) + state)
+            self.sent[node.id] = (node.resources, state)
+            self.cpu_free[shard] += node.resources.cpu_available
+        self._rebalance(nodes, full, drop)
+        for shard, conn in enumerate(self.conns):
+            if drop[shard]:
+                conn.send(("drop", drop[shard]))
+            if full[shard]:
+                conn.send(("nodes", full[shard]))
+            if capacity[shard]:
+                conn.send(("capacity", capacity[shard]))
+
+    def _rebalance(self, nodes: List[Node], full: List[List[Node]], drop: List[List[str]]):
+        """Move nodes from the largest slice to the smallest while it evens them out"""
+        by_id = {node.id: node for node in nodes}
+        while True:
+            big = max(range(len(self.conns)), key=self.cpu_total.__getitem__)
+            small = min(range(len(self.conns)), key=self.cpu_total.__getitem__)
+            if self.cpu_total[big] <= REBALANCE_RATIO * max(self.cpu_total[small], 1):
+                return
+            gap = self.cpu_total[big] - self.cpu_total[small]
+            movable = [by_id[node_id] for node_id, shard in self.owner.items()
+                       if shard == big and by_id[node_id].resources.cpu_total < gap]
+            if not movable:
+                return
+            node = max(movable, key=lambda n: n.resources.cpu_total)
+            self.owner[node.id] = small
+            self.cpu_total[big] -= node.resources.cpu_total
+            self.cpu_total[small] += node.resources.cpu_total
+            self.cpu_free[big] -= node.resources.cpu_available
+            self.cpu_free[small] += node.resources.cpu_available
+            full[big] = [n for n in full[big] if n is not node]
+            drop[big].append(node.id)
+            full[small].append(node)
+
+    def place(self, jobs: List[Job]) -> List[Optional[str]]:
+        """Proposed node_id (or None) for each job, in order"""
+        shards = len(self.conns)
+        free = list(self.cpu_free)
+        start = []
+        for job in jobs:
+            shard = max(range(shards), key=free.__getitem__)
+            free[shard] -= job.resource_requirements.cpu_cores
+            start.append(shard)
+        placed: List[Optional[str]] = [None] * len(jobs)
+        pending = list(range(len(jobs)))
+        for attempt in range(shards):
+            batches: Dict[int, List[int]] = {}
+            for i in pending:
+                batches.setdefault((start[i] + attempt) % shards, []).append(i)
+            # Send every batch before reading any reply so the shards score in parallel
+            for shard, indexes in batches.items():
+                self.conns[shard].send(("place", [jobs[i] for i in indexes]))
+            for shard, indexes in batches.items():
+                for i, node_id in zip(indexes, self.conns[shard].recv()):
+                    placed[i] = node_id
+                    if node_id in self.sent:
+                        # The shard now holds capacity on it; resend the real figures next sync
+                        self.sent[node_id] = (self.sent[node_id][0], None)
+            pending = [i for i in pending if placed[i] is None]
+            if not pending:
+                break
+        return placed
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(("stop", None))
+                conn.close()
+            except OSError:
+                pass
+        for proc in self.procs:
+            proc.join(timeout=5)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from common.models import Job, JobResult
+
+def cache_key(job: Job, image: Optional[str] = None) -> str:
+    """
+    Content hash of everything that determines a deterministic job's result: the
+    command, the image (by digest where known), executor, environment, input
+    contents, the declared outputs and, for gang jobs, the number of nodes.
+    """
+    reqs = job.resource_requirements
+    material = {
+        "command": job.command,
+        "image": image or reqs.docker_image,
+        "executor": reqs.executor,
+        "env": sorted(job.env.items()),
+        "inputs": sorted((blob.path, blob.digest) for blob in job.inputs),
+        "outputs": sorted(job.outputs),
+    }
+    if job.gang_size > 1:
+        material["gang_size"] = job.gang_size
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+class ResultCache:
+    """
+    Memoized results of successful cacheable jobs, by cache_key(). Entries expire
+    after ttl_s; beyond max_bytes (of serialized results) the least recently used
+    go first. Artifacts are kept by reference: their chunks stay in the blob store.
+
+    Image tags are resolved to the digest workers last reported for them, so a
+    re-pushed tag stops matching once a job has run on the new image.
+    """
+    def __init__(self, ttl_s: float = 86400, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict() # key -> (stored_at, size, JobResult)
+        self.bytes = 0
+        self.image_digests: Dict[str, str] = {} # image reference -> digest last seen on a worker
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "merged": 0, "stored": 0, "evicted": 0}
+
+    def key_for(self, job: Job) -> str:
+        image = job.resource_requirements.docker_image
+        if image and "@sha256:" not in image:
+            image = self.image_digests.get(image, image)
+        return cache_key(job, image)
+
+    def get(self, key: str) -> Optional[JobResult]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.time() - entry[0] > self.ttl_s:
+                self._drop(key)
+                entry = None
+            if not entry:
+                self.counters["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry[2]
+
+    def put(self, job: Job, result: JobResult) -> Optional[str]:
+        """Store a successful run's result; returns the key it was stored under"""
+        if result.exit_code != 0 or result.rejected:
+            return None
+        image = job.resource_requirements.docker_image
+        if image and result.image_digest:
+            self.image_digests[image] = result.image_digest
+        key = cache_key(job, result.image_digest or image)
+        stored = result.copy(deep=True)
+        stored.cached_from = job.id
+        size = len(stored.json())
+        if size > self.max_bytes:
+            return None
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (time.time(), size, stored)
+            self.bytes += size
+            self.counters["stored"] += 1
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.counters["evicted"] += 1
+        return key
+
+    def _drop(self, key: str):
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries), bytes=self.bytes)
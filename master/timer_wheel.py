@@ -0,0 +1,83 @@
+import math
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel: deadlines for many keys with O(1) schedule and cancel.
+
+    Level 0 has `slots` buckets of one tick each; every level above spans `slots`
+    times the level below. A timer goes in the coarsest bucket that still separates
+    it from now and drops a level each time that bucket comes round, so advance()
+    costs O(1) per tick plus the timers that expire or cascade, however many are
+    armed. Deadlines are in the same clock as `now` (time.monotonic() by default)
+    and fire on the first advance() at or after their tick.
+    """
+    def __init__(self, tick_s: float = 1.0, slots: int = 256, levels: int = 4, now: Optional[float] = None):
+        if slots < 2 or slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.tick_s = tick_s
+        self.bits = slots.bit_length() - 1
+        self.mask = slots - 1
+        self.levels = levels
+        self.wheels: List[List[Dict[Hashable, int]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.where: Dict[Hashable, Tuple[int, int]] = {} # key -> (level, slot)
+        self.current = int((time.monotonic() if now is None else now) // tick_s)
+
+    def __len__(self) -> int:
+        return len(self.where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.where
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Arm (or re-arm) the timer for key"""
+        self.cancel(key)
+        self._place(key, max(math.ceil(deadline / self.tick_s), self.current + 1))
+
+    def cancel(self, key: Hashable) -> bool:
+        where = self.where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        del self.wheels[level][slot][key]
+        return True
+
+    def _place(self, key: Hashable, expires: int):
+        delta = expires - self.current
+        level = 0
+        while level < self.levels - 1 and delta >= 1 << (self.bits * (level + 1)):
+            level += 1
+        # Beyond the top level's reach: park it in the furthest bucket and re-place it from there
+        due = min(expires, self.current + (1 << (self.bits * self.levels)) - 1)
+        slot = (due >> (self.bits * level)) & self.mask
+        self.wheels[level][slot][key] = expires
+        self.where[key] = (level, slot)
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel up to `now`; returns the keys whose deadline has passed (now disarmed)"""
+        target = int((time.monotonic() if now is None else now) // self.tick_s)
+        if not self.where:
+            self.current = max(self.current, target)
+            return []
+        expired = []
+        while self.current < target:
+            self.current += 1
+            # Coarsest first, so a timer due this tick can cascade all the way down
+            for level in range(self.levels - 1, 0, -1):
+                if self.current & ((1 << (self.bits * level)) - 1):
+                    continue
+                slot = (self.current >> (self.bits * level)) & self.mask
+                bucket = self.wheels[level][slot]
+                if bucket:
+                    self.wheels[level][slot] = {}
+                    for key, expires in bucket.items():
+                        self._place(key, expires)
+            slot = self.current & self.mask
+            bucket = self.wheels[0][slot]
+            if bucket:
+                self.wheels[0][slot] = {}
+                for key in bucket:
+                    del self.where[key]
+                expired.extend(bucket)
+        return expired
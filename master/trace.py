@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+from common.models import Job, Node
+
+FLUSH_INTERVAL_S = 1.0
+
+class TraceRecorder:
+    """
+    Append-only scheduling trace for offline replay (simulator/replay.py): one
+    compact JSON object per line with the wall time `t` and event kind `ev`:
+
+      submit  job shape: id, cpu, mem, img, pri, deps, retries (+ exec, inputs if set)
+      node    a node's total capacity: id, cpu, mem (+ imgs, execs on registration)
+      down    node went offline or was deregistered: id
+      place   job id placed on node
+      end     an attempt ended: id, node, status after it, exit code, run_s
+
+    Lines are buffered and flushed by a background thread every FLUSH_INTERVAL_S
+    (and on close), so a crash can lose the last second of the trace but recording
+    never waits on the disk.
+    """
+    def __init__(self, path: str, flush_interval_s: float = FLUSH_INTERVAL_S):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.dirty = False # lines written since the last flush
+        self.closed = threading.Event()
+        # node_id -> totals last written, so heartbeats without a change are skipped
+        self.node_capacity: Dict[str, tuple] = {}
+        self.flusher = threading.Thread(target=self._flush_loop, args=(flush_interval_s,), daemon=True)
+        self.flusher.start()
+
+    def record(self, ev: str, **fields):
+        line = json.dumps(dict(t=round(time.time(), 3), ev=ev, **fields), separators=(",", ":"))
+        with self.lock:
+            if not self.file.closed:
+                self.file.write(line + "\n")
+                self.dirty = True
+
+    def _flush_loop(self, interval_s: float):
+        while not self.closed.wait(interval_s):
+            with self.lock:
+                if self.dirty and not self.file.closed:
+                    self.file.flush()
+                    self.dirty = False
+
+    def submit(self, job: Job):
+        reqs = job.resource_requirements
+        fields: Dict[str, Any] = dict(id=job.id, cpu=reqs.cpu_cores, mem=reqs.memory_mb, img=reqs.docker_image,
+                                      pri=job.priority, deps=job.dependencies, retries=job.max_retries)
+        if reqs.executor != "docker":
+            fields["exec"] = reqs.executor
+        if job.inputs:
+            fields["inputs"] = [[blob.digest, blob.size] for blob in job.inputs]
+        self.record("submit", **fields)
+
+    def node(self, node: Node, registered: bool = False):
+        """Record a node's capacity when it joins or its totals change"""
+        res = node.resources
+        if not res:
+            return
+        capacity = (res.cpu_total, res.memory_total_mb)
+        if not registered and self.node_capacity.get(node.id) == capacity:
+            return
+        self.node_capacity[node.id] = capacity
+        fields = dict(id=node.id, cpu=res.cpu_total, mem=res.memory_total_mb)
+        if registered:
+            fields["imgs"] = res.cached_images
+            if "executors" in node.capabilities:
+                fields["execs"] = node.capabilities["executors"]
+        self.record("node", **fields)
+
+    def down(self, node_id: str):
+        self.node_capacity.pop(node_id, None)
+        self.record("down", id=node_id)
+
+    def place(self, job: Job, node: Node):
+        self.record("place", id=job.id, node=node.id)
+
+    def end(self, job: Job, node: Node, exit_code: Optional[int], run_s: Optional[float]):
+        self.record("end", id=job.id, node=node.id, status=job.status.value, code=exit_code, run_s=run_s)
+
+    def close(self):
+        self.closed.set()
+        with self.lock:
+            self.file.close() # flushes what's left
+        self.flusher.join(timeout=5)
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue # torn last line after a crash
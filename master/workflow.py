@@ -0,0 +1,40 @@
+from typing import Callable, Dict, List
+
+def topological_order(deps: Dict[str, List[str]]) -> List[str]:
+    """
+    Task names ordered so each comes after everything it depends on. `deps` maps
+    every task to the tasks it waits for; raises ValueError on unknown names or cycles.
+    """
+    for name, parents in deps.items():
+        for parent in parents:
+            if parent not in deps:
+                raise ValueError(f"Task '{name}' depends on unknown task '{parent}'")
+    waiting = {name: len(set(parents)) for name, parents in deps.items()}
+    children: Dict[str, List[str]] = {}
+    for name, parents in deps.items():
+        for parent in set(parents):
+            children.setdefault(parent, []).append(name)
+    order = [name for name, count in waiting.items() if count == 0]
+    for name in order: # grows as tasks become free
+        for child in children.get(name, []):
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                order.append(child)
+    if len(order) < len(deps):
+        cyclic = sorted(name for name, count in waiting.items() if count > 0)
+        raise ValueError(f"Dependency cycle among tasks: {', '.join(cyclic[:10])}")
+    return order
+
+def critical_path(deps: Dict[str, List[str]], estimate: Callable[[str], float]) -> Dict[str, float]:
+    """
+    Remaining critical-path length per task: its own estimated runtime plus the
+    longest such path through anything that depends on it (upward rank).
+    """
+    children: Dict[str, List[str]] = {}
+    for name, parents in deps.items():
+        for parent in set(parents):
+            children.setdefault(parent, []).append(name)
+    rank: Dict[str, float] = {}
+    for name in reversed(topological_order(deps)):
+        rank[name] = estimate(name) + max((rank[child] for child in children.get(name, [])), default=0.0)
+    return rank
@@ -0,0 +1,74 @@
+import contextlib
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Run from the repo root: python scripts/bench_bulk_submit.py [jobs]
+# Starts the master API in-process (scheduler not started) and measures submission
+# throughput over real HTTP: one POST per job on a keep-alive session vs one bulk
+# NDJSON request.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DCLOUD_DATA_DIR", tempfile.mkdtemp(prefix="dcloud-bench-"))
+
+import requests
+import uvicorn
+from master.api_server import app
+
+SUBMISSION = {
+    "name": "bench",
+    "command": "echo ok",
+    "resource_requirements": {"cpu_cores": 1, "memory_mb": 128, "docker_image": "alpine"},
+}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def single(base: str, jobs: int) -> float:
+    session = requests.Session()
+    start = time.perf_counter()
+    for _ in range(jobs):
+        session.post(f"{base}/api/jobs", json=SUBMISSION).raise_for_status()
+    return jobs / (time.perf_counter() - start)
+
+def bulk(base: str, jobs: int) -> float:
+    line = json.dumps(SUBMISSION).encode() + b"\n"
+    start = time.perf_counter()
+    response = requests.post(f"{base}/api/jobs/bulk", data=(line for _ in range(jobs)),
+                             headers={"Content-Type": "application/x-ndjson"}, stream=True)
+    accepted = sum(1 for l in response.iter_lines() if l and "id" in json.loads(l))
+    elapsed = time.perf_counter() - start
+    if accepted != jobs:
+        raise RuntimeError(f"Only {accepted} of {jobs} accepted")
+    return jobs / elapsed
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    port = free_port()
+    server = start_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        # Server-side prints are per job on the single path; keep them off the terminal
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            single_rate = single(base, jobs)
+            bulk_rate = bulk(base, jobs)
+        print(f"{jobs} jobs")
+        print(f"POST /api/jobs (keep-alive)  : {single_rate:9.0f} jobs/s")
+        print(f"POST /api/jobs/bulk (NDJSON) : {bulk_rate:9.0f} jobs/s  ({bulk_rate / single_rate:.1f}x)")
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    main()
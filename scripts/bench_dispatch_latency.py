@@ -0,0 +1,59 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+# Run from the repo root: python scripts/bench_dispatch_latency.py [iterations]
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker.executor_daemon import ExecutorDaemon
+
+NOOP_JOB = {
+    "id": "bench",
+    "name": "noop",
+    "command": "true",
+    "resource_requirements": {"cpu_cores": 1, "memory_mb": 128, "docker_image": "alpine"},
+}
+
+def cold_dispatch() -> float:
+    """Old path: fresh interpreter per job (what SSH exec runs on the worker)"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "worker.execute_job", "--dry-run", json.dumps(NOOP_JOB)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+    )
+    return time.perf_counter() - start
+
+def warm_dispatch(port: int, token: str) -> float:
+    """New path: one request to the resident executor"""
+    start = time.perf_counter()
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        sock.sendall((json.dumps({"token": token, "job": NOOP_JOB, "dry_run": True}) + "\n").encode())
+        while sock.recv(65536):
+            pass
+    return time.perf_counter() - start
+
+def report(name, samples):
+    samples = sorted(s * 1000 for s in samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<28} median {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"Dispatch-to-start latency for no-op jobs ({iterations} runs, SSH transport excluded)")
+
+    report("before: execute_job process", [cold_dispatch() for _ in range(iterations)])
+
+    daemon = ExecutorDaemon(port=0)
+    daemon.start()
+    try:
+        warm_dispatch(daemon.port, daemon.token) # first request warms lazy imports
+        report("after: executor daemon", [warm_dispatch(daemon.port, daemon.token) for _ in range(iterations)])
+    finally:
+        daemon.stop()
+
+if __name__ == "__main__":
+    main()
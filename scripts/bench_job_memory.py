@@ -0,0 +1,70 @@
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+# Run from the repo root: python scripts/bench_job_memory.py [jobs]
+# Memory held per finished job as a pydantic Job vs a JobRecord, and the cost of
+# encoding a 1000-job listing the way FastAPI did (jsonable_encoder + json) vs
+# master.job_record's encoders.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from common.models import Job, JobResult, JobStatus, ResourceRequirements
+from master.job_record import JobRecord, dumps, jobs_json, orjson
+
+def make_jobs(count: int):
+    start = datetime(2024, 1, 1)
+    return [Job(
+        id=str(uuid.uuid4()), name=f"etl-{i % 20}", command="python run.py --shard 7",
+        resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=512, docker_image="python:3.9"),
+        tags=["nightly", "etl"], status=JobStatus.COMPLETED, assigned_node=f"node-{i % 500}",
+        submitted_at=start + timedelta(seconds=i), started_at=start + timedelta(seconds=i + 1),
+        completed_at=start + timedelta(seconds=i + 30),
+        result=JobResult(exit_code=0, stdout="processed 1000 rows\n" * 5, stderr="", execution_time_ms=29000,
+                         stages={"run": 28000.0, "container_start": 400.0}),
+        stages={"submit_to_ready": 3.1, "placement": 0.4, "ssh_connect": 12.0},
+    ) for i in range(count)]
+
+def measure(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, size
+
+def timed(fn, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    jobs, job_bytes = measure(lambda: make_jobs(count))
+    records, record_bytes = measure(lambda: [JobRecord(job) for job in jobs])
+    print(f"{count} finished jobs")
+    print(f"pydantic Job : {job_bytes / count:8.0f} B/job")
+    print(f"JobRecord    : {record_bytes / count:8.0f} B/job  ({job_bytes / record_bytes:.1f}x smaller)")
+
+    page_jobs, page_records = jobs[:1000], records[:1000]
+    baseline = timed(lambda: json.dumps(jsonable_encoder(page_jobs)).encode())
+    live = timed(lambda: jobs_json(page_jobs))
+    archived = timed(lambda: jobs_json(page_records))
+    summary = timed(lambda: dumps([record.summary().dict() for record in page_records]))
+    print(f"encoding a 1000-job page ({'orjson' if orjson else 'json'}):")
+    print(f"jsonable_encoder + json     : {baseline * 1000:7.1f} ms")
+    print(f"jobs_json, live Jobs        : {live * 1000:7.1f} ms  ({baseline / live:.1f}x)")
+    print(f"jobs_json, JobRecords       : {archived * 1000:7.1f} ms  ({baseline / archived:.1f}x)")
+    print(f"summaries of JobRecords     : {summary * 1000:7.1f} ms  ({baseline / summary:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import contextlib
+import os
+import sys
+import time
+import uuid
+
+# Run from the repo root: python scripts/bench_placement_shards.py [nodes] [jobs] [max_shards]
+# Placement throughput of the scheduler loop in-thread and with 1, 2, 4, ... placement
+# shard processes, on the same simulated fleet. Dispatch is stubbed out so only
+# queue handling, scoring and reservation are measured.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.models import Job, ResourceRequirements
+from master.cluster_manager import ClusterManager
+from master.job_scheduler import JobScheduler
+from simulator.simulation import make_nodes
+
+class PlacementOnly(JobScheduler):
+    def _start_dispatch(self, job, node):
+        pass
+
+def run(nodes: int, jobs: int, shards: int) -> tuple:
+    cluster = ClusterManager()
+    scheduler = PlacementOnly(cluster, placement_shards=shards)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for node in make_nodes(nodes):
+            cluster.register_node(node)
+        scheduler.submit_jobs([Job(
+            id=str(uuid.uuid4()), name="bench", command="true",
+            resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=512, docker_image="python:3.9"),
+        ) for _ in range(jobs)])
+        if shards:
+            scheduler.start() # spawns the shard processes
+            scheduler.running = False
+            scheduler.thread.join()
+        start = time.perf_counter()
+        while len(scheduler.reservations) < jobs:
+            if scheduler._schedule_step() and len(scheduler.reservations) < jobs and scheduler.job_queue.empty():
+                break
+        elapsed = time.perf_counter() - start
+        scheduler.stop()
+    return len(scheduler.reservations), elapsed
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    max_shards = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    print(f"{nodes} nodes, {jobs} jobs, {os.cpu_count()} CPUs")
+    counts = [0] + [n for n in (1, 2, 4, 8, 16, 32) if n <= max_shards]
+    baseline = None
+    for shards in counts:
+        placed, elapsed = run(nodes, jobs, shards)
+        rate = placed / elapsed
+        baseline = baseline or rate
+        label = "in-thread" if shards == 0 else f"{shards} shard{'s' if shards > 1 else ''}"
+        print(f"{label:<12} placed {placed:>7}  {rate:9.0f} jobs/s  ({rate / baseline:.1f}x)")
+
+if __name__ == "__main__":
+    main()
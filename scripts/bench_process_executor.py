@@ -0,0 +1,62 @@
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Run from the repo root:
+#   python scripts/bench_process_executor.py [jobs] [image]
+# Compares end-to-end latency of sub-second jobs on the process executor and,
+# when Docker is available, in cold containers.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.models import Job, ResourceRequirements
+from worker.docker_executor import DockerExecutor
+
+COMMANDS = [
+    ("true", "true"),
+    ("python -c pass", "python3 -c pass"),
+]
+
+def make_job(command: str, executor: str, image: str) -> Job:
+    return Job(
+        id=f"bench-{uuid.uuid4().hex[:8]}",
+        name="short",
+        command=command,
+        resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=256, docker_image=image,
+                                                   executor=executor, timeout=60),
+    )
+
+def measure(executor: DockerExecutor, command: str, backend: str, image: str, jobs: int) -> list:
+    latencies = []
+    for _ in range(jobs):
+        start = time.perf_counter()
+        result = executor.run_job(make_job(command, backend, image))
+        latencies.append((time.perf_counter() - start) * 1000)
+        if result.exit_code != 0:
+            raise RuntimeError(f"{backend} job failed: {result.stderr}")
+    return latencies
+
+def report(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<28} median {statistics.median(latencies):8.2f} ms   p95 {p95:8.2f} ms")
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    image = sys.argv[2] if len(sys.argv) > 2 else "python:3.11-alpine"
+
+    executor = DockerExecutor(process=True)
+    if executor.client:
+        executor.image_cache.ensure(image, hold=False)
+    else:
+        print("Docker is not available; measuring the process executor only.")
+
+    print(f"{jobs} sequential jobs per row")
+    for label, command in COMMANDS:
+        report(f"process   {label}", measure(executor, command, "process", image, jobs))
+        if executor.client:
+            report(f"docker    {label}", measure(executor, command, "docker", image, jobs))
+
+if __name__ == "__main__":
+    main()
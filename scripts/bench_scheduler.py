@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Run from the repo root: python scripts/bench_scheduler.py [nodes] [jobs] [seed]
+# Feeds generated workloads through the real JobScheduler/LoadBalancer against
+# simulated nodes on a virtual clock (see simulator/). Same arguments, same numbers,
+# except placements/s, which is the scheduler's real CPU cost on this machine.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator import workloads
+from simulator.simulation import Simulation, make_nodes
+
+COLUMNS = [
+    ("completed", "done"), ("makespan_s", "makespan s"), ("placements_per_s", "place/s"),
+    ("wait_p50_s", "wait p50"), ("wait_p95_s", "wait p95"), ("wait_p99_s", "wait p99"),
+    ("utilization", "util"), ("fragmentation", "frag"), ("wall_s", "wall s"),
+]
+
+def scenarios(nodes: int, jobs: int, seed: int):
+    return [
+        ("mixed", nodes, workloads.mixed(jobs, rate=jobs / 150, seed=seed)),
+        ("mixed, saturated", max(1, nodes // 10), workloads.mixed(jobs, rate=jobs / 150, fail_rate=0.05, seed=seed)),
+        ("burst", nodes, workloads.burst(jobs, seed=seed)),
+        ("dag", nodes, workloads.dag(jobs // 2, width=50, seed=seed)),
+    ]
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    print(f"{'scenario':<18} {'nodes':>6} {'jobs':>6} " + " ".join(f"{title:>10}" for _, title in COLUMNS))
+    for name, fleet, workload in scenarios(nodes, jobs, seed):
+        report = Simulation(make_nodes(fleet, seed=seed), workload).run()
+        print(f"{name:<18} {fleet:>6} {len(workload):>6} " + " ".join(f"{report[key]:>10}" for key, _ in COLUMNS))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import uuid
+
+# Run from the repo root on a machine with Docker:
+#   python scripts/bench_warm_pool.py [jobs] [image]
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.models import Job, ResourceRequirements
+from worker.docker_executor import DockerExecutor
+
+def make_job(image: str) -> Job:
+    return Job(
+        id=f"bench-{uuid.uuid4().hex[:8]}",
+        name="short",
+        command="echo ok",
+        resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=128, docker_image=image, timeout=60),
+    )
+
+def run_batch(executor: DockerExecutor, jobs: int, image: str) -> float:
+    start = time.perf_counter()
+    for _ in range(jobs):
+        result = executor.run_job(make_job(image))
+        if result.exit_code != 0:
+            raise RuntimeError(f"Job failed: {result.stderr}")
+    return jobs / (time.perf_counter() - start)
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    image = sys.argv[2] if len(sys.argv) > 2 else "alpine:3.19"
+
+    cold = DockerExecutor()
+    if not cold.client:
+        print("Docker is not available; nothing to measure.")
+        sys.exit(1)
+    cold.image_cache.ensure(image, hold=False)
+
+    print(f"{jobs} sequential 'echo ok' jobs on {image}")
+    cold_rate = run_batch(cold, jobs, image)
+    print(f"cold containers : {cold_rate:7.2f} jobs/s")
+
+    warm = DockerExecutor(warm_pool=True)
+    try:
+        warm_rate = run_batch(warm, jobs, image)
+        print(f"warm pool       : {warm_rate:7.2f} jobs/s  ({warm_rate / cold_rate:.1f}x)")
+        print(f"pool stats      : {warm.warm_pool.stats()}")
+    finally:
+        warm.warm_pool.shutdown()
+
+if __name__ == "__main__":
+    main()
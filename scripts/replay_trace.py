@@ -0,0 +1,55 @@
+import os
+import sys
+
+# Run from the repo root:
+#   python scripts/replay_trace.py TRACE [NAME:key=value,key=value ...]
+# Replays a trace recorded by the master (DCLOUD_TRACE_FILE) through the real
+# scheduler on a virtual clock, once with the default settings and once per
+# alternative, and prints them next to what the trace itself recorded. Keys are
+# load balancer weights (see master/load_balancer.py DEFAULT_WEIGHTS),
+# queue_policy (priority|fifo) and dispatch_latency (seconds), e.g.
+#   python scripts/replay_trace.py data/trace.ndjson packed:cpu=0.3,memory=0.2 fifo:queue_policy=fifo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from master.load_balancer import DEFAULT_WEIGHTS
+from simulator.replay import Trace, replay
+
+ROWS = [
+    ("jobs", "jobs"), ("completed", "completed"), ("makespan_s", "makespan (s)"),
+    ("wait_p50_s", "wait p50 (s)"), ("wait_p95_s", "wait p95 (s)"), ("wait_p99_s", "wait p99 (s)"),
+    ("utilization", "utilization"), ("wall_s", "replay wall (s)"),
+]
+
+def parse_alternative(arg: str):
+    name, _, settings = arg.partition(":")
+    options = {"weights": {}}
+    for pair in filter(None, settings.split(",")):
+        key, _, value = pair.partition("=")
+        if key == "queue_policy":
+            options["queue_policy"] = value
+        elif key == "dispatch_latency":
+            options["dispatch_latency"] = float(value)
+        elif key in DEFAULT_WEIGHTS:
+            options["weights"][key] = float(value)
+        else:
+            sys.exit(f"Unknown setting '{key}' in {arg}")
+    return name, options
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("usage: python scripts/replay_trace.py TRACE [NAME:key=value,...]")
+    trace = Trace(sys.argv[1])
+    if not trace.items:
+        sys.exit("No finished jobs in trace")
+
+    columns = [("recorded", trace.recorded()), ("replay", replay(trace))]
+    for arg in sys.argv[2:]:
+        name, options = parse_alternative(arg)
+        columns.append((name, replay(trace, **options)))
+
+    print(f"{'':<16}" + "".join(f"{name:>14}" for name, _ in columns))
+    for key, title in ROWS:
+        print(f"{title:<16}" + "".join(f"{str(report.get(key, '-')):>14}" for _, report in columns))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Optional
+from common.models import InputBlob, Job, JobStatus, Node, NodeResources, ResourceRequirements
+from master.load_balancer import LoadBalancer
+from master.trace import read_trace
+from simulator.simulation import Simulation, percentile
+from simulator.workloads import WorkItem
+
+class Trace:
+    """
+    A recorded master trace (master/trace.py) turned into simulator input: node
+    joins/changes/departures and one WorkItem per job that finished in the trace,
+    timed relative to the first event. Jobs still running or cancelled when the
+    trace ends are left out (dependencies on them are dropped).
+    """
+    def __init__(self, path: str):
+        events = sorted(read_trace(path), key=lambda e: e["t"])
+        self.start = events[0]["t"] if events else 0.0
+        self.node_events: List[tuple] = [] # (time, "node", Node) or (time, "down", node_id)
+        submits: Dict[str, dict] = {}
+        places: Dict[str, List[float]] = {}
+        ends: Dict[str, List[dict]] = {}
+        for event in events:
+            t = event["t"] - self.start
+            kind = event["ev"]
+            if kind == "node":
+                self.node_events.append((t, "node", self._node(event)))
+            elif kind == "down":
+                self.node_events.append((t, "down", event["id"]))
+            elif kind == "submit":
+                submits[event["id"]] = dict(event, t=t)
+            elif kind == "place":
+                places.setdefault(event["id"], []).append(t)
+            elif kind == "end":
+                ends.setdefault(event["id"], []).append(dict(event, t=t))
+
+        self.items: List[WorkItem] = []
+        self.recorded_attempts: List[tuple] = [] # (job_id, placed, ended, cpu, run_s)
+        finished = {job_id for job_id, attempts in ends.items()
+                    if job_id in submits and attempts[-1]["status"] in (JobStatus.COMPLETED.value, JobStatus.FAILED.value)}
+        for job_id, submit in submits.items():
+            if job_id not in finished:
+                continue
+            attempts = ends[job_id]
+            placed = places.get(job_id, [])
+            for i, attempt in enumerate(attempts):
+                start = placed[i] if i < len(placed) else attempt["t"]
+                run_s = attempt.get("run_s")
+                if run_s is None:
+                    run_s = max(0.0, attempt["t"] - start)
+                self.recorded_attempts.append((job_id, start, attempt["t"], submit["cpu"], run_s))
+            last = self.recorded_attempts[-1]
+            completed = attempts[-1]["status"] == JobStatus.COMPLETED.value
+            job = self._job(submit, [dep for dep in submit.get("deps", []) if dep in finished])
+            self.items.append(WorkItem(job, submit["t"], last[4], len(attempts) - 1 if completed else len(attempts)))
+        self.submits = submits
+        self.ends = ends
+
+    def _node(self, event: dict) -> Node:
+        return Node(
+            id=event["id"], hostname=event["id"], ip_address="0.0.0.0", ssh_user="replay",
+            capabilities={"executors": event["execs"]} if "execs" in event else {},
+            resources=NodeResources(
+                cpu_total=event["cpu"], cpu_available=event["cpu"],
+                memory_total_mb=event["mem"], memory_available_mb=event["mem"],
+                disk_total_gb=0, disk_free_gb=0, cached_images=event.get("imgs", []),
+            ),
+        )
+
+    def _job(self, submit: dict, dependencies: List[str]) -> Job:
+        return Job(
+            id=submit["id"], name="replay", command="true",
+            priority=submit.get("pri", 0), dependencies=dependencies, max_retries=submit.get("retries", 3),
+            inputs=[InputBlob(digest=digest, path=f"in/{i}", size=size) for i, (digest, size) in enumerate(submit.get("inputs", []))],
+            resource_requirements=ResourceRequirements(
+                cpu_cores=submit["cpu"], memory_mb=submit["mem"], docker_image=submit.get("img"),
+                executor=submit.get("exec", "docker"),
+            ),
+        )
+
+    def dispatch_latency(self) -> float:
+        """Median overhead between placement and the end of an attempt beyond its run time"""
+        overheads = [max(0.0, ended - placed - run_s) for _, placed, ended, _, run_s in self.recorded_attempts]
+        return percentile(overheads, 50)
+
+    def recorded(self) -> Dict[str, Any]:
+        """The same figures Simulation reports, for what actually happened"""
+        if not self.recorded_attempts:
+            return {}
+        completed_at = {job_id: attempts[-1]["t"] for job_id, attempts in self.ends.items()
+                        if attempts[-1]["status"] == JobStatus.COMPLETED.value}
+        waits, ready, busy = [], {}, 0.0
+        for job_id, placed, ended, cpu, run_s in sorted(self.recorded_attempts, key=lambda a: a[1]):
+            submit = self.submits[job_id]
+            if job_id not in ready:
+                deps = [completed_at[dep] for dep in submit.get("deps", []) if dep in completed_at]
+                ready[job_id] = max([submit["t"]] + deps)
+            waits.append(max(0.0, placed - ready[job_id]))
+            ready[job_id] = ended # a retry is ready again once the failed attempt ends
+            busy += cpu * run_s
+        first = min(item.arrival for item in self.items)
+        makespan = max(max(a[2] for a in self.recorded_attempts) - first, 1e-9)
+        cores = self._total_cores()
+        return {
+            "jobs": len(self.items),
+            "completed": len(completed_at.keys() & {item.job.id for item in self.items}),
+            "makespan_s": round(makespan, 1),
+            "wait_p50_s": round(percentile(waits, 50), 2),
+            "wait_p95_s": round(percentile(waits, 95), 2),
+            "wait_p99_s": round(percentile(waits, 99), 2),
+            "utilization": round(busy / (cores * makespan), 3) if cores else 0.0,
+        }
+
+    def _total_cores(self) -> int:
+        latest: Dict[str, int] = {}
+        for _, kind, node in self.node_events:
+            if kind == "node":
+                latest[node.id] = node.resources.cpu_total
+        return sum(latest.values())
+
+def replay(trace: Trace, weights: Optional[Dict[str, float]] = None, queue_policy: str = "priority",
+           dispatch_latency: Optional[float] = None) -> Dict[str, Any]:
+    """Run the trace's workload and fleet through the scheduler with the given settings"""
+    # Fresh jobs per replay too: the scheduler moves them through statuses, retries and results
+    items = [WorkItem(item.job.copy(deep=True), item.arrival, item.runtime, item.failures) for item in trace.items]
+    sim = Simulation([], items, load_balancer=LoadBalancer(weights), queue_policy=queue_policy,
+                     dispatch_latency=trace.dispatch_latency() if dispatch_latency is None else dispatch_latency)
+    for at, kind, node in trace.node_events:
+        if kind == "node":
+            # Fresh copy per replay: the scheduler mutates node resources as it reserves
+            sim.add_node(node.copy(deep=True), at)
+        else:
+            sim.remove_node(node, at)
+    return sim.run()
@@ -0,0 +1,232 @@
+import contextlib
+import math
+import os
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from common.models import Job, JobResult, JobStatus, Node, NodeResources
+from master.cluster_manager import ClusterManager
+from master.job_scheduler import JobScheduler
+from master.load_balancer import LoadBalancer
+from simulator.clock import VirtualClock
+from simulator.workloads import IMAGES, WorkItem
+
+# (share, cpu_total, memory_total_mb) of simulated machines
+NODE_SIZES = [
+    (0.5, 8, 32768),
+    (0.3, 16, 65536),
+    (0.2, 4, 8192),
+]
+
+def make_nodes(count: int, seed: int = 0) -> List[Node]:
+    """A mixed fleet of idle nodes; a few images are pre-cached on each"""
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(count):
+        _, cpu, memory = rng.choices(NODE_SIZES, weights=[s[0] for s in NODE_SIZES])[0]
+        nodes.append(Node(
+            id=f"sim-node-{i}",
+            hostname=f"sim-{i}",
+            ip_address=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            ssh_user="sim",
+            resources=NodeResources(
+                cpu_total=cpu, cpu_available=cpu,
+                memory_total_mb=memory, memory_available_mb=memory,
+                disk_total_gb=500, disk_free_gb=500,
+                cached_images=rng.sample(IMAGES, rng.randint(0, 2)),
+            ),
+        ))
+    return nodes
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class _SimSSH:
+    """Stands in for the pooled SSHClient: the worker 'returns' whatever the simulation decided"""
+    def __init__(self, sim: "Simulation"):
+        self.sim = sim
+
+    def ensure_connected(self):
+        pass
+
+    def exec_command_stream(self, command: str, on_line, timeout: int = None, stages=None):
+        result = self.sim.outcome
+        on_line(result.json())
+        return result.exit_code, result.stderr
+
+
+class SimScheduler(JobScheduler):
+    """
+    The real JobScheduler (queue, dependency checks, load balancing, reservations,
+    retries) with its I/O seams replaced: dispatch is scheduled on the virtual clock
+    and the SSH round trip returns the simulated outcome.
+    """
+    def __init__(self, sim: "Simulation", cluster_manager: ClusterManager, queue_policy: str = "priority"):
+        super().__init__(cluster_manager, queue_policy=queue_policy)
+        self.sim = sim
+        self.sim_ssh = _SimSSH(sim)
+
+    def _get_ssh_client(self, node: Node):
+        return self.sim_ssh
+
+    def _start_dispatch(self, job: Job, node: Node):
+        self.sim._placed(job, node)
+
+    def _find_node_for_job(self, job: Job) -> Optional[Node]:
+        node = super()._find_node_for_job(job)
+        if node is None:
+            self.sim._blocked(job)
+        return node
+
+
+class Simulation:
+    """
+    Runs a workload through the real scheduler against simulated nodes on a virtual
+    clock. The scheduling loop is stepped exactly as JobScheduler.start() would run
+    it, with its sleeps taken in virtual time; a placed job completes after
+    `dispatch_latency` plus its runtime. run() returns the report.
+    """
+    def __init__(self, nodes: List[Node], workload: List[WorkItem], dispatch_latency: float = 0.05,
+                 load_balancer: LoadBalancer = None, queue_policy: str = "priority", quiet: bool = True):
+        self.clock = VirtualClock()
+        self.cluster_manager = ClusterManager()
+        self.scheduler = SimScheduler(self, self.cluster_manager, queue_policy)
+        if load_balancer:
+            self.scheduler.load_balancer = load_balancer
+        self.initial_nodes = nodes
+        self.nodes = list(nodes) # every node that takes part, for utilization
+        self.workload = {item.job.id: item for item in workload}
+        self.dependents: Dict[str, List[Job]] = {}
+        for item in workload:
+            for dep in item.job.dependencies:
+                self.dependents.setdefault(dep, []).append(item.job)
+        self.dispatch_latency = dispatch_latency
+        self.quiet = quiet
+        self.outcome: Optional[JobResult] = None
+
+        self.ready_at: Dict[str, float] = {} # job_id -> virtual time it became placeable
+        self.waits: List[float] = []
+        self.attempts: Dict[str, int] = {}
+        self.completed_at: Dict[str, float] = {}
+        self.last_finish = 0.0
+        self.busy_core_s = 0.0
+        self.placements = 0
+        self.blocked = 0
+        self.fragmented = 0 # blocked placements that would have fit in the cluster's free capacity combined
+        self.scheduler_s = 0.0
+
+    def run(self, max_time: float = 7 * 86400) -> Dict[str, Any]:
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.redirect_stdout(devnull) if self.quiet else contextlib.nullcontext()):
+            for node in self.initial_nodes:
+                self._register(node)
+            for item in self.workload.values():
+                self.clock.call_at(item.arrival, self._submit, item)
+
+            started = time.perf_counter()
+            while self.clock.now <= max_time:
+                step = time.perf_counter()
+                delay = self.scheduler._schedule_step()
+                self.scheduler_s += time.perf_counter() - step
+                if not delay:
+                    self.clock.run_until(self.clock.now)
+                    continue
+                upcoming = self.clock.next_time()
+                if upcoming is None:
+                    break # nothing left that could change what the scheduler sees
+                wake = self.clock.now + delay
+                if self.scheduler.job_queue.empty() and upcoming > wake:
+                    # Idle: skip the empty polls, landing on the loop's own tick
+                    wake += math.ceil((upcoming - wake) / delay) * delay
+                self.clock.run_until(wake)
+            wall_s = time.perf_counter() - started
+        return self._report(wall_s)
+
+    def add_node(self, node: Node, at: float):
+        """Have `node` join (or re-register with new totals) at virtual time `at`"""
+        if all(known.id != node.id for known in self.nodes):
+            self.nodes.append(node)
+        self.clock.call_at(at, self._register, node)
+
+    def remove_node(self, node_id: str, at: float):
+        """Have a node stop heartbeating at `at`; the scheduler stops placing on it"""
+        self.clock.call_at(at, self._expire, node_id)
+
+    def _register(self, node: Node):
+        self.cluster_manager.register_node(node)
+        node.last_heartbeat = datetime.max # simulated nodes never miss a heartbeat
+
+    def _expire(self, node_id: str):
+        if node_id in self.cluster_manager.nodes:
+            self.cluster_manager.nodes[node_id].last_heartbeat = datetime.min
+
+    def _submit(self, item: WorkItem):
+        self.scheduler.submit_job(item.job)
+        self._mark_ready(item.job)
+
+    def _mark_ready(self, job: Job):
+        deps = [self.completed_at.get(dep, math.inf) for dep in job.dependencies]
+        self.ready_at[job.id] = max([self.clock.now] + deps)
+
+    def _placed(self, job: Job, node: Node):
+        item = self.workload[job.id]
+        ready = self.ready_at.get(job.id, self.clock.now)
+        self.waits.append(max(0.0, self.clock.now - ready))
+        self.placements += 1
+        self.busy_core_s += job.resource_requirements.cpu_cores * item.runtime
+        self.clock.call_later(self.dispatch_latency + item.runtime, self._finished, job, node)
+
+    def _finished(self, job: Job, node: Node):
+        item = self.workload[job.id]
+        attempt = self.attempts.get(job.id, 0)
+        self.attempts[job.id] = attempt + 1
+        code = 1 if attempt < item.failures else 0
+        self.outcome = JobResult(exit_code=code, stdout="", stderr="" if code == 0 else "simulated failure",
+                                 execution_time_ms=int(item.runtime * 1000))
+        self.scheduler._dispatch_to_worker(job, node)
+        self.last_finish = self.clock.now
+        if job.status == JobStatus.COMPLETED:
+            self.completed_at[job.id] = self.clock.now
+            for child in self.dependents.get(job.id, []):
+                self._mark_ready(child)
+        elif job.status == JobStatus.QUEUED:
+            self.ready_at[job.id] = self.clock.now # retry
+
+    def _blocked(self, job: Job):
+        """The queue head found no node; was there enough free capacity, just scattered across nodes?"""
+        self.blocked += 1
+        reqs = job.resource_requirements
+        free_cpu = free_memory = 0
+        for node in self.cluster_manager.nodes.values():
+            free_cpu += node.resources.cpu_available
+            free_memory += node.resources.memory_available_mb
+        if free_cpu >= reqs.cpu_cores and free_memory >= reqs.memory_mb:
+            self.fragmented += 1
+
+    def _report(self, wall_s: float) -> Dict[str, Any]:
+        statuses = [self.scheduler.jobs[job_id].status for job_id in self.workload if job_id in self.scheduler.jobs]
+        first = min((item.arrival for item in self.workload.values()), default=0.0)
+        makespan = max(self.last_finish - first, 1e-9)
+        total_cores = sum(node.resources.cpu_total for node in self.nodes)
+        return {
+            "nodes": len(self.nodes),
+            "jobs": len(self.workload),
+            "completed": statuses.count(JobStatus.COMPLETED),
+            "failed": statuses.count(JobStatus.FAILED),
+            "unfinished": len(self.workload) - statuses.count(JobStatus.COMPLETED) - statuses.count(JobStatus.FAILED),
+            "makespan_s": round(makespan, 1),
+            "placements": self.placements,
+            "placements_per_s": round(self.placements / self.scheduler_s, 1) if self.scheduler_s else 0.0,
+            "wait_p50_s": round(percentile(self.waits, 50), 2),
+            "wait_p95_s": round(percentile(self.waits, 95), 2),
+            "wait_p99_s": round(percentile(self.waits, 99), 2),
+            "utilization": round(self.busy_core_s / (total_cores * makespan), 3) if total_cores else 0.0,
+            "blocked_placements": self.blocked,
+            "fragmentation": round(self.fragmented / self.blocked, 3) if self.blocked else 0.0,
+            "wall_s": round(wall_s, 2),
+        }
@@ -0,0 +1,72 @@
+import random
+from typing import List
+from common.models import Job, ResourceRequirements
+
+# (share, cpu_cores, memory_mb, runtime range in seconds)
+JOB_SIZES = [
+    (0.70, 1, 512, (1, 10)),
+    (0.25, 2, 2048, (10, 60)),
+    (0.05, 8, 16384, (60, 300)),
+]
+IMAGES = ["python:3.11-slim", "alpine:3.19", "ubuntu:22.04", "node:20-slim"]
+
+class WorkItem:
+    """A job to submit at `arrival` (virtual seconds) that runs for `runtime` once placed"""
+    def __init__(self, job: Job, arrival: float, runtime: float, failures: int = 0):
+        self.job = job
+        self.arrival = arrival
+        self.runtime = runtime
+        self.failures = failures # attempts that exit non-zero before one succeeds
+
+def _job(i: int, rng: random.Random, name: str, dependencies: List[str] = None, priority: int = 0):
+    _, cpu, memory, runtime = rng.choices(JOB_SIZES, weights=[s[0] for s in JOB_SIZES])[0]
+    job = Job(
+        id=f"sim-{i}",
+        name=name,
+        command="true",
+        priority=priority,
+        dependencies=dependencies or [],
+        resource_requirements=ResourceRequirements(cpu_cores=cpu, memory_mb=memory, docker_image=rng.choice(IMAGES)),
+    )
+    return job, rng.uniform(*runtime)
+
+def _failures(rng: random.Random, fail_rate: float) -> int:
+    failures = 0
+    while failures < 5 and rng.random() < fail_rate:
+        failures += 1
+    return failures
+
+def mixed(count: int, rate: float = 20.0, fail_rate: float = 0.0, seed: int = 0) -> List[WorkItem]:
+    """Steady Poisson arrivals (`rate` jobs/s) of mostly small, some medium and a few large jobs"""
+    rng = random.Random(seed)
+    items, t = [], 0.0
+    for i in range(count):
+        t += rng.expovariate(rate)
+        job, runtime = _job(i, rng, "mixed", priority=rng.choice([0, 0, 0, 1, 5]))
+        items.append(WorkItem(job, t, runtime, _failures(rng, fail_rate)))
+    return items
+
+def burst(count: int, bursts: int = 4, gap: float = 120.0, seed: int = 0) -> List[WorkItem]:
+    """`count` jobs submitted all at once in `bursts` waves, `gap` seconds apart"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        job, runtime = _job(i, rng, "burst")
+        items.append(WorkItem(job, (i % bursts) * gap, runtime))
+    return items
+
+def dag(count: int, width: int = 50, fan_in: int = 3, seed: int = 0, arrival: float = 0.0) -> List[WorkItem]:
+    """
+    A layered DAG submitted up front: layers of `width` jobs, each depending on up to
+    `fan_in` random jobs of the previous layer.
+    """
+    rng = random.Random(seed)
+    items: List[WorkItem] = []
+    previous: List[str] = []
+    for i in range(count):
+        if i % width == 0 and items:
+            previous = [item.job.id for item in items[-width:]]
+        deps = rng.sample(previous, min(len(previous), rng.randint(1, fan_in))) if previous else []
+        job, runtime = _job(i, rng, f"dag-{i // width}", dependencies=deps)
+        items.append(WorkItem(job, arrival, runtime))
+    return items
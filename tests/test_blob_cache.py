@@ -0,0 +1,47 @@
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from common.models import InputBlob, Job, ResourceRequirements
+from worker.blob_cache import BlobCache
+
+class TestBlobCache(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.data = b"shared input\n"
+        self.digest = hashlib.sha256(self.data).hexdigest()
+        blobs = os.path.join(self.root, ".blobs")
+        os.makedirs(blobs)
+        self.blob = os.path.join(blobs, self.digest)
+        with open(self.blob, "wb") as f:
+            f.write(self.data)
+        os.chmod(self.blob, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        self.cache = BlobCache(root=blobs)
+        self.job = Job(id="j1", name="t", command="true", inputs=[InputBlob(digest=self.digest, path="in/data.txt")],
+                       resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=256, executor="process"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_copy_is_private(self):
+        job_dir = os.path.join(self.root, "j1")
+        self.assertEqual(self.cache.stage(self.job, job_dir, copy=True), [])
+        target = os.path.join(job_dir, "in", "data.txt")
+        self.assertNotEqual(os.stat(target).st_ino, os.stat(self.blob).st_ino)
+        os.chmod(target, 0o644)
+        with open(target, "wb") as f:
+            f.write(b"overwritten")
+        self.cache.unstage(self.job)
+        with open(self.blob, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(stat.S_IMODE(os.stat(self.blob).st_mode), 0o444)
+
+    def test_binds_are_read_only(self):
+        binds = self.cache.stage(self.job, os.path.join(self.root, "j1"))
+        self.assertEqual(binds, [f"{self.blob}:/workspace/in/data.txt:ro"])
+        self.cache.unstage(self.job)
+
+if __name__ == '__main__':
+    unittest.main()
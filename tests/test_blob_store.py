@@ -0,0 +1,26 @@
+import os
+import unittest
+import zlib
+from master.blob_store import INFLATE_PIECE, InflatedTooLarge, Inflater
+
+class TestInflater(unittest.TestCase):
+    def test_round_trip_in_bounded_pieces(self):
+        plain = os.urandom(1024) * 3000 # ~3 MB that deflates well
+        inflater = Inflater(max_bytes=len(plain))
+        body = zlib.compress(plain)
+        pieces = [piece for i in range(0, len(body), 4096) for piece in inflater.feed(body[i:i + 4096])]
+        pieces.append(inflater.flush())
+        self.assertEqual(b"".join(pieces), plain)
+        self.assertLessEqual(max(len(piece) for piece in pieces), INFLATE_PIECE)
+
+    def test_stops_past_the_limit(self):
+        bomb = zlib.compress(bytes(64 * 1024 * 1024)) # 64 MB of zeros in ~64 KB
+        inflater = Inflater(max_bytes=8 * 1024 * 1024)
+        inflated = 0
+        with self.assertRaises(InflatedTooLarge):
+            for piece in inflater.feed(bomb):
+                inflated += len(piece)
+        self.assertLessEqual(inflated, 8 * 1024 * 1024)
+
+if __name__ == '__main__':
+    unittest.main()
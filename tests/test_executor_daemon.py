@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import unittest
+from unittest import mock
+from worker.executor_daemon import ExecutorDaemon
+
+JOB = {"id": "j1", "name": "noop", "command": "true",
+       "resource_requirements": {"cpu_cores": 1, "memory_mb": 128, "docker_image": "img"}}
+
+class TestExecutorDaemon(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.token_file = os.path.join(self.root, ".dcloud", "executor_token")
+        self.executor = mock.MagicMock(warm_pool=None, retain_s=60)
+        self.daemon = ExecutorDaemon(port=0, executor=self.executor, token_file=self.token_file)
+        with mock.patch("worker.executor_daemon.sweep_workspaces", return_value=0), \
+                mock.patch("worker.executor_daemon.sweep_kept_workspaces", return_value=0):
+            self.daemon.start()
+
+    def tearDown(self):
+        self.daemon.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def request(self, payload: dict):
+        with socket.create_connection(("127.0.0.1", self.daemon.port)) as sock:
+            sock.sendall((json.dumps(payload) + "\n").encode())
+            data = b""
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        return [json.loads(line) for line in data.decode().splitlines()]
+
+    def test_token_file_is_private(self):
+        with open(self.token_file) as f:
+            self.assertEqual(f.read(), self.daemon.token)
+        self.assertEqual(stat.S_IMODE(os.stat(self.token_file).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(self.token_file)).st_mode), 0o700)
+
+    def test_requires_token(self):
+        self.assertEqual(self.request({"job": JOB, "dry_run": True}), [{"error": "unauthorized"}])
+        self.assertEqual(self.request({"token": "guess", "job": JOB}), [{"error": "unauthorized"}])
+        self.executor.run_job.assert_not_called()
+        lines = self.request({"token": self.daemon.token, "job": JOB, "dry_run": True})
+        self.assertEqual(lines[-1]["exit_code"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
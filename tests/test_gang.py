@@ -0,0 +1,135 @@
+import time
+import unittest
+from common.models import Job, JobResult, JobStatus, Node, NodeResources, NodeStatus, ResourceRequirements
+from master.cluster_manager import ClusterManager
+from master.gang import GangAssembly, member_env
+from master.job_scheduler import JobScheduler
+from simulator.simulation import make_nodes
+
+def make_gang(size: int, job_id: str = "g1", **env) -> Job:
+    return Job(id=job_id, name="mpi", command="mpirun ./solver", gang_size=size, env=dict(OMP_NUM_THREADS="4", **env),
+               max_retries=0,
+               resource_requirements=ResourceRequirements(cpu_cores=4, memory_mb=1024, docker_image="mpi:latest"))
+
+def make_node(i: int) -> Node:
+    return Node(id=f"n{i}", hostname=f"h{i}", ip_address=f"10.0.0.{i}", ssh_user="u", status=NodeStatus.ACTIVE,
+                resources=NodeResources(cpu_total=4, cpu_available=4, memory_total_mb=8000, memory_available_mb=8000,
+                                        disk_total_gb=100, disk_free_gb=100))
+
+def wait_for(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+class TestGang(unittest.TestCase):
+    def test_member_env(self):
+        nodes = make_nodes(3)
+        env = member_env(make_gang(3), nodes, 2)
+        self.assertEqual(env["OMP_NUM_THREADS"], "4")
+        self.assertEqual(env["DCLOUD_GANG_ID"], "g1")
+        self.assertEqual(env["DCLOUD_GANG_SIZE"], "3")
+        self.assertEqual(env["DCLOUD_GANG_RANK"], "2")
+        self.assertEqual(env["DCLOUD_GANG_HOSTS"].split(","), [node.ip_address for node in nodes])
+
+    def test_assembly_expires_only_while_incomplete(self):
+        assembly = GangAssembly(make_gang(2), now=100)
+        assembly.nodes.append(make_nodes(1)[0])
+        self.assertFalse(assembly.expired(110, timeout=30))
+        self.assertTrue(assembly.expired(131, timeout=30))
+        assembly.nodes.append(make_nodes(2)[1])
+        self.assertTrue(assembly.complete())
+        self.assertFalse(assembly.expired(131, timeout=30))
+
+
+class TestGangScheduling(unittest.TestCase):
+    def setUp(self):
+        self.cluster = ClusterManager()
+        self.nodes = [self.cluster.register_node(make_node(i)) for i in range(3)]
+        self.scheduler = JobScheduler(self.cluster)
+        self.members = [] # (node_id, rank) per member started
+        self.killed = []
+        self.scheduler._run_on_worker = self.run_member
+        self.scheduler._kill_on_worker = lambda job_id, attempt, node: self.killed.append(node.id)
+        self.scheduler._start_dispatch = lambda job, node: None # plain jobs just stay running
+
+    def run_member(self, job, node, on_line):
+        rank = job.env["DCLOUD_GANG_RANK"]
+        self.members.append((node.id, rank))
+        result = JobResult(exit_code=0, stdout="", stderr="", execution_time_ms=5)
+        if job.env.get("FAIL_RANK") == rank:
+            result.exit_code = 3
+        if job.env.get("REJECT_RANK") == rank:
+            result.exit_code, result.rejected = 75, True
+        on_line(result.json())
+        return None, ""
+
+    def step(self, times: int = 1):
+        for _ in range(times):
+            self.scheduler.gangs_retried = 0
+            self.scheduler._schedule_step()
+
+    def small_job(self, i: int) -> Job:
+        return Job(id=f"s{i}", name="small", command="echo",
+                   resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=256, docker_image="img"))
+
+    def test_starts_only_with_all_nodes(self):
+        self.cluster.reserve(self.nodes[2], 4, 0) # busy
+        gang = self.scheduler.submit_job(make_gang(3))
+        self.step(3)
+        self.assertEqual(gang.status, JobStatus.QUEUED)
+        self.assertEqual(len(self.scheduler.gangs["g1"].nodes), 2)
+        self.assertEqual(self.members, [])
+        self.cluster.release(self.nodes[2], 4, 0)
+        self.step()
+        self.assertTrue(wait_for(lambda: gang.status == JobStatus.COMPLETED))
+        self.assertEqual(sorted(gang.gang_nodes), ["n0", "n1", "n2"])
+        self.assertEqual(sorted(self.members), sorted((node_id, str(rank)) for rank, node_id in enumerate(gang.gang_nodes)))
+        self.assertEqual(self.scheduler.reservations, set())
+        self.assertEqual([node.resources.cpu_available for node in self.nodes], [4, 4, 4])
+
+    def test_waiting_gang_does_not_block_the_queue(self):
+        self.cluster.reserve(self.nodes[2], 4, 0)
+        gang = self.scheduler.submit_job(make_gang(3))
+        small = [self.scheduler.submit_job(self.small_job(i)) for i in range(3)]
+        self.step(4)
+        self.assertEqual(gang.status, JobStatus.QUEUED)
+        self.assertIn("g1", self.scheduler.waiting_gangs)
+        # The gang holds n0 and n1, so nothing fits the small jobs, but they get their turns
+        self.assertTrue(all(job.status == JobStatus.QUEUED for job in small))
+        # Once the gang gives up its partial hold, they run
+        self.scheduler.gangs["g1"].since -= 1000
+        self.step(4)
+        self.assertEqual(self.scheduler.gangs, {})
+        self.assertIn("g1", self.scheduler.gang_backoff)
+        self.assertTrue(all(job.status == JobStatus.RUNNING for job in small))
+        self.assertEqual(gang.status, JobStatus.QUEUED)
+        self.assertEqual({key[0] for key in self.scheduler.reservations}, {"s0", "s1", "s2"})
+
+    def test_never_holds_nodes_for_an_impossible_gang(self):
+        gang = self.scheduler.submit_job(make_gang(4))
+        self.step(2)
+        self.assertEqual(gang.status, JobStatus.QUEUED)
+        self.assertEqual(self.scheduler.gangs, {})
+        self.assertEqual(self.scheduler.reservations, set())
+        self.scheduler.cancel_job("g1")
+        self.assertEqual(self.scheduler.waiting_gangs, {})
+
+    def test_first_failure_kills_the_rest(self):
+        gang = self.scheduler.submit_job(make_gang(3, FAIL_RANK="1"))
+        self.step()
+        self.assertTrue(wait_for(lambda: gang.status == JobStatus.FAILED))
+        self.assertEqual(gang.result.exit_code, 3)
+        self.assertEqual(sorted(self.killed), sorted(node_id for node_id in gang.gang_nodes if node_id != gang.gang_nodes[1]))
+        self.assertEqual(self.scheduler.reservations, set())
+
+    def test_rejected_member_requeues_the_gang(self):
+        gang = self.scheduler.submit_job(make_gang(2, REJECT_RANK="0"))
+        self.step()
+        self.assertTrue(wait_for(lambda: gang.status == JobStatus.QUEUED and not gang.gang_nodes))
+        self.assertEqual(gang.retry_count, 0)
+        self.assertEqual(self.scheduler.reservations, set())
+        self.assertEqual(len(self.killed), 1) # the other member, which would wait on its peer
+
+if __name__ == '__main__':
+    unittest.main()
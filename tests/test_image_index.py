@@ -0,0 +1,34 @@
+import unittest
+from master.image_index import ImageLayerIndex
+
+class TestImageLayerIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ImageLayerIndex()
+        self.index.update("n1", {"app:latest": ["base", "deps", "code1"]}, {"base": 500, "deps": 300, "code1": 10})
+        self.index.update("n2", {"base:1": ["base"]}, {"base": 500})
+
+    def test_present_bytes(self):
+        total, present = self.index.present_bytes("app:latest")
+        self.assertEqual(total, 810)
+        self.assertEqual(present, {"n1": 810, "n2": 500})
+        self.assertIsNone(self.index.present_bytes("unknown:1"))
+
+    def test_repull_moves_the_tag(self):
+        # n3 registers holding an older app:latest; that doesn't override what's known
+        self.index.update("n3", {"app:latest": ["base", "deps", "code0"]}, {"code0": 10})
+        self.assertEqual(self.index.present_bytes("app:latest")[1]["n3"], 800)
+        # n2 pulls app:latest now: its layers become what the tag means
+        self.index.update("n2", {"base:1": ["base"], "app:latest": ["base", "deps2", "code2"]}, {"deps2": 350, "code2": 20})
+        total, present = self.index.present_bytes("app:latest")
+        self.assertEqual(total, 870)
+        self.assertEqual(present, {"n1": 500, "n2": 870, "n3": 500})
+
+    def test_remove_node(self):
+        self.index.remove("n1")
+        total, present = self.index.present_bytes("app:latest")
+        self.assertEqual(total, 810) # sizes of layers nobody holds are kept while the tag lists them
+        self.assertEqual(present, {"n2": 500})
+        self.assertNotIn("n1", self.index.node_images)
+
+if __name__ == '__main__':
+    unittest.main()
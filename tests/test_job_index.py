@@ -0,0 +1,70 @@
+import unittest
+from datetime import datetime, timedelta
+from common.models import Job, JobStatus, ResourceRequirements
+from master.job_index import JobIndex
+
+def make_job(i: int, name: str = "job", tags=None, start=datetime(2024, 1, 1)) -> Job:
+    return Job(
+        id=f"job-{i}",
+        name=name,
+        command="true",
+        tags=tags or [],
+        submitted_at=start + timedelta(seconds=i),
+        resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=128, docker_image="alpine"),
+    )
+
+class TestJobIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = JobIndex()
+        self.jobs = [make_job(i, name="even" if i % 2 == 0 else "odd", tags=["t"] if i < 5 else []) for i in range(20)]
+        for job in self.jobs:
+            self.index.add(job)
+
+    def ids(self, jobs):
+        return [job.id for job in jobs]
+
+    def test_newest_first_with_cursor(self):
+        page, cursor = self.index.query(limit=8)
+        self.assertEqual(self.ids(page), [f"job-{i}" for i in range(19, 11, -1)])
+        seen = list(page)
+        while cursor is not None:
+            page, cursor = self.index.query(cursor=cursor, limit=8)
+            seen.extend(page)
+        self.assertEqual(len(seen), 20)
+        self.assertEqual(len(set(self.ids(seen))), 20)
+
+    def test_filters_combine(self):
+        page, _ = self.index.query(name="even", tag="t")
+        self.assertEqual(self.ids(page), ["job-4", "job-2", "job-0"])
+        after = self.jobs[15].submitted_at
+        page, _ = self.index.query(submitted_after=after)
+        self.assertEqual(self.ids(page), ["job-19", "job-18", "job-17", "job-16"])
+
+    def test_status_and_node_follow_updates(self):
+        job = self.jobs[3]
+        job.status, job.assigned_node = JobStatus.RUNNING, "n1"
+        self.index.update(job)
+        self.assertEqual(self.ids(self.index.query(status=JobStatus.RUNNING)[0]), ["job-3"])
+        self.assertEqual(self.ids(self.index.query(node="n1")[0]), ["job-3"])
+        self.assertEqual(self.index.count(JobStatus.QUEUED), 19)
+
+        # Requeued: back in the queued index exactly once
+        job.status, job.assigned_node = JobStatus.QUEUED, None
+        self.index.update(job)
+        queued = self.ids(self.index.query(status=JobStatus.QUEUED, limit=100)[0])
+        self.assertEqual(queued.count("job-3"), 1)
+        self.assertEqual(self.index.query(status=JobStatus.RUNNING)[0], [])
+
+    def test_stale_entries_are_compacted(self):
+        for job in self.jobs + [make_job(i) for i in range(20, 200)]:
+            self.index.add(job)
+        for job in list(self.index.jobs.values())[:150]:
+            job.status = JobStatus.COMPLETED
+            self.index.update(job)
+        queued = self.index.by_status[JobStatus.QUEUED]
+        self.assertLess(len(queued.seqs), 150)
+        self.assertEqual(self.index.count(JobStatus.QUEUED), 50)
+        self.assertEqual(len(self.index.query(status=JobStatus.QUEUED, limit=1000)[0]), 50)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import json
+import unittest
+from common.models import JobResult, JobStatus
+from master.job_index import JobIndex
+from master.job_record import JobRecord, jobs_json, summarize
+from tests.test_job_index import make_job
+
+class TestJobRecord(unittest.TestCase):
+    def finished(self, i: int):
+        job = make_job(i, name="etl", tags=["nightly"])
+        job.status, job.assigned_node = JobStatus.COMPLETED, "n1"
+        job.result = JobResult(exit_code=0, stdout="ok", stderr="", execution_time_ms=12)
+        return job
+
+    def test_round_trip(self):
+        job = self.finished(1)
+        record = JobRecord(job)
+        self.assertEqual(record.to_job(), job)
+        self.assertEqual(json.loads(jobs_json([record, job])), [json.loads(job.json())] * 2)
+        self.assertEqual(summarize(record), summarize(job))
+        self.assertEqual(record.fields({"id", "tags"}), {"id": job.id, "tags": ["nightly"]})
+        self.assertEqual(record.fields({"id", "result"})["result"]["stdout"], "ok")
+
+    def test_index_serves_records(self):
+        index = JobIndex()
+        jobs = [self.finished(i) for i in range(5)]
+        for job in jobs:
+            index.add(job)
+        index.replace(JobRecord(jobs[2]))
+        page, _ = index.query(status=JobStatus.COMPLETED, node="n1", tag="nightly", name="etl")
+        self.assertEqual([job.id for job in page], [f"job-{i}" for i in range(4, -1, -1)])
+        self.assertIsInstance(page[2], JobRecord)
+
+if __name__ == '__main__':
+    unittest.main()
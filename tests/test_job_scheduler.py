@@ -0,0 +1,187 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from common.models import Job, JobResult, JobStatus, Node, NodeResources, NodeStatus, ResourceRequirements, attempt_id
+from master.cluster_manager import ClusterManager
+from master.job_scheduler import JobScheduler
+
+def make_job(job_id: str, dependencies=(), name: str = "task") -> Job:
+    return Job(id=job_id, name=name, command="echo", dependencies=list(dependencies),
+               resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=256, docker_image="img"))
+
+def queued_ids(scheduler: JobScheduler):
+    return [entry[3].id for entry in sorted(scheduler.job_queue.queue)]
+
+def wait_for(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+class TestDependencies(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = JobScheduler(ClusterManager())
+
+    def test_parked_until_dependencies_complete(self):
+        a, b = self.scheduler.submit_job(make_job("a")), self.scheduler.submit_job(make_job("b"))
+        child = self.scheduler.submit_job(make_job("c", ["a", "b"]))
+        self.assertEqual(queued_ids(self.scheduler), ["a", "b"])
+        self.assertEqual(self.scheduler.unmet, {"c": 2})
+        self.assertTrue(a.keep_workspace and b.keep_workspace)
+        self.scheduler._set_status(a, JobStatus.COMPLETED)
+        self.assertEqual(self.scheduler.unmet, {"c": 1})
+        self.scheduler._set_status(b, JobStatus.COMPLETED)
+        self.assertEqual(self.scheduler.unmet, {})
+        self.assertEqual(queued_ids(self.scheduler)[-1], "c")
+        self.assertEqual(child.status, JobStatus.QUEUED)
+
+    def test_completed_dependency_is_not_waited_on(self):
+        parent = self.scheduler.submit_job(make_job("p"))
+        self.scheduler._set_status(parent, JobStatus.COMPLETED)
+        self.scheduler.submit_job(make_job("c", ["p"]))
+        self.assertEqual(self.scheduler.unmet, {})
+        self.assertIn("c", queued_ids(self.scheduler))
+
+    def test_failure_fails_dependents_transitively(self):
+        parent = self.scheduler.submit_job(make_job("p"))
+        child = self.scheduler.submit_job(make_job("c", ["p"]))
+        grandchild = self.scheduler.submit_job(make_job("g", ["c"]))
+        self.scheduler._set_status(parent, JobStatus.FAILED)
+        self.assertEqual(child.status, JobStatus.FAILED)
+        self.assertEqual(grandchild.status, JobStatus.FAILED)
+        self.assertIn("Dependency c failed", grandchild.result.stderr)
+        self.assertEqual(self.scheduler.unmet, {})
+        self.assertEqual(self.scheduler.dependents, {})
+        # Submitted after the failure: fails right away
+        late = self.scheduler.submit_job(make_job("l", ["p"]))
+        self.assertEqual(late.status, JobStatus.FAILED)
+
+    def test_cancelled_child_is_skipped(self):
+        parent = self.scheduler.submit_job(make_job("p"))
+        self.scheduler.submit_job(make_job("c", ["p"]))
+        self.scheduler.cancel_job("c")
+        self.scheduler._set_status(parent, JobStatus.COMPLETED)
+        self.assertEqual(queued_ids(self.scheduler), ["p"])
+
+class TestQueueOrder(unittest.TestCase):
+    def test_plain_jobs_stay_fifo_within_a_priority(self):
+        scheduler = JobScheduler(ClusterManager())
+        scheduler.runtime_estimates = {"long": 3600.0, "short": 5.0}
+        scheduler.submit_job(make_job("s1", name="short"))
+        scheduler.submit_job(make_job("l1", name="long"))
+        urgent = make_job("u1", name="short")
+        urgent.priority = 5
+        scheduler.submit_job(urgent)
+        scheduler.submit_workflow("w1", {"a": make_job("wa", name="long"), "b": make_job("wb", ["wa"], name="short")})
+        self.assertEqual(queued_ids(scheduler), ["u1", "wa", "s1", "l1"])
+        self.assertEqual(scheduler.jobs["l1"].critical_path_s, 0.0)
+        self.assertEqual(scheduler.jobs["wa"].critical_path_s, 3605.0)
+
+class TestDeadlines(unittest.TestCase):
+    def setUp(self):
+        self.cluster = ClusterManager()
+        self.node = self.cluster.register_node(Node(
+            id="n0", hostname="h0", ip_address="10.0.0.1", ssh_user="u", status=NodeStatus.ACTIVE,
+            resources=NodeResources(cpu_total=4, cpu_available=4, memory_total_mb=8000, memory_available_mb=8000,
+                                    disk_total_gb=100, disk_free_gb=100)))
+        self.scheduler = JobScheduler(self.cluster)
+        self.attempts = [] # (attempt, event that lets it finish)
+        self.killed = []
+        self.scheduler._run_on_worker = self.run_on_worker
+        self.scheduler._kill_on_worker = lambda job_id, attempt, node: self.killed.append((job_id, attempt_id(attempt), node.id))
+
+    def run_on_worker(self, job, node, on_line):
+        finish = threading.Event()
+        self.attempts.append((job.started_at, finish))
+        finish.wait(5)
+        on_line(JobResult(exit_code=0, stdout="", stderr="", execution_time_ms=5).json())
+        return None, ""
+
+    def test_expiry_releases_and_retries(self):
+        job = make_job("j")
+        job.resource_requirements.cpu_cores = 4
+        job.max_retries = 1
+        self.scheduler.submit_job(job)
+        self.scheduler._schedule_step()
+        self.assertTrue(wait_for(lambda: len(self.attempts) == 1))
+        first, finish_first = self.attempts[0]
+        self.assertEqual(self.node.resources.cpu_available, 0)
+
+        with mock.patch("master.job_scheduler.time.monotonic", return_value=time.monotonic() + 10 ** 6):
+            self.scheduler._check_deadlines()
+        self.assertEqual(job.status, JobStatus.QUEUED)
+        self.assertEqual(job.retry_count, 1)
+        self.assertEqual(self.node.resources.cpu_available, 4)
+        self.assertTrue(wait_for(lambda: self.killed == [("j", attempt_id(first), "n0")]))
+
+        # The retry lands on the same node; the expired attempt answering late leaves it alone
+        time.sleep(0.001) # a distinct started_at
+        self.scheduler._schedule_step()
+        self.assertTrue(wait_for(lambda: len(self.attempts) == 2))
+        second, finish_second = self.attempts[1]
+        self.assertNotEqual(attempt_id(first), attempt_id(second))
+        finish_first.set()
+        time.sleep(0.1)
+        self.assertEqual(job.status, JobStatus.RUNNING)
+        self.assertEqual(job.started_at, second)
+        self.assertEqual(self.node.resources.cpu_available, 0)
+
+        finish_second.set()
+        self.assertTrue(wait_for(lambda: job.status == JobStatus.COMPLETED))
+        self.assertEqual(self.node.resources.cpu_available, 4)
+        self.assertEqual(self.scheduler.reservations, set())
+
+class FakeSSH:
+    """Just enough of SSHClient for a dispatch to a resident executor daemon"""
+    def __init__(self, response: str):
+        self.response = response
+        self.token_reads = 0
+
+    def ensure_connected(self):
+        pass
+
+    def exec_command(self, command, timeout=None):
+        self.token_reads += 1
+        return 0, "tok", ""
+
+    def open_tunnel(self, port):
+        return object()
+
+    def stream_channel(self, channel, request, on_line, timeout=None, stages=None):
+        on_line(self.response)
+
+class TestExecutorDaemonErrors(unittest.TestCase):
+    def setUp(self):
+        self.cluster = ClusterManager()
+        self.node = self.cluster.register_node(Node(
+            id="n0", hostname="h0", ip_address="10.0.0.1", ssh_user="u", status=NodeStatus.ACTIVE,
+            capabilities={"executor_port": 7070, "executor_instance": "i1"},
+            resources=NodeResources(cpu_total=4, cpu_available=4, memory_total_mb=8000, memory_available_mb=8000,
+                                    disk_total_gb=100, disk_free_gb=100)))
+        self.scheduler = JobScheduler(self.cluster)
+
+    def dispatch(self, ssh: FakeSSH) -> Job:
+        self.scheduler._get_ssh_client = lambda node: ssh
+        job = make_job("j")
+        job.max_retries = 0
+        self.scheduler.submit_job(job)
+        self.scheduler._schedule_step()
+        self.assertTrue(wait_for(lambda: job.status == JobStatus.FAILED))
+        return job
+
+    def test_unauthorized_is_reported_and_token_reread(self):
+        ssh = FakeSSH('{"error": "unauthorized"}')
+        job = self.dispatch(ssh)
+        self.assertEqual(job.result.stderr, "Executor daemon: unauthorized")
+        self.assertEqual(self.scheduler.executor_tokens, {})
+        self.scheduler._run_on_worker(make_job("k"), self.node, lambda line: None)
+        self.assertEqual(ssh.token_reads, 2)
+
+    def test_daemon_error_kept_with_token(self):
+        job = self.dispatch(FakeSSH('{"error": "bad job spec"}'))
+        self.assertEqual(job.result.stderr, "Executor daemon: bad job spec")
+        self.assertEqual(self.scheduler.executor_tokens, {("n0", "i1"): "tok"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
-from common.models import Node, NodeStatus, NodeResources, Job, ResourceRequirements
+from common.models import Node, NodeStatus, NodeResources, Job, ResourceRequirements, ParentWorkspace
 from master.load_balancer import LoadBalancer
+from master.image_index import ImageLayerIndex
 
 class TestLoadBalancer(unittest.TestCase):
     def setUp(self):
@@ -51,5 +52,45 @@ class TestLoadBalancer(unittest.TestCase):
         selected = self.lb.select_node(self.nodes, job)
         self.assertIsNone(selected)
 
+    def test_parent_locality(self):
+        self.nodes[1].resources.cpu_available = 3 # 25% cpu, 25% mem -> 0.25
+        self.nodes[1].resources.memory_available_mb = 6000
+        job = Job(
+            id="j3", name="child", command="echo",
+            resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=128, docker_image="img"),
+            parent_workspaces=[ParentWorkspace(job_id="p1", node_id="n2"), ParentWorkspace(job_id="p2")],
+        )
+        self.assertEqual(self.lb.select_node(self.nodes, job).id, "n1")
+        job.parent_workspaces[1].node_id = "n2"
+        self.assertEqual(self.lb.select_node(self.nodes, job).id, "n2")
+        # Too busy to be worth it: run elsewhere and fetch the parents' outputs
+        self.nodes[1].resources.cpu_available = 1
+        self.assertEqual(self.lb.select_node(self.nodes, job).id, "n1")
+
+    def test_image_locality_by_layers(self):
+        # n1 idle with none of the image; n2 at 0.12 load with a stale img:latest
+        self.nodes[1].resources.cpu_available = 3.2
+        self.nodes[1].resources.memory_available_mb = 8000
+        mb = 1024 * 1024
+        index = ImageLayerIndex()
+        index.update("n2", {"img:latest": ["l1", "l2", "l3"]}, {"l1": 300 * mb, "l2": 100 * mb, "l3": 100 * mb})
+        index.update("n3", {"base:1": ["l1"]}, {})
+        index.update("n3", {"base:1": ["l1"], "img:latest": ["l1", "l2", "l3", "l4"]}, {"l4": 100 * mb}) # re-pulled there
+        lb = LoadBalancer(image_index=index)
+        job = Job(
+            id="j4", name="train", command="echo",
+            resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=128, docker_image="img:latest")
+        )
+        # 500 of the current image's 600 MB are on n2
+        self.assertAlmostEqual(lb._calculate_load_score(self.nodes[1], job, lb._image_bytes(job)), 0.12 - 0.15 * 500 / 600)
+        self.assertEqual(lb.select_node(self.nodes, job).id, "n2")
+        # Sharing only the small layers isn't worth the load
+        index.update("n2", {"img:old": ["l2", "l3"]}, {})
+        self.assertEqual(lb.select_node(self.nodes, job).id, "n1")
+        # The exact tag in cached_images counts only for images the index hasn't seen
+        self.nodes[1].resources.cached_images = ["img:latest", "other:1"]
+        job.resource_requirements.docker_image = "other:1"
+        self.assertEqual(lb.select_node(self.nodes, job).id, "n2")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+import multiprocessing
+import threading
+import unittest
+from common.models import Job, JobStatus, Node, NodeResources, NodeStatus, ResourceRequirements
+from master.cluster_manager import ClusterManager
+from master.job_scheduler import JobScheduler
+from master.placement_shards import ShardedPlacer, _shard_main
+
+def make_node(i: int, cpu: int = 4) -> Node:
+    return Node(id=f"n{i}", hostname=f"h{i}", ip_address=f"10.0.0.{i}", ssh_user="u", status=NodeStatus.ACTIVE,
+                resources=NodeResources(cpu_total=cpu, cpu_available=cpu, memory_total_mb=8000, memory_available_mb=8000,
+                                        disk_total_gb=100, disk_free_gb=100))
+
+def make_job(job_id: str, cpu: int = 4) -> Job:
+    return Job(id=job_id, name="t", command="echo",
+               resource_requirements=ResourceRequirements(cpu_cores=cpu, memory_mb=256, docker_image="img"))
+
+class _Recorder:
+    """Connection to a shard that remembers what was sent, since the last clear()"""
+    def __init__(self, conn):
+        self.conn = conn
+        self.sent = []
+
+    def send(self, message):
+        if message[0] != "place":
+            self.sent.append(message)
+        self.conn.send(message)
+
+    def recv(self):
+        return self.conn.recv()
+
+    def close(self):
+        self.conn.close()
+
+class InProcessPlacer(ShardedPlacer):
+    """The real shard loop on a thread over a Pipe instead of in a process"""
+    def _start_shard(self, index, weights):
+        parent, child = multiprocessing.Pipe()
+        thread = threading.Thread(target=_shard_main, args=(child, weights), daemon=True)
+        thread.start()
+        return _Recorder(parent), thread
+
+    def messages(self):
+        sent = [conn.sent for conn in self.conns]
+        for conn in self.conns:
+            conn.sent = []
+        return sent
+
+class TestShardedPlacer(unittest.TestCase):
+    def setUp(self):
+        self.placer = InProcessPlacer(2)
+
+    def tearDown(self):
+        self.placer.close()
+
+    def test_new_nodes_go_to_the_smallest_slice(self):
+        nodes = [make_node(0, cpu=8), make_node(1), make_node(2)]
+        self.placer.sync(nodes)
+        self.assertEqual(self.placer.owner, {"n0": 0, "n1": 1, "n2": 1})
+        self.assertEqual(self.placer.cpu_total, [8, 8])
+        self.assertEqual(self.placer.messages(), [[("nodes", [nodes[0]])], [("nodes", nodes[1:])]])
+
+    def test_changes_are_sent_compactly(self):
+        nodes = [make_node(0), make_node(1)]
+        self.placer.sync(nodes)
+        self.placer.messages()
+        self.placer.sync(nodes)
+        self.assertEqual(self.placer.messages(), [[], []])
+        nodes[1].resources.cpu_available = 1 # a reservation: same resources object
+        self.placer.sync(nodes)
+        self.assertEqual(self.placer.messages(), [[], [("capacity", [("n1", 1, 8000, True)])]])
+        nodes[0].resources = nodes[0].resources.copy() # a heartbeat replaced it
+        self.placer.sync(nodes)
+        self.assertEqual(self.placer.messages(), [[("nodes", [nodes[0]])], []])
+
+    def test_departures_move_nodes_between_slices(self):
+        nodes = [make_node(i) for i in range(4)]
+        self.placer.sync(nodes)
+        self.assertEqual(self.placer.owner, {"n0": 0, "n1": 1, "n2": 0, "n3": 1})
+        self.placer.messages()
+        self.placer.sync([nodes[0], nodes[2]])
+        self.assertEqual(self.placer.owner, {"n0": 1, "n2": 0})
+        self.assertEqual(self.placer.cpu_total, [4, 4])
+        self.assertEqual(self.placer.messages(), [[("drop", ["n0"])], [("drop", ["n1", "n3"]), ("nodes", [nodes[0]])]])
+        # The moved node is placeable on its new shard, and only there
+        self.assertEqual(sorted(self.placer.place([make_job("a"), make_job("b")])), ["n0", "n2"])
+
+    def test_place_holds_capacity_until_the_next_sync(self):
+        nodes = [make_node(0), make_node(1)]
+        self.placer.sync(nodes)
+        self.placer.messages()
+        self.assertEqual(sorted(self.placer.place([make_job("a"), make_job("b")])), ["n0", "n1"])
+        self.assertEqual(self.placer.place([make_job("c")]), [None])
+        # Placed-on nodes are resent in full figures next sync, even if unchanged here
+        self.placer.sync(nodes)
+        self.assertEqual(self.placer.messages(), [[("capacity", [("n0", 4, 8000, True)])], [("capacity", [("n1", 4, 8000, True)])]])
+        self.assertEqual(self.placer.place([make_job("c")]), ["n0"])
+
+class TestScheduleBatch(unittest.TestCase):
+    def setUp(self):
+        self.cluster = ClusterManager()
+        self.nodes = [self.cluster.register_node(make_node(i)) for i in range(2)]
+        self.scheduler = JobScheduler(self.cluster, placement_shards=1)
+        self.scheduler.placer = InProcessPlacer(1, self.scheduler.load_balancer.weights)
+        self.scheduler._start_dispatch = lambda job, node: None
+
+    def tearDown(self):
+        self.scheduler.placer.close()
+
+    def test_proposals_are_checked_against_live_capacity(self):
+        jobs = [self.scheduler.submit_job(make_job(f"j{i}")) for i in range(2)]
+        place = self.scheduler.placer.place
+        def stale_place(batch):
+            # n0 fills up after the shard was synced (e.g. a heartbeat between sync and place)
+            self.cluster.reserve(self.nodes[0], 4, 0)
+            return place(batch)
+        self.scheduler.placer.place = stale_place
+        self.assertEqual(self.scheduler._schedule_batch(), 0)
+        running = [job for job in jobs if job.status == JobStatus.RUNNING]
+        self.assertEqual([job.assigned_node for job in running], ["n1"])
+        self.assertEqual(self.scheduler.reservations, {(running[0].id, "n1")})
+        self.assertEqual(self.nodes[0].resources.cpu_available, 0)
+        self.assertEqual([entry[3].status for entry in self.scheduler.job_queue.queue], [JobStatus.QUEUED])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from common.models import Job, ResourceRequirements
+from worker.process_executor import CgroupLimiter, ProcessExecutor
+from worker.slot_manager import Slot
+
+PROBE = ("import os, resource; "
+         "print(resource.getrlimit(resource.RLIMIT_CPU)[0], resource.getrlimit(resource.RLIMIT_CORE)[1], "
+         "sorted(os.sched_getaffinity(0)), oct(os.umask(0)), os.getpid())")
+
+def make_job(command: str) -> Job:
+    return Job(id="p1", name="t", command=command,
+               resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=512, executor="process", timeout=10))
+
+class _FakeCgroups(CgroupLimiter):
+    """A plain directory standing in for the job's cgroup"""
+    def __init__(self, root: str):
+        self.root = root
+        self.available = True
+
+    def create(self, job_id, cpu_cores, memory_mb):
+        path = os.path.join(self.root, job_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def remove(self, path):
+        pass
+
+class TestProcessExecutor(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def run_job(self, job: Job, slot: Slot = None, cgroups: CgroupLimiter = None):
+        executor = ProcessExecutor(cgroups or CgroupLimiter(root=os.path.join(self.root, "missing")))
+        return executor.run(job, self.root, None, time.time(), slot)
+
+    def test_limits_reach_the_job(self):
+        cpu = sorted(os.sched_getaffinity(0))[0]
+        result = self.run_job(make_job(f'python3 -c "{PROBE}"'), slot=Slot("p1", 1, 512, [cpu], 0))
+        self.assertEqual(result.exit_code, 0, result.stderr)
+        cpu_limit, core_hard, affinity, umask, _ = result.stdout.split(maxsplit=4)
+        self.assertEqual(int(cpu_limit), 15)
+        self.assertEqual(core_hard, "0")
+        self.assertEqual(affinity, f"[{cpu}]")
+        self.assertEqual(umask, "0o77")
+
+    def test_joins_its_cgroup_before_running(self):
+        cgroups = _FakeCgroups(os.path.join(self.root, "cg"))
+        result = self.run_job(make_job(f'python3 -c "{PROBE}"'), cgroups=cgroups)
+        self.assertEqual(result.exit_code, 0, result.stderr)
+        with open(os.path.join(self.root, "cg", "p1", "cgroup.procs")) as f:
+            self.assertEqual(f.read(), result.stdout.split()[-1]) # the shim's pid is the job's
+
+    def test_failed_setup_never_runs_the_job(self):
+        cgroups = _FakeCgroups(os.path.join(self.root, "cg"))
+        os.makedirs(os.path.join(self.root, "cg", "p1", "cgroup.procs")) # not writable as a file
+        marker = os.path.join(self.root, "ran")
+        result = self.run_job(make_job(f"touch {marker}"), cgroups=cgroups)
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("Execution failed", result.stderr)
+        self.assertFalse(os.path.exists(marker))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from common.models import Job, JobStatus, Node, NodeResources, ResourceRequirements
+from master.trace import TraceRecorder
+from simulator.replay import Trace, replay
+
+def make_job(job_id: str, cpu: int = 1, dependencies=()) -> Job:
+    return Job(id=job_id, name="t", command="true", dependencies=list(dependencies),
+               resource_requirements=ResourceRequirements(cpu_cores=cpu, memory_mb=512, docker_image="img"))
+
+def make_node(node_id: str) -> Node:
+    return Node(id=node_id, hostname=node_id, ip_address="10.0.0.1", ssh_user="u",
+                resources=NodeResources(cpu_total=4, cpu_available=4, memory_total_mb=8000, memory_available_mb=8000,
+                                        disk_total_gb=100, disk_free_gb=100, cached_images=["img"]))
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "trace.ndjson")
+        now = [1000.0]
+        def at(t):
+            now[0] = 1000.0 + t
+        with mock.patch("master.trace.time.time", lambda: now[0]):
+            recorder = TraceRecorder(self.path)
+            n0, n1 = make_node("n0"), make_node("n1")
+            recorder.node(n0, registered=True)
+            recorder.node(n1, registered=True)
+            a, b, c = make_job("a", cpu=2), make_job("b", dependencies=["a"]), make_job("c", cpu=4)
+            for job in (a, b, c):
+                recorder.submit(job)
+            at(1)
+            recorder.place(a, n0)
+            recorder.place(c, n1)
+            at(11)
+            a.status = JobStatus.COMPLETED
+            recorder.end(a, n0, 0, 10.0)
+            c.status = JobStatus.QUEUED # failed once, retried
+            recorder.end(c, n1, 1, 10.0)
+            recorder.place(b, n0)
+            recorder.place(c, n1)
+            at(16)
+            b.status = JobStatus.COMPLETED
+            recorder.end(b, n0, 0, 5.0)
+            at(31)
+            c.status = JobStatus.COMPLETED
+            recorder.end(c, n1, 0, 20.0)
+            recorder.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_round_trip(self):
+        trace = Trace(self.path)
+        self.assertEqual(sorted(item.job.id for item in trace.items), ["a", "b", "c"])
+        self.assertEqual({item.job.id: item.failures for item in trace.items}, {"a": 0, "b": 0, "c": 1})
+        self.assertEqual(trace.items[1].job.dependencies, ["a"])
+        self.assertEqual(trace.recorded()["completed"], 3)
+        self.assertEqual(trace.recorded()["makespan_s"], 31.0)
+
+    def test_replays_are_deterministic(self):
+        trace = Trace(self.path)
+        first, second = replay(trace), replay(trace)
+        first.pop("wall_s"), second.pop("wall_s")
+        first.pop("placements_per_s"), second.pop("placements_per_s")
+        self.assertEqual(first, second)
+        self.assertEqual(first["completed"], 3)
+        self.assertEqual(first["placements"], 4)
+        # The trace's own jobs are untouched by replaying it
+        self.assertTrue(all(item.job.status == JobStatus.QUEUED and item.job.result is None for item in trace.items))
+
+class TestTraceRecorder(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "trace.ndjson")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def lines(self):
+        with open(self.path) as f:
+            return f.read().splitlines()
+
+    def test_idle_recorder_flushes(self):
+        recorder = TraceRecorder(self.path, flush_interval_s=0.05)
+        recorder.down("n0")
+        recorder.down("n1")
+        deadline = time.monotonic() + 5
+        while len(self.lines()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.lines()), 2) # no later record() needed
+        recorder.close()
+
+    def test_close_flushes(self):
+        recorder = TraceRecorder(self.path, flush_interval_s=3600)
+        recorder.down("n0")
+        recorder.close()
+        self.assertEqual(len(self.lines()), 1)
+        self.assertFalse(recorder.flusher.is_alive())
+        recorder.down("n1") # late events after shutdown are dropped, not an error
+
+if __name__ == '__main__':
+    unittest.main()
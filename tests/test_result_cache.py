@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+from common.models import InputBlob, Job, JobResult, ResourceRequirements
+from master.result_cache import ResultCache, cache_key
+
+def make_job(i: int = 0, command: str = "echo hi", env=None, inputs=None) -> Job:
+    return Job(
+        id=f"job-{i}", name="job", command=command, cacheable=True, env=env or {}, inputs=inputs or [],
+        resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=128, docker_image="alpine:3"),
+    )
+
+def make_result(stdout: str = "hi", exit_code: int = 0, image_digest: str = None) -> JobResult:
+    return JobResult(exit_code=exit_code, stdout=stdout, stderr="", execution_time_ms=5, image_digest=image_digest)
+
+class TestResultCache(unittest.TestCase):
+    def test_key_covers_env_and_inputs_but_not_identity(self):
+        base = cache_key(make_job(1))
+        self.assertEqual(base, cache_key(make_job(2)))
+        self.assertNotEqual(base, cache_key(make_job(1, env={"A": "1"})))
+        self.assertNotEqual(base, cache_key(make_job(1, inputs=[InputBlob(digest="a" * 64, path="in")])))
+        self.assertNotEqual(base, cache_key(make_job(1, command="echo ho")))
+
+    def test_hit_after_tag_resolves_to_reported_digest(self):
+        cache = ResultCache()
+        first = make_job(1)
+        self.assertIsNone(cache.get(cache.key_for(first)))
+        cache.put(first, make_result(image_digest="sha256:abc"))
+        hit = cache.get(cache.key_for(make_job(2)))
+        self.assertEqual(hit.stdout, "hi")
+        self.assertEqual(hit.cached_from, "job-1")
+        # The tag moved: results from the old image no longer match
+        cache.image_digests["alpine:3"] = "sha256:def"
+        self.assertIsNone(cache.get(cache.key_for(make_job(3))))
+
+    def test_failures_are_not_cached(self):
+        cache = ResultCache()
+        self.assertIsNone(cache.put(make_job(), make_result(exit_code=1)))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_ttl_and_size_eviction(self):
+        cache = ResultCache(ttl_s=60)
+        size = len(make_result("x" * 100).json()) + 10
+        cache.max_bytes = size * 2
+        for i in range(3):
+            cache.put(make_job(i, command=f"echo {i}"), make_result("x" * 100))
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertIsNone(cache.get(cache.key_for(make_job(0, command="echo 0"))))
+        with mock.patch("master.result_cache.time.time", return_value=10 ** 12):
+            self.assertIsNone(cache.get(cache.key_for(make_job(2, command="echo 2"))))
+
+if __name__ == '__main__':
+    unittest.main()
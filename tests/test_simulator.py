@@ -0,0 +1,39 @@
+import unittest
+from simulator import workloads
+from simulator.clock import VirtualClock
+from simulator.simulation import Simulation, make_nodes
+
+class TestVirtualClock(unittest.TestCase):
+    def test_runs_in_time_order(self):
+        clock = VirtualClock()
+        seen = []
+        clock.call_at(5, seen.append, "b")
+        clock.call_at(1, lambda: clock.call_later(1, seen.append, "a"))
+        clock.call_at(5, seen.append, "c")
+        clock.run_until(4)
+        self.assertEqual(seen, ["a"])
+        self.assertEqual(clock.now, 4)
+        clock.run_until(10)
+        self.assertEqual(seen, ["a", "b", "c"])
+
+class TestSimulation(unittest.TestCase):
+    def test_dag_runs_in_dependency_order(self):
+        sim = Simulation(make_nodes(5), workloads.dag(40, width=10))
+        report = sim.run()
+        self.assertEqual(report["completed"], 40)
+        for item in sim.workload.values():
+            for dep in item.job.dependencies:
+                self.assertLessEqual(sim.completed_at[dep], sim.completed_at[item.job.id] - item.runtime)
+
+    def test_retries_and_repeatable(self):
+        def run():
+            return Simulation(make_nodes(3), workloads.mixed(100, rate=5, fail_rate=0.3, seed=1)).run()
+        first, second = run(), run()
+        self.assertEqual(first["completed"] + first["failed"], 100)
+        self.assertGreater(first["placements"], 100)
+        for key in ("makespan_s", "wait_p95_s", "utilization", "fragmentation", "placements"):
+            self.assertEqual(first[key], second[key])
+        self.assertLessEqual(first["utilization"], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from common.exceptions import ResourceUnavailableError
+from worker.slot_manager import SlotManager, parse_cpulist
+
+class TestSlotManager(unittest.TestCase):
+    def setUp(self):
+        # Two NUMA nodes with 4 CPUs each
+        self.slots = SlotManager(cpus=list(range(8)), memory_mb=4096, pinning=True)
+        self.slots.numa = {0: [0, 1, 2, 3], 1: [4, 5, 6, 7]}
+
+    def test_parse_cpulist(self):
+        self.assertEqual(parse_cpulist("0-2,5,7-8\n"), [0, 1, 2, 5, 7, 8])
+
+    def test_admission_rejects_over_capacity(self):
+        self.slots.acquire("a", 6, 512)
+        with self.assertRaises(ResourceUnavailableError):
+            self.slots.acquire("b", 3, 512)
+        with self.assertRaises(ResourceUnavailableError):
+            self.slots.acquire("c", 1, 4000)
+
+    def test_release_returns_capacity(self):
+        slot = self.slots.acquire("a", 8, 512)
+        self.slots.release(slot)
+        self.slots.release(slot) # second release is a no-op
+        self.assertEqual(self.slots.free_cores(), 8)
+        self.assertEqual(self.slots.free_memory_mb(), 4096)
+
+    def test_pins_within_one_numa_node(self):
+        a = self.slots.acquire("a", 3, 128)
+        self.assertEqual(a.numa_node, 0)
+        self.assertEqual(a.cpuset, "0,1,2")
+        # Best fit: node 0 has 1 free, node 1 has 4; a 1-CPU job fills the hole on node 0
+        b = self.slots.acquire("b", 1, 128)
+        self.assertEqual(b.cpus, [3])
+        c = self.slots.acquire("c", 4, 128)
+        self.assertEqual(c.numa_node, 1)
+
+    def test_spans_nodes_when_no_single_node_fits(self):
+        self.slots.acquire("a", 2, 128) # node 0
+        self.slots.acquire("b", 2, 128) # node 0 (best fit)
+        self.slots.release(self.slots.slots["a"])
+        self.slots.acquire("c", 3, 128) # node 1, leaving 2 free on node 0 and 1 on node 1
+        wide = self.slots.acquire("d", 3, 128)
+        self.assertIsNone(wide.numa_node)
+        self.assertEqual(len(set(wide.cpus)), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import unittest
+from unittest import mock
+from common.ssh_client import STDERR_TAIL_BYTES, SSHClient
+
+class FakeChannel:
+    """stderr chunks to hand out; stdout only proceeds once they are all read, like a full window"""
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.drained = threading.Event()
+
+    def recv_stderr(self, size: int) -> bytes:
+        if not self.chunks:
+            self.drained.set()
+            return b""
+        return self.chunks.pop(0)
+
+    def recv_exit_status(self) -> int:
+        return 3
+
+class FakeStdout:
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+
+    def __iter__(self):
+        yield "started\n"
+        if not self.channel.drained.wait(5):
+            raise TimeoutError("stdout stalled behind unread stderr")
+        yield "done\n"
+
+class TestExecCommandStream(unittest.TestCase):
+    def test_stderr_drained_while_streaming(self):
+        chunks = [bytes([ord("a") + i % 26]) * 32768 for i in range(64)] + [b"last line\n"]
+        channel = FakeChannel(chunks)
+        ssh = SSHClient("h0", "u")
+        ssh.client = mock.Mock()
+        ssh.client.exec_command.return_value = (mock.Mock(), FakeStdout(channel), mock.Mock())
+
+        lines = []
+        code, stderr = ssh.exec_command_stream("job", lines.append, timeout=30)
+        self.assertEqual(lines, ["started", "done"])
+        self.assertEqual(code, 3)
+        self.assertTrue(stderr.endswith("last line"))
+        self.assertLessEqual(len(stderr), STDERR_TAIL_BYTES)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import random
+import unittest
+from master.timer_wheel import TimerWheel
+
+class TestTimerWheel(unittest.TestCase):
+    def test_fires_on_the_deadline_tick(self):
+        wheel = TimerWheel(tick_s=1.0, slots=4, levels=3, now=0)
+        wheel.schedule("a", 2.5)
+        wheel.schedule("b", 3)
+        self.assertEqual(wheel.advance(2), [])
+        self.assertEqual(wheel.advance(3), ["a", "b"])
+        self.assertEqual(len(wheel), 0)
+
+    def test_cascades_across_levels_and_beyond_range(self):
+        # 4 slots x 3 levels reach 64 ticks; later deadlines are re-placed as time passes
+        wheel = TimerWheel(tick_s=1.0, slots=4, levels=3, now=0)
+        rng = random.Random(7)
+        deadlines = {f"t{i}": rng.randint(1, 300) for i in range(500)}
+        for key, deadline in deadlines.items():
+            wheel.schedule(key, deadline)
+        fired = {}
+        for now in range(0, 301, 3):
+            for key in wheel.advance(now):
+                fired[key] = now
+        self.assertEqual(len(fired), len(deadlines))
+        for key, deadline in deadlines.items():
+            self.assertGreaterEqual(fired[key], deadline)
+            self.assertLess(fired[key], deadline + 3)
+
+    def test_cancel_and_reschedule(self):
+        wheel = TimerWheel(tick_s=0.5, slots=8, levels=2, now=100)
+        wheel.schedule("a", 110)
+        wheel.schedule("b", 110)
+        self.assertTrue(wheel.cancel("a"))
+        self.assertFalse(wheel.cancel("a"))
+        wheel.schedule("b", 130) # re-arming replaces the earlier deadline
+        self.assertEqual(wheel.advance(120), [])
+        self.assertIn("b", wheel)
+        self.assertEqual(wheel.advance(130), ["b"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from common.models import Job, ResourceRequirements
+from worker.docker_executor import WarmPool, _WarmContainer
+from worker.slot_manager import Slot
+
+def make_job(timeout: int = 5) -> Job:
+    return Job(id="j1", name="t", command="python run.py",
+               resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=256, docker_image="img", timeout=timeout))
+
+class TestWarmPool(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.client = mock.MagicMock()
+        self.client.images.get.return_value.attrs = {"Config": {}}
+        self.client.api.exec_create.return_value = {"Id": "e1"}
+        self.pool = WarmPool(self.client, work_dir=self.root, all_cpus="0-3", all_mems="0,1")
+        self.warm = _WarmContainer(mock.MagicMock(), "img", os.path.join(self.root, ".pool", "w1"))
+        os.makedirs(self.warm.workspace_dir)
+        self.pool._acquire = lambda image, job: self.warm
+        self.job_dir = os.path.join(self.root, "j1")
+        os.makedirs(self.job_dir)
+        with open(os.path.join(self.job_dir, "input.txt"), "w") as f:
+            f.write("in")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_timeout_keeps_workspace(self):
+        hang = threading.Event()
+        def stream(*args, **kwargs):
+            with open(os.path.join(self.warm.workspace_dir, "partial.out"), "w") as f:
+                f.write("half")
+            yield (b"working\n", None)
+            hang.wait(5)
+        self.client.api.exec_start.side_effect = stream
+        result = self.pool.run(make_job(timeout=1), self.job_dir, None, 0)
+        hang.set()
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("timed out", result.stderr)
+        self.assertEqual(sorted(os.listdir(self.job_dir)), ["input.txt", "partial.out"])
+        self.warm.container.kill.assert_called_once()
+        self.warm.container.remove.assert_called_once_with(force=True)
+        self.assertFalse(os.path.exists(self.warm.workspace_dir))
+
+    def test_pinned_then_unpinned_limits(self):
+        self.pool._apply_limits(self.warm, make_job(), Slot("j1", 1, 256, [2], 1))
+        self.assertEqual(self.warm.container.update.call_args.kwargs["cpuset_mems"], "1")
+        self.pool._apply_limits(self.warm, make_job(), None)
+        self.assertEqual(self.warm.container.update.call_args.kwargs["cpuset_cpus"], "0-3")
+        self.assertEqual(self.warm.container.update.call_args.kwargs["cpuset_mems"], "0,1")
+
+if __name__ == '__main__':
+    unittest.main()
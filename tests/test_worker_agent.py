@@ -0,0 +1,68 @@
+import itertools
+import threading
+import unittest
+from collections import deque
+from unittest import mock
+from worker.agent import WorkerAgent
+from worker.resource_reporter import ResourceReporter
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return {}
+
+def make_agent(reporter: ResourceReporter) -> WorkerAgent:
+    """A WorkerAgent without its executor daemon or master connection"""
+    agent = WorkerAgent.__new__(WorkerAgent)
+    agent.node_id = "n0"
+    agent.pending_events = deque()
+    agent.event_seq = itertools.count()
+    agent.events_dropped = 0
+    agent.events_lock = threading.Lock()
+    agent.executor_daemon = mock.Mock()
+    agent.executor_daemon.executor.image_cache = None
+    agent.executor_daemon.executor.warm_pool = None
+    agent.executor_daemon.executor.slots = None
+    agent.executor_daemon.executor.blob_cache.digests.return_value = []
+    agent.reporter = reporter
+    agent.client = mock.Mock()
+    return agent
+
+class TestHeartbeatLayers(unittest.TestCase):
+    def setUp(self):
+        with mock.patch("docker.from_env", side_effect=Exception("no docker")):
+            self.reporter = ResourceReporter(interval=3600)
+        self.reporter.stop()
+        self.reporter.layers = {"img:1": [("sha256:a", 10)]}
+        self.agent = make_agent(self.reporter)
+
+    def sent_layers(self):
+        return self.agent.client.post.call_args[0][1]["resources"]["image_layers"]
+
+    def test_failed_heartbeat_resends_layers(self):
+        self.agent.client.post.return_value = FakeResponse(503)
+        self.assertFalse(self.agent.heartbeat())
+        self.assertEqual(self.sent_layers(), {"img:1": ["sha256:a"]})
+
+        self.agent.client.post.return_value = FakeResponse(200)
+        self.assertTrue(self.agent.heartbeat())
+        self.assertEqual(self.sent_layers(), {"img:1": ["sha256:a"]}) # not lost with the failed report
+        self.assertTrue(self.agent.heartbeat())
+        self.assertIsNone(self.sent_layers())
+
+    def test_change_while_in_flight_is_sent_next(self):
+        self.reporter.collect()
+        with self.reporter.images_lock:
+            self.reporter.layers["img:2"] = [("sha256:b", 20)]
+            self.reporter.layers_changed = True
+        self.reporter.mark_layers_sent() # acknowledges the report without img:2
+        self.assertIn("img:2", self.reporter.collect().image_layers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from master.workflow import critical_path, topological_order
+
+class TestWorkflow(unittest.TestCase):
+    def test_order_respects_dependencies(self):
+        deps = {"report": ["train", "eval"], "eval": ["train"], "train": ["prep"], "prep": []}
+        order = topological_order(deps)
+        for name, parents in deps.items():
+            for parent in parents:
+                self.assertLess(order.index(parent), order.index(name))
+
+    def test_rejects_cycles_and_unknown_tasks(self):
+        with self.assertRaisesRegex(ValueError, "cycle.*a, b"):
+            topological_order({"a": ["b"], "b": ["a"], "c": []})
+        with self.assertRaisesRegex(ValueError, "unknown task 'x'"):
+            topological_order({"a": ["x"]})
+
+    def test_critical_path_is_longest_remaining_chain(self):
+        # prep -> (long -> end), (short -> end)
+        deps = {"prep": [], "long": ["prep"], "short": ["prep"], "end": ["long", "short"]}
+        runtimes = {"prep": 1, "long": 10, "short": 2, "end": 3}
+        rank = critical_path(deps, runtimes.get)
+        self.assertEqual(rank, {"end": 3, "long": 13, "short": 5, "prep": 14})
+
+if __name__ == '__main__':
+    unittest.main()
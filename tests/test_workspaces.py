@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+import docker
+from common.models import Artifact, Job, ParentWorkspace, ResourceRequirements
+from worker.artifacts import KEPT_DIR, keep_workspace, sweep_kept_workspaces, sweep_workspaces
+from worker.docker_executor import DockerExecutor
+
+def age(path: str, seconds: float):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+class TestKeptWorkspaces(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name in ("kept", "orphan", "running"):
+            os.makedirs(os.path.join(self.root, name))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_kept_swept_after_retention(self):
+        keep_workspace(os.path.join(self.root, "kept"))
+        self.assertEqual(sweep_kept_workspaces(self.root, retain_s=60), 0)
+        age(os.path.join(self.root, KEPT_DIR, "kept"), 120)
+        self.assertEqual(sweep_kept_workspaces(self.root, retain_s=60), 1)
+        self.assertEqual(sorted(os.listdir(self.root)), [KEPT_DIR, "orphan", "running"])
+        self.assertEqual(os.listdir(os.path.join(self.root, KEPT_DIR)), [])
+
+    def test_use_refreshes_retention(self):
+        kept = os.path.join(self.root, "kept")
+        keep_workspace(kept)
+        age(os.path.join(self.root, KEPT_DIR, "kept"), 120)
+        keep_workspace(kept)
+        self.assertEqual(sweep_kept_workspaces(self.root, retain_s=60), 0)
+
+    def test_orphan_sweep_leaves_kept_alone(self):
+        keep_workspace(os.path.join(self.root, "kept"))
+        for name in ("kept", "orphan"):
+            age(os.path.join(self.root, name), 3600)
+        self.assertEqual(sweep_workspaces(self.root, max_age_s=60), 1)
+        self.assertEqual(sorted(os.listdir(self.root)), [KEPT_DIR, "kept", "running"])
+
+class TestStageParents(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "p1"))
+        os.makedirs(os.path.join(self.root, "c1"))
+        with mock.patch("worker.docker_executor.docker.from_env", side_effect=docker.errors.DockerException("no docker")), \
+                mock.patch("worker.docker_executor.BlobCache"):
+            self.executor = DockerExecutor(process=True)
+        self.fetched = []
+        artifact = Artifact(path="out.txt", size=1, chunks=["d1"])
+        self.parent = ParentWorkspace(job_id="p1", node_id="n0", artifacts=[artifact])
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def job(self, executor: str) -> Job:
+        return Job(id="c1", name="t", command="true", parent_workspaces=[self.parent],
+                   resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=256, docker_image="img",
+                                                              executor=executor))
+
+    def stage(self, executor: str):
+        with mock.patch("worker.docker_executor.fetch_artifacts",
+                        lambda cache, artifacts, dest: self.fetched.append(dest)):
+            self.executor._stage_parents(self.job(executor), os.path.join(self.root, "c1"))
+
+    def test_process_job_gets_a_copy(self):
+        self.stage("process")
+        self.assertEqual(self.fetched, [os.path.join(self.root, "c1", "parents", "p1")])
+        self.assertFalse(os.path.islink(os.path.join(self.root, "c1", "parents", "p1")))
+
+    def test_container_job_mounts_the_kept_workspace(self):
+        self.stage("docker")
+        self.assertEqual(self.fetched, [])
+        self.assertTrue(os.path.exists(os.path.join(self.root, KEPT_DIR, "p1")))
+
+class TestRemoveWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.job_dir = os.path.join(self.root, "j1")
+        os.makedirs(os.path.join(self.job_dir, "out"))
+        with mock.patch("worker.docker_executor.docker.from_env"), mock.patch("worker.docker_executor.BlobCache"), \
+                mock.patch("worker.docker_executor.ImageCache"):
+            self.executor = DockerExecutor()
+        self.job = Job(id="j1", name="t", command="true",
+                       resource_requirements=ResourceRequirements(cpu_cores=1, memory_mb=256, docker_image="img"))
+        self.rmtree = shutil.rmtree
+        self.denied = 1 # rmtree calls that hit a root-owned file
+
+    def tearDown(self):
+        self.rmtree(self.root, ignore_errors=True)
+
+    def fake_rmtree(self, path, onerror):
+        if self.denied:
+            self.denied -= 1
+            onerror(os.unlink, os.path.join(path, "out", "root.txt"), (PermissionError, PermissionError(13, "denied"), None))
+            return
+        self.rmtree(path, onerror=onerror)
+
+    def test_root_owned_files_are_reset_from_a_container(self):
+        with mock.patch("worker.docker_executor.shutil.rmtree", self.fake_rmtree):
+            self.executor._remove_workspace(self.job, self.job_dir)
+        run = self.executor.client.containers.run
+        run.assert_called_once()
+        self.assertEqual(run.call_args.args, ("img",))
+        self.assertEqual(run.call_args.kwargs["volumes"], [f"{self.job_dir}:/workspace:rw"])
+        self.assertFalse(os.path.exists(self.job_dir))
+
+    def test_leftovers_are_logged(self):
+        self.denied = 2
+        with mock.patch("worker.docker_executor.shutil.rmtree", self.fake_rmtree), \
+                mock.patch("builtins.print") as log:
+            self.executor._remove_workspace(self.job, self.job_dir)
+        self.assertIn("Could not remove 1 path(s)", log.call_args.args[0])
+
+if __name__ == '__main__':
+    unittest.main()
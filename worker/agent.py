@@ -1,21 +1,44 @@
+import getpass
+import itertools
+import os
 import time
-import requests
 import socket
 import psutil
 import platform
+import threading
 import uuid
 import sys
-from common.models import Node, NodeStatus, NodeResources
+from collections import deque
+from common.models import Node, NodeStatus, NodeResources, Heartbeat
+from worker.control_client import Backoff, ControlClient, jittered
+
+HEARTBEAT_INTERVAL = 10
+# Events kept while the master is unreachable; beyond this the oldest are dropped,
+# and the next heartbeat says how many (an "events_dropped" event)
+MAX_PENDING_EVENTS = 1000
 
 class WorkerAgent:
-    def __init__(self, master_url: str, node_id: str = None):
+    def __init__(self, master_url: str, node_id: str = None, executor_port: int = None):
         self.master_url = master_url
         self.node_id = node_id or str(uuid.uuid4())
         self.hostname = socket.gethostname()
         self.ip_address = self._get_ip_address()
         self.running = False
+        self.registered = False
+        self.client = ControlClient(master_url)
+        self.pending_events = deque() # (seq, event), oldest first
+        self.event_seq = itertools.count()
+        self.events_dropped = 0 # not yet reported to the master
+        self.events_lock = threading.Lock()
+        from worker.executor_daemon import ExecutorDaemon, DEFAULT_EXECUTOR_PORT
+        # In-agent executor: keeps Docker client and models warm between jobs
+        self.executor_daemon = ExecutorDaemon(port=executor_port or DEFAULT_EXECUTOR_PORT, master_url=master_url,
+                                              on_event=self.record_event)
         from worker.resource_reporter import ResourceReporter
-        self.reporter = ResourceReporter()
+        self.reporter = ResourceReporter(
+            slots=self.executor_daemon.executor.slots,
+            interval=float(os.environ.get("DCLOUD_SAMPLE_INTERVAL", "5")),
+        )
         
     def _get_ip_address(self):
         try:
@@ -27,52 +50,128 @@ class WorkerAgent:
         except Exception:
             return "127.0.0.1"
 
-    def _collect_resources(self) -> NodeResources:
-        return self.reporter.collect()
+    def _collect_resources(self, full_layers: bool = False) -> NodeResources:
+        resources = self.reporter.collect(full_layers)
+        # Lets the master place jobs where their inputs already are
+        resources.cached_blobs = self.executor_daemon.executor.blob_cache.digests()
+        return resources
+
+    def _capabilities(self) -> dict:
+        capabilities = {"executors": self.executor_daemon.executor.executors()}
+        if self.executor_daemon.server:
+            capabilities["executor_port"] = self.executor_daemon.port
+            capabilities["executor_instance"] = self.executor_daemon.instance
+            slots = self.executor_daemon.executor.slots
+            if slots:
+                capabilities["cpu_pinning"] = slots.pinning
+                capabilities["numa_nodes"] = len(slots.numa)
+        return capabilities
 
     def register(self):
         node = Node(
             id=self.node_id,
             hostname=self.hostname,
             ip_address=self.ip_address,
-            ssh_user=os.getlogin() if hasattr(os, 'getlogin') else 'root', # Simple default
-            resources=self._collect_resources(),
+            ssh_user=getpass.getuser(), # os.getlogin() fails without a controlling tty (e.g. under systemd)
+            capabilities=self._capabilities(),
+            resources=self._collect_resources(full_layers=True), # a restarted master has no layers for us
             status=NodeStatus.ACTIVE
         )
         
         try:
             print(f"Registering with master at {self.master_url}...")
-            response = requests.post(f"{self.master_url}/api/nodes", json=node.dict())
+            response = self.client.post("/api/nodes", node.dict())
             response.raise_for_status()
+            self.reporter.mark_layers_sent()
             print("Successfully registered.")
+            self.registered = True
             return True
         except Exception as e:
             print(f"Registration failed: {e}")
             return False
 
-    def heartbeat(self):
+    def record_event(self, kind: str, **fields):
+        """Queue a job lifecycle event; it rides along with the next heartbeat"""
+        with self.events_lock:
+            if len(self.pending_events) >= MAX_PENDING_EVENTS:
+                self.pending_events.popleft()
+                self.events_dropped += 1
+                if self.events_dropped == 1:
+                    print(f"{MAX_PENDING_EVENTS} events waiting for the master; dropping the oldest")
+            self.pending_events.append((next(self.event_seq), {"type": kind, "ts": time.time(), **fields}))
+
+    def heartbeat(self) -> bool:
+        """
+        Send one batched report (resources, metrics, queued events). Events are
+        dropped only once the master has accepted them. Returns False on failure.
+        """
+        executor = self.executor_daemon.executor
+        image_cache = executor.image_cache
+        with self.events_lock:
+            sent = list(self.pending_events)
+            dropped = self.events_dropped
+        events = [event for _, event in sent]
+        if dropped:
+            events.insert(0, {"type": "events_dropped", "ts": time.time(), "count": dropped})
         try:
-            # We can send metrics here too
-            requests.post(f"{self.master_url}/api/nodes/{self.node_id}/heartbeat")
+            report = Heartbeat(resources=self._collect_resources(), events=events)
+            report.metrics["load"] = self.reporter.load_summary()
+            if image_cache:
+                report.metrics["image_cache"] = image_cache.stats()
+            if executor.warm_pool:
+                report.metrics["warm_pool"] = executor.warm_pool.stats()
+            if executor.slots:
+                report.metrics["slots"] = executor.slots.stats()
+            response = self.client.post(f"/api/nodes/{self.node_id}/heartbeat", report.dict())
+            if response.status_code == 404:
+                # Master restarted and forgot us
+                print("Master does not know this node; re-registering")
+                self.registered = False
+                return False
+            response.raise_for_status()
+            self.reporter.mark_layers_sent()
+            hints = response.json().get("prepull", [])
         except Exception as e:
             print(f"Heartbeat failed: {e}")
+            return False
+
+        with self.events_lock:
+            # By sequence: events queued (or dropped) while the report was in flight stay
+            last = sent[-1][0] if sent else -1
+            while self.pending_events and self.pending_events[0][0] <= last:
+                self.pending_events.popleft()
+            self.events_dropped -= dropped
+
+        if image_cache:
+            if hints:
+                image_cache.prepull(hints)
+            image_cache.evict_if_needed()
+        return True
 
     def start(self):
         self.running = True
-        if not self.register():
-            print("Retrying registration in 5s...")
-            time.sleep(5)
-            if not self.register():
-                print("Could not register. Exiting.")
-                return
+        try:
+            self.executor_daemon.start()
+        except OSError as e:
+            # Master falls back to spawning worker.execute_job per job
+            print(f"Executor daemon not started: {e}")
 
+        # Failures back off with full jitter so a fleet reconnecting after a master
+        # restart doesn't arrive in one burst; successes keep a jittered interval.
+        backoff = Backoff(base=1, cap=60)
         print("Worker agent started. Sending heartbeats...")
         while self.running:
-            self.heartbeat()
-            time.sleep(10) # 10s heartbeat for now
+            ok = self.heartbeat() if self.registered else self.register()
+            if ok:
+                backoff.reset()
+                delay = jittered(HEARTBEAT_INTERVAL)
+            else:
+                delay = backoff.next()
+                print(f"Master unreachable, retrying in {delay:.1f}s")
+            time.sleep(delay)
+        self.client.close()
 
 if __name__ == "__main__":
-    import os
     if len(sys.argv) > 1:
         MASTER_URL = sys.argv[1]
     else:
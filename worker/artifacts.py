@@ -0,0 +1,170 @@
+import glob
+import hashlib
+import os
+import shutil
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+import requests
+from common.models import Artifact
+
+CHUNK_SIZE = 4 * 1024 * 1024
+# Under the work dir: one empty marker per workspace kept for dependents, its mtime the last use
+KEPT_DIR = ".kept"
+# Fastest zlib level: outputs are often already compressed, so CPU matters more than ratio
+COMPRESS_LEVEL = 1
+
+def collect_outputs(job_dir: str, patterns: List[str]) -> List[str]:
+    """Regular files under job_dir matching the patterns (directories are walked), as relative paths"""
+    root = os.path.realpath(job_dir)
+    found = []
+    for pattern in patterns:
+        for match in sorted(glob.glob(os.path.join(root, pattern), recursive=True)):
+            if os.path.isdir(match) and not os.path.islink(match):
+                for dirpath, _, filenames in os.walk(match):
+                    found.extend(os.path.join(dirpath, name) for name in sorted(filenames))
+            else:
+                found.append(match)
+
+    paths = []
+    for path in found:
+        # The job controls the workspace: never follow links out of it
+        if os.path.islink(path) or not os.path.isfile(path):
+            continue
+        if not os.path.realpath(path).startswith(root + os.sep):
+            continue
+        rel = os.path.relpath(path, root)
+        if rel not in paths:
+            paths.append(rel)
+    return paths
+
+def sweep_workspaces(work_dir: str, max_age_s: float = 24 * 3600) -> int:
+    """Remove job workspaces left behind (e.g. by a crash) older than max_age_s"""
+    removed = 0
+    cutoff = time.time() - max_age_s
+    try:
+        entries = os.listdir(work_dir)
+    except OSError:
+        return 0
+    for name in entries:
+        path = os.path.join(work_dir, name)
+        # Dot-dirs belong to the blob cache and warm pool; kept workspaces to sweep_kept_workspaces
+        if name.startswith(".") or not os.path.isdir(path) or os.path.exists(os.path.join(work_dir, KEPT_DIR, name)):
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+def keep_workspace(job_dir: str):
+    """Mark a finished job's workspace as kept for its dependents, or refresh it when one uses it"""
+    marker = os.path.join(os.path.dirname(job_dir), KEPT_DIR, os.path.basename(job_dir))
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    with open(marker, "a"):
+        os.utime(marker)
+
+def sweep_kept_workspaces(work_dir: str, retain_s: float) -> int:
+    """
+    Remove kept workspaces nobody has used for retain_s. Markers live on disk, so
+    this finds those kept by any process: the executor daemon, an earlier daemon
+    or a one-off worker.execute_job.
+    """
+    removed = 0
+    cutoff = time.time() - retain_s
+    kept_dir = os.path.join(work_dir, KEPT_DIR)
+    try:
+        entries = os.listdir(kept_dir)
+    except OSError:
+        return 0
+    for name in entries:
+        marker = os.path.join(kept_dir, name)
+        try:
+            if os.path.getmtime(marker) >= cutoff:
+                continue
+            shutil.rmtree(os.path.join(work_dir, name), ignore_errors=True)
+            os.remove(marker)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+def fetch_artifacts(blob_cache, artifacts: List[Artifact], dest: str):
+    """Rebuild uploaded artifacts under dest from their chunks, fetched through the worker's blob cache"""
+    root = os.path.realpath(dest)
+    for artifact in artifacts:
+        target = os.path.realpath(os.path.join(root, artifact.path))
+        if not target.startswith(root + os.sep):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as out:
+            for digest in artifact.chunks:
+                source = blob_cache.ensure(digest)
+                try:
+                    with open(source, "rb") as f:
+                        shutil.copyfileobj(f, out)
+                finally:
+                    blob_cache.release(digest)
+
+
+class ArtifactUploader:
+    """
+    Ships a job's declared outputs to the master's blob store.
+
+    Files are split into fixed-size chunks addressed by sha256; the master is asked
+    which chunks it lacks, so unchanged outputs (or ones shared between jobs) are
+    never re-sent. Missing chunks are deflate-compressed and uploaded in parallel.
+    """
+    def __init__(self, master_url: str, parallelism: int = 4, chunk_size: int = CHUNK_SIZE):
+        self.master_url = master_url
+        self.parallelism = parallelism
+        self.chunk_size = chunk_size
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=parallelism)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def upload(self, job_dir: str, patterns: List[str]) -> List[Artifact]:
+        artifacts = []
+        # digest -> (file, offset, length) of one place the chunk can be read from
+        locations: Dict[str, Tuple[str, int, int]] = {}
+        for rel in collect_outputs(job_dir, patterns):
+            path = os.path.join(job_dir, rel)
+            chunks, size = [], 0
+            with open(path, "rb") as f:
+                while True:
+                    data = f.read(self.chunk_size)
+                    if not data:
+                        break
+                    digest = hashlib.sha256(data).hexdigest()
+                    chunks.append(digest)
+                    locations.setdefault(digest, (path, size, len(data)))
+                    size += len(data)
+            artifacts.append(Artifact(path=rel, size=size, chunks=chunks))
+
+        if locations:
+            missing = self._missing(list(locations))
+            with ThreadPoolExecutor(max_workers=self.parallelism) as pool:
+                # list() re-raises the first failed upload
+                list(pool.map(lambda digest: self._put_chunk(digest, *locations[digest]), missing))
+        return artifacts
+
+    def _missing(self, digests: List[str]) -> List[str]:
+        response = self.session.post(f"{self.master_url}/api/blobs/missing", json=digests, timeout=30)
+        response.raise_for_status()
+        return response.json()["missing"]
+
+    def _put_chunk(self, digest: str, path: str, offset: int, length: int):
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        response = self.session.put(
+            f"{self.master_url}/api/blobs/{digest}",
+            data=zlib.compress(data, COMPRESS_LEVEL),
+            headers={"Content-Encoding": "deflate", "Content-Type": "application/octet-stream"},
+            timeout=120,
+        )
+        response.raise_for_status()
@@ -0,0 +1,160 @@
+import fcntl
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+import requests
+from common.models import Job
+
+FICLONE = 0x40049409 # ioctl: share the source's extents copy-on-write (btrfs, xfs, ...)
+
+def _copy_blob(source: str, target: str):
+    """A private, writable copy of a cached blob; a reflink when the filesystem allows"""
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return
+        except OSError:
+            pass
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+class BlobCache:
+    """
+    Worker-local content-addressed cache of job input blobs.
+
+    Blobs are fetched from the master's blob store once, verified, made read-only,
+    and then shared by every job that references them: bind-mounted read-only into
+    containers. Process jobs get their own copy (a reflink where the filesystem
+    supports it), since a hardlink would let them chmod and rewrite the cached blob.
+    Least-recently-used blobs not in use by a running job are evicted once the
+    cache grows past `max_gb`.
+    """
+    def __init__(self, root: str = "/tmp/dcloud/.blobs", master_url: str = None, max_gb: float = 20.0):
+        self.root = root
+        self.master_url = master_url
+        self.max_bytes = int(max_gb * 1024**3)
+        self.session = requests.Session()
+        self.lru: "OrderedDict[str, int]" = OrderedDict() # digest -> size, oldest first
+        self.refs: Dict[str, int] = {}
+        self.fetching: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Pick up blobs from a previous run, ordered by last use (mtime)"""
+        found = []
+        for name in os.listdir(self.root):
+            if len(name) == 64 and not name.startswith("."):
+                st = os.stat(os.path.join(self.root, name))
+                found.append((st.st_mtime, name, st.st_size))
+        for _, digest, size in sorted(found):
+            self.lru[digest] = size
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest)
+
+    def digests(self) -> List[str]:
+        with self.lock:
+            return list(self.lru)
+
+    def ensure(self, digest: str) -> str:
+        """Local path of the blob, downloading it first if needed; marks it in use"""
+        with self.lock:
+            self.refs[digest] = self.refs.get(digest, 0) + 1
+            fetch_lock = self.fetching.setdefault(digest, threading.Lock())
+        try:
+            # One download per digest; concurrent jobs wait for it
+            with fetch_lock:
+                if digest not in self.lru:
+                    size = self._download(digest)
+                    with self.lock:
+                        self.lru[digest] = size
+            with self.lock:
+                self.lru.move_to_end(digest)
+            os.utime(self.path(digest))
+        except Exception:
+            self.release(digest)
+            raise
+        self._evict()
+        return self.path(digest)
+
+    def release(self, digest: str):
+        with self.lock:
+            count = self.refs.get(digest, 0) - 1
+            if count > 0:
+                self.refs[digest] = count
+            else:
+                self.refs.pop(digest, None)
+
+    def _download(self, digest: str) -> int:
+        if not self.master_url:
+            raise RuntimeError(f"Blob {digest} not cached and no master URL configured")
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".fetch-")
+        try:
+            with os.fdopen(fd, "wb") as f, self.session.get(f"{self.master_url}/api/blobs/{digest}", stream=True, timeout=60) as r:
+                r.raise_for_status()
+                for chunk in r.iter_content(chunk_size=1024 * 1024):
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            if hasher.hexdigest() != digest:
+                raise ValueError(f"Blob {digest} arrived corrupted")
+            os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_path, self.path(digest))
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return size
+
+    def _evict(self):
+        with self.lock:
+            total = sum(self.lru.values())
+            victims = []
+            for digest, size in self.lru.items():
+                if total <= self.max_bytes:
+                    break
+                if self.refs.get(digest):
+                    continue
+                victims.append(digest)
+                total -= size
+            for digest in victims:
+                del self.lru[digest]
+        for digest in victims:
+            try:
+                os.unlink(self.path(digest))
+            except OSError:
+                pass
+
+    def stage(self, job: Job, job_dir: str, copy: bool = False) -> List[str]:
+        """
+        Make the job's inputs appear under its workspace.
+        Returns docker bind specs ('host:container:ro'), or with copy=True copies
+        the files into job_dir directly and returns nothing. Call unstage() afterwards.
+        """
+        binds, held = [], []
+        try:
+            for blob in job.inputs:
+                source = self.ensure(blob.digest)
+                held.append(blob.digest)
+                if not copy:
+                    binds.append(f"{source}:/workspace/{blob.path}:ro")
+                    continue
+                target = os.path.join(job_dir, blob.path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                _copy_blob(source, target)
+        except Exception:
+            for digest in held:
+                self.release(digest)
+            raise
+        return binds
+
+    def unstage(self, job: Job):
+        for blob in job.inputs:
+            self.release(blob.digest)
@@ -0,0 +1,44 @@
+import random
+import requests
+from requests.adapters import HTTPAdapter
+
+class Backoff:
+    """Exponential backoff with full jitter, so many agents retrying at once spread out"""
+    def __init__(self, base: float = 1.0, cap: float = 60.0):
+        self.base = base
+        self.cap = cap
+        self.attempt = 0
+
+    def next(self) -> float:
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** self.attempt))
+        self.attempt += 1
+        return delay
+
+    def reset(self):
+        self.attempt = 0
+
+
+def jittered(interval: float, spread: float = 0.1) -> float:
+    """interval +/- spread, to keep agents that started together from staying in lockstep"""
+    return interval * random.uniform(1 - spread, 1 + spread)
+
+
+class ControlClient:
+    """
+    The agent's connection to the master API: one keep-alive session reused for
+    registration and every heartbeat instead of a new TCP connection per request.
+    Failed requests are not retried here; the agent loop owns backoff.
+    """
+    def __init__(self, master_url: str, timeout: float = 10.0, pool_size: int = 2):
+        self.master_url = master_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, path: str, payload: dict) -> requests.Response:
+        return self.session.post(f"{self.master_url}{path}", json=payload, timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
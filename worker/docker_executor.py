@@ -1,63 +1,606 @@
 import docker
+import math
 import os
+import re
+import shlex
+import shutil
+import threading
 import time
-from typing import Dict, Tuple, Optional
-from common.models import Job, JobResult
+import uuid
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Tuple, Optional
+from common.models import Job, JobResult, attempt_id
+from common.exceptions import ResourceUnavailableError
+from common.timing import elapsed_ms, timed
+from worker.log_stream import LogTail, OutputCallback
+from worker.image_cache import ImageCache
+from worker.blob_cache import BlobCache
+from worker.artifacts import ArtifactUploader, fetch_artifacts, keep_workspace, sweep_kept_workspaces
+from worker.process_executor import ProcessExecutor
+from worker.slot_manager import Slot, SlotManager
+from worker.kill_job import ATTEMPT_LABEL, JOB_LABEL
+
+# Keeps a warm container alive until we stop it; needs a POSIX shell in the image
+KEEPALIVE_COMMAND = "trap 'exit 0' TERM; while :; do sleep 3600 & wait $!; done"
+RESET_WORKSPACE = "rm -rf /workspace/* /workspace/.[!.]* /workspace/..?*"
+# EX_TEMPFAIL: the worker turned the job away, nothing ran
+REJECTED_EXIT_CODE = 75
+JOB_ID = re.compile(r"[A-Za-z0-9-]+") # what a parent job id may look like before it's used in a path
+CPU_PERIOD = 100000
+
+def cpu_limits(slot: Optional[Slot]) -> Dict[str, str]:
+    """cpuset options for a job's slot (empty when not pinned)"""
+    limits = {}
+    if slot and slot.cpuset:
+        limits["cpuset_cpus"] = slot.cpuset
+        if slot.numa_node is not None:
+            limits["cpuset_mems"] = str(slot.numa_node)
+    return limits
+
+def pump_output(open_stream: Callable[[], Iterable[Tuple[bytes, bytes]]], tails: Dict[str, LogTail],
+                on_output: Optional[OutputCallback]):
+    """Pump demultiplexed (stdout, stderr) chunks into the tails and the callback"""
+    try:
+        for out, err in open_stream():
+            for name, data in (("stdout", out), ("stderr", err)):
+                if not data:
+                    continue
+                text = tails[name].feed(data)
+                if text and on_output:
+                    on_output(name, text)
+    except Exception as e:
+        # Container removed under us (timeout) or daemon hiccup; keep what we have
+        print(f"Log stream ended: {e}")
+
+
+class _WarmContainer:
+    def __init__(self, container, image: str, workspace_dir: str):
+        self.container = container
+        self.image = image
+        self.workspace_dir = workspace_dir
+        self.uses = 0
+
+
+class WarmPool:
+    """
+    Idle containers kept running per image so short jobs skip create/teardown.
+
+    Jobs run through `docker exec` in a container whose /workspace is a per-container
+    directory. Before a job the job's workspace is moved into it; after it the
+    contents are moved back to /tmp/dcloud/<job_id> and the directory is wiped, so
+    the next job starts clean. Containers are recycled after `max_uses` jobs.
+
+    The idle target per image follows recent demand (Little's law: arrival rate over
+    the last `window_s` times average run time), capped at `max_idle_per_image`;
+    images with no recent demand drain to zero.
+    """
+    def __init__(self, client, work_dir: str = "/tmp/dcloud", max_uses: int = 50,
+                 max_idle_per_image: int = 4, window_s: int = 60, all_cpus: str = None, all_mems: str = None):
+        self.client = client
+        # cpusets restoring an unpinned container after a pinned job
+        self.all_cpus = all_cpus
+        self.all_mems = all_mems
+        self.pool_dir = os.path.join(work_dir, ".pool")
+        self.max_uses = max_uses
+        self.max_idle_per_image = max_idle_per_image
+        self.window_s = window_s
+        self.idle: Dict[str, List[_WarmContainer]] = {}
+        self.creating: Dict[str, int] = {}
+        self.demand: Dict[str, deque] = {}
+        self.avg_run_s: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "created": 0, "recycled": 0, "discarded": 0, "fallbacks": 0}
+        self.reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self.reaper.start()
+
+    def run(self, job: Job, job_dir: str, on_output: Optional[OutputCallback], start_time: float,
+            slot: Optional[Slot] = None) -> Optional[JobResult]:
+        """Run the job in a warm container. Returns None if the caller should fall back to a cold run."""
+        image = job.resource_requirements.docker_image
+        self._record_demand(image)
+        warm = self._acquire(image, job)
+        if warm is None:
+            with self.lock:
+                self.counters["fallbacks"] += 1
+            return None
+
+        started = time.perf_counter()
+        try:
+            self._apply_limits(warm, job, slot)
+            self._move_entries(job_dir, warm.workspace_dir)
+            cmd = self._command_for(image, job.command)
+            # DCLOUD_JOB_ID and DCLOUD_JOB_ATTEMPT let worker.kill_job find the exec's processes
+            exec_id = self.client.api.exec_create(warm.container.id, cmd, workdir="/workspace",
+                                                  environment=dict(job.env, DCLOUD_JOB_ID=job.id,
+                                                                   DCLOUD_JOB_ATTEMPT=attempt_id(job.started_at)))["Id"]
+        except Exception as e:
+            print(f"Warm container for {image} unusable, running cold: {e}")
+            self._move_entries(warm.workspace_dir, job_dir)
+            self._discard(warm)
+            with self.lock:
+                self.counters["fallbacks"] += 1
+            return None
+
+        tails = {"stdout": LogTail(), "stderr": LogTail()}
+        run_start = time.time()
+        stages = {"container_start": elapsed_ms(started)}
+        streamer = threading.Thread(
+            target=pump_output,
+            args=(lambda: self.client.api.exec_start(exec_id, stream=True, demux=True), tails, on_output),
+            daemon=True
+        )
+        # The exec's output ends when it exits, so run and log collection are one stage here
+        with timed(stages, "run"):
+            streamer.start()
+            streamer.join(timeout=job.resource_requirements.timeout)
+        timed_out = streamer.is_alive()
+
+        healthy = not timed_out
+        exit_code = 1
+        if timed_out:
+            # Can't kill a single exec; the container goes with it, once the workspace is back
+            try:
+                warm.container.kill()
+            except Exception:
+                pass
+        else:
+            try:
+                exit_code = self.client.api.exec_inspect(exec_id).get("ExitCode")
+                if exit_code is None:
+                    exit_code = 1
+            except Exception:
+                healthy = False
+
+        self._move_entries(warm.workspace_dir, job_dir)
+        if timed_out:
+            self._discard(warm)
+        else:
+            self._record_run_time(image, time.time() - run_start)
+            self._release(warm, healthy, job.resource_requirements.memory_mb)
+
+        stderr = tails["stderr"].text()
+        if timed_out:
+            stderr += f"\nExecution failed: timed out after {job.resource_requirements.timeout}s"
+        return JobResult(
+            exit_code=exit_code,
+            stdout=tails["stdout"].text(),
+            stderr=stderr,
+            execution_time_ms=int((time.time() - start_time) * 1000),
+            stages=stages,
+        )
+
+    def _command_for(self, image: str, command: str) -> List[str]:
+        # exec bypasses the image entrypoint, so apply it ourselves like `docker run` would
+        entrypoint = self.client.images.get(image).attrs.get("Config", {}).get("Entrypoint") or []
+        return list(entrypoint) + shlex.split(command)
+
+    def _apply_limits(self, warm: _WarmContainer, job: Job, slot: Optional[Slot]):
+        memory = f"{job.resource_requirements.memory_mb}m"
+        swap = f"{job.resource_requirements.memory_mb * 2}m"
+        limits = cpu_limits(slot)
+        if "cpuset_cpus" not in limits and self.all_cpus:
+            limits["cpuset_cpus"] = self.all_cpus
+        if "cpuset_mems" not in limits and self.all_mems:
+            limits["cpuset_mems"] = self.all_mems
+        # docker update has no nano_cpus; quota/period is the same limit
+        warm.container.update(
+            mem_limit=memory, memswap_limit=swap,
+            cpu_period=CPU_PERIOD, cpu_quota=job.resource_requirements.cpu_cores * CPU_PERIOD,
+            **limits
+        )
+
+    def _acquire(self, image: str, job: Job) -> Optional[_WarmContainer]:
+        with self.lock:
+            idle = self.idle.get(image)
+            if idle:
+                self.counters["hits"] += 1
+                return idle.pop()
+            self.counters["misses"] += 1
+        # Nothing idle: this job pays the create cost, later ones reuse the container
+        return self._create(image, job.resource_requirements.memory_mb)
+
+    def _create(self, image: str, memory_mb: int) -> Optional[_WarmContainer]:
+        workspace_dir = os.path.join(self.pool_dir, uuid.uuid4().hex[:12])
+        container = None
+        try:
+            os.makedirs(workspace_dir, exist_ok=True)
+            container = self.client.containers.run(
+                image=image,
+                entrypoint=["sh", "-c"],
+                command=[KEEPALIVE_COMMAND],
+                mem_limit=f"{memory_mb}m",
+                volumes={workspace_dir: {'bind': '/workspace', 'mode': 'rw'}},
+                working_dir='/workspace',
+                labels={"dcloud.warm_pool": "1"},
+                detach=True,
+            )
+            container.reload()
+            if container.status != "running":
+                raise RuntimeError(f"keepalive exited ({container.status}), image may lack a shell")
+        except Exception as e:
+            print(f"Could not start warm container for {image}: {e}")
+            shutil.rmtree(workspace_dir, ignore_errors=True)
+            if container:
+                try:
+                    container.remove(force=True)
+                except Exception:
+                    pass
+            return None
+        with self.lock:
+            self.counters["created"] += 1
+        return _WarmContainer(container, image, workspace_dir)
+
+    def _release(self, warm: _WarmContainer, healthy: bool, memory_mb: int = None):
+        warm.uses += 1
+        if not healthy or warm.uses >= self.max_uses:
+            if healthy:
+                with self.lock:
+                    self.counters["recycled"] += 1
+            self._discard(warm)
+            return
+        try:
+            self.client.api.exec_start(
+                self.client.api.exec_create(warm.container.id, ["sh", "-c", RESET_WORKSPACE])["Id"]
+            )
+        except Exception as e:
+            print(f"Workspace reset failed, discarding container: {e}")
+            self._discard(warm)
+            return
+        with self.lock:
+            self.idle.setdefault(warm.image, []).append(warm)
+        self._trim(warm.image, memory_mb)
+
+    def _discard(self, warm: _WarmContainer):
+        try:
+            warm.container.remove(force=True)
+        except Exception:
+            pass
+        shutil.rmtree(warm.workspace_dir, ignore_errors=True)
+        with self.lock:
+            self.counters["discarded"] += 1
+
+    def _move_entries(self, src: str, dst: str):
+        """Move workspace contents between the job dir and a container's; copy what can't be renamed"""
+        os.makedirs(dst, exist_ok=True)
+        for name in os.listdir(src):
+            source, target = os.path.join(src, name), os.path.join(dst, name)
+            try:
+                os.rename(source, target)
+            except OSError:
+                # e.g. root-owned directories written by the container
+                try:
+                    if os.path.isdir(source):
+                        shutil.copytree(source, target, dirs_exist_ok=True)
+                    else:
+                        shutil.copy2(source, target)
+                except OSError as e:
+                    print(f"Could not move {source}: {e}")
+
+    def _record_demand(self, image: str):
+        with self.lock:
+            self.demand.setdefault(image, deque(maxlen=1000)).append(time.time())
+
+    def _record_run_time(self, image: str, seconds: float):
+        with self.lock:
+            previous = self.avg_run_s.get(image, seconds)
+            self.avg_run_s[image] = 0.8 * previous + 0.2 * seconds
+
+    def target_idle(self, image: str) -> int:
+        with self.lock:
+            cutoff = time.time() - self.window_s
+            recent = sum(1 for t in self.demand.get(image, ()) if t >= cutoff)
+            if not recent:
+                return 0
+            rate = recent / self.window_s
+            busy = rate * self.avg_run_s.get(image, 1.0)
+            return min(self.max_idle_per_image, math.ceil(busy) + 1)
+
+    def _trim(self, image: str, memory_mb: int = None):
+        """Shrink the idle set to the demand target, or pre-warm towards it"""
+        target = self.target_idle(image)
+        with self.lock:
+            idle = self.idle.get(image, [])
+            surplus = idle[:max(0, len(idle) - target)]
+            del idle[:len(surplus)] # oldest first
+            missing = target - len(idle) - self.creating.get(image, 0)
+            if memory_mb and missing > 0:
+                self.creating[image] = self.creating.get(image, 0) + missing
+            else:
+                missing = 0
+        for warm in surplus:
+            self._discard(warm)
+        for _ in range(missing):
+            threading.Thread(target=self._prewarm, args=(image, memory_mb), daemon=True).start()
+
+    def _prewarm(self, image: str, memory_mb: int):
+        warm = self._create(image, memory_mb)
+        with self.lock:
+            self.creating[image] -= 1
+            if warm:
+                self.idle.setdefault(image, []).append(warm)
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(15)
+            with self.lock:
+                images = list(self.idle)
+            for image in images:
+                self._trim(image)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.counters)
+            stats["idle"] = sum(len(c) for c in self.idle.values())
+        return stats
+
+    def shutdown(self):
+        with self.lock:
+            containers = [w for idle in self.idle.values() for w in idle]
+            self.idle.clear()
+        for warm in containers:
+            self._discard(warm)
+
 
 class DockerExecutor:
-    def __init__(self):
+    def __init__(self, warm_pool: bool = False, slots: SlotManager = None, master_url: str = None,
+                 process: bool = False):
+        self.slots = slots # admission control; only meaningful in the long-lived daemon
         try:
             self.client = docker.from_env()
         except docker.errors.DockerException as e:
             print(f"Error connecting to Docker: {e}")
             self.client = None
+        self.image_cache = ImageCache.from_env(self.client) if self.client else None
+        # Opt-in: only worthwhile in a long-lived process (the executor daemon)
+        all_cpus = ",".join(str(c) for c in slots.cpus) if (slots and slots.pinning) else None
+        all_mems = ",".join(str(n) for n in sorted(slots.numa)) if (slots and slots.pinning) else None
+        self.warm_pool = WarmPool(self.client, all_cpus=all_cpus, all_mems=all_mems) if (warm_pool and self.client) else None
+        master_url = master_url or os.environ.get("DCLOUD_MASTER_URL")
+        self.blob_cache = BlobCache(master_url=master_url,
+                                    max_gb=float(os.environ.get("DCLOUD_BLOB_CACHE_GB", "20")))
+        self.uploader = ArtifactUploader(master_url) if master_url else None
+        # Opt-in native backend for trusted jobs that ask for executor="process"
+        self.process_executor = ProcessExecutor() if process else None
+        # Workspaces of jobs others depend on are kept this long after their last use for them to mount
+        self.retain_s = float(os.environ.get("DCLOUD_RETAIN_WORKSPACE_S", str(6 * 3600)))
 
-    def run_job(self, job: Job, work_dir: str = "/tmp/dcloud") -> JobResult:
-        if not self.client:
-            return JobResult(exit_code=1, stdout="", stderr="Docker not available on worker", execution_time_ms=0)
+    def executors(self) -> List[str]:
+        """Backends this worker can run, advertised to the master"""
+        available = ["docker"] if self.client else []
+        if self.process_executor:
+            available.append("process")
+        return available
+
+    def run_job(self, job: Job, work_dir: str = "/tmp/dcloud", on_output: Optional[OutputCallback] = None) -> JobResult:
+        """
+        Run the job in a container (or as a process, if it asks for that executor).
+        Output is handed to on_output(stream, text) while the job runs; only a
+        bounded tail is kept for the JobResult.
+        """
+        executor = job.resource_requirements.executor
+        if executor not in self.executors():
+            reason = "Docker not available on worker" if executor == "docker" else f"Executor '{executor}' not enabled on worker"
+            return JobResult(exit_code=1, stdout="", stderr=reason, execution_time_ms=0)
 
         start_time = time.time()
-        container = None
-        
+
+        # Admit against local capacity before touching anything
+        slot = None
+        if self.slots:
+            try:
+                slot = self.slots.acquire(job.id, job.resource_requirements.cpu_cores, job.resource_requirements.memory_mb)
+            except ResourceUnavailableError as e:
+                return JobResult(exit_code=REJECTED_EXIT_CODE, stdout="", stderr=f"Rejected by worker: {e}",
+                                 execution_time_ms=0, rejected=True)
+
+        try:
+            return self._run_in_slot(job, work_dir, on_output, start_time, slot)
+        finally:
+            if slot:
+                self.slots.release(slot)
+
+    def _run_in_slot(self, job: Job, work_dir: str, on_output: Optional[OutputCallback], start_time: float,
+                     slot: Optional[Slot]) -> JobResult:
         # Prepare workspace
         job_dir = os.path.join(work_dir, job.id)
         os.makedirs(job_dir, exist_ok=True)
-        
+
+        keep = False
+        try:
+            try:
+                self._stage_parents(job, job_dir)
+            except Exception as e:
+                return JobResult(exit_code=1, stdout="", stderr=f"Execution failed: could not stage parent outputs: {e}",
+                                 execution_time_ms=int((time.time() - start_time) * 1000))
+            result = self._run_in_workspace(job, job_dir, on_output, start_time, slot)
+            if job.outputs:
+                with timed(result.stages, "artifact_upload"):
+                    self._collect_artifacts(job, job_dir, result)
+            keep = job.keep_workspace and result.exit_code == 0
+            return result
+        finally:
+            if keep:
+                # Dependents placed here mount it read-only instead of fetching outputs
+                keep_workspace(job_dir)
+            else:
+                # Outputs have been shipped; nothing else reads the workspace
+                self._remove_workspace(job, job_dir)
+            sweep_kept_workspaces(work_dir, self.retain_s)
+
+    def _remove_workspace(self, job: Job, job_dir: str):
+        """
+        Delete a finished job's workspace. What a container wrote as root the worker's
+        user can't delete; that is cleared from inside a container of the job's image
+        first, as WarmPool resets its workspaces, and anything still left is logged.
+        """
+        failed = []
+        def note(func, path, exc_info):
+            if not isinstance(exc_info[1], FileNotFoundError):
+                failed.append(path)
+        shutil.rmtree(job_dir, onerror=note)
+        if failed and self.client and job.resource_requirements.executor == "docker":
+            try:
+                self.client.containers.run(job.resource_requirements.docker_image, entrypoint=["sh", "-c", RESET_WORKSPACE],
+                                           volumes=[f"{job_dir}:/workspace:rw"], remove=True)
+                failed.clear()
+                shutil.rmtree(job_dir, onerror=note)
+            except Exception as e:
+                print(f"Could not reset the workspace of job {job.id} from a container: {e}")
+        if failed:
+            print(f"Could not remove {len(failed)} path(s) of job {job.id}'s workspace, e.g. {failed[0]}")
+
+    def _stage_parents(self, job: Job, job_dir: str):
+        """
+        Make each finished dependency's data appear under parents/<job_id> in the
+        workspace: its kept workspace when it ran on this node and the job runs in a
+        container (a read-only bind, see _parent_binds), else its uploaded outputs.
+        Process jobs always get copies, since nothing could keep them from writing
+        to the parent's workspace itself.
+        """
+        for parent in job.parent_workspaces:
+            if not JOB_ID.fullmatch(parent.job_id):
+                continue
+            local = os.path.join(os.path.dirname(job_dir), parent.job_id)
+            target = os.path.join(job_dir, "parents", parent.job_id)
+            if os.path.isdir(local) and job.resource_requirements.executor != "process":
+                keep_workspace(local) # in use: not swept while dependents keep coming
+                continue
+            if parent.artifacts:
+                fetch_artifacts(self.blob_cache, parent.artifacts, target)
+
+    def _parent_binds(self, job: Job, job_dir: str) -> List[str]:
+        binds = []
+        for parent in job.parent_workspaces:
+            local = os.path.join(os.path.dirname(job_dir), parent.job_id)
+            if JOB_ID.fullmatch(parent.job_id) and os.path.isdir(local):
+                binds.append(f"{local}:/workspace/parents/{parent.job_id}:ro")
+        return binds
+
+    def _run_in_workspace(self, job: Job, job_dir: str, on_output: Optional[OutputCallback], start_time: float,
+                          slot: Optional[Slot]) -> JobResult:
+        if job.resource_requirements.executor == "process":
+            return self._run_process(job, job_dir, on_output, start_time, slot)
+
+        image = job.resource_requirements.docker_image
+        pulled = time.perf_counter()
+        try:
+            # Pull image only if it's missing or the tag is due for a refresh
+            self.image_cache.ensure(image)
+        except Exception as e:
+            return JobResult(
+                exit_code=1,
+                stdout="",
+                stderr=f"Execution failed: {str(e)}",
+                execution_time_ms=int((time.time() - start_time) * 1000)
+            )
+
+        try:
+            image_pull = elapsed_ms(pulled)
+            # Input mounts and networking are fixed at container creation, so jobs with inputs
+            # and gang members always start cold
+            result = None
+            if self.warm_pool and not job.inputs and job.gang_size == 1 and not self._parent_binds(job, job_dir):
+                result = self.warm_pool.run(job, job_dir, on_output, start_time, slot)
+            if not result:
+                result = self._run_cold(job, job_dir, on_output, start_time, slot)
+            result.stages["image_pull"] = image_pull
+            if job.cacheable:
+                # The master keys memoized results by what the tag actually pointed to
+                result.image_digest = self._image_id(image)
+            return result
+        finally:
+            self.image_cache.release(image)
+
+    def _image_id(self, image: str) -> Optional[str]:
+        try:
+            return self.client.images.get(image).id
+        except Exception:
+            return None
+
+    def _run_process(self, job: Job, job_dir: str, on_output: Optional[OutputCallback], start_time: float,
+                     slot: Optional[Slot]) -> JobResult:
+        # No mounts for a plain process: inputs are copied into the workspace
+        staging = time.perf_counter()
         try:
-            # Pull image
-            print(f"Pulling image {job.resource_requirements.docker_image}...")
-            self.client.images.pull(job.resource_requirements.docker_image)
-            
-            # Limits
-            # cpu_quota = job.resource_requirements.cpu_cores * 100000
-            # mem_limit = f"{job.resource_requirements.memory_mb}m"
-            
+            self.blob_cache.stage(job, job_dir, copy=True)
+        except Exception as e:
+            return JobResult(exit_code=1, stdout="", stderr=f"Execution failed: {e}",
+                             execution_time_ms=int((time.time() - start_time) * 1000))
+        input_staging = elapsed_ms(staging)
+        try:
+            result = self.process_executor.run(job, job_dir, on_output, start_time, slot)
+            result.stages["input_staging"] = input_staging
+            return result
+        finally:
+            self.blob_cache.unstage(job)
+
+    def _collect_artifacts(self, job: Job, job_dir: str, result: JobResult):
+        """Upload declared outputs (also for failed runs, to help debugging); a job whose outputs are lost fails"""
+        try:
+            if not self.uploader:
+                raise RuntimeError("no master URL configured on this worker")
+            result.artifacts = self.uploader.upload(job_dir, job.outputs)
+        except Exception as e:
+            result.stderr += f"\nArtifact upload failed: {e}"
+            if result.exit_code == 0:
+                result.exit_code = 1
+
+    def _run_cold(self, job: Job, job_dir: str, on_output: Optional[OutputCallback], start_time: float,
+                  slot: Optional[Slot] = None) -> JobResult:
+        container = None
+        staged = False
+        stages: Dict[str, float] = {}
+        try:
+            # Inputs are bind-mounted read-only from the shared blob cache instead of copied
+            with timed(stages, "input_staging"):
+                binds = [f"{job_dir}:/workspace:rw"] + self.blob_cache.stage(job, job_dir) + self._parent_binds(job, job_dir)
+            staged = True
             print(f"Starting container for job {job.id}...")
+            started = time.perf_counter()
             container = self.client.containers.run(
                 image=job.resource_requirements.docker_image,
                 command=job.command,
-                # nano_cpus=int(job.resource_requirements.cpu_cores * 1e9), # docker-py might calculate this differently
+                # Hard CPU quota matching what the master reserved, plus pinning if the slot has CPUs
+                nano_cpus=int(job.resource_requirements.cpu_cores * 1e9),
                 mem_limit=f"{job.resource_requirements.memory_mb}m",
-                volumes={job_dir: {'bind': '/workspace', 'mode': 'rw'}},
+                **cpu_limits(slot),
+                volumes=binds,
+                environment=job.env or None,
                 working_dir='/workspace',
+                labels={JOB_LABEL: job.id, ATTEMPT_LABEL: attempt_id(job.started_at)},
+                # Gang members reach each other at their nodes' addresses (DCLOUD_GANG_HOSTS)
+                network_mode="host" if job.gang_size > 1 else None,
                 detach=True,
                 # auto_remove=False # We want to read logs
             )
-            
+            stages["container_start"] = elapsed_ms(started)
+
+            # Follow the output while the container runs instead of reading it all at the end
+            # (logs=True replays anything written before we attached)
+            tails = {"stdout": LogTail(), "stderr": LogTail()}
+            streamer = threading.Thread(
+                target=pump_output,
+                args=(lambda: container.attach(stdout=True, stderr=True, stream=True, logs=True, demux=True), tails, on_output),
+                daemon=True
+            )
+            streamer.start()
+
             # Wait for completion (handling timeout)
-            # Simple wait for now
-            result = container.wait(timeout=job.resource_requirements.timeout)
+            with timed(stages, "run"):
+                result = container.wait(timeout=job.resource_requirements.timeout)
             exit_code = result.get('StatusCode', 1)
-            
-            stdout = container.logs(stdout=True, stderr=False).decode('utf-8')
-            stderr = container.logs(stdout=False, stderr=True).decode('utf-8')
-            
+
+            # The attach stream ends once the container exits
+            with timed(stages, "log_collection"):
+                streamer.join(timeout=10)
+
             end_time = time.time()
             return JobResult(
                 exit_code=exit_code,
-                stdout=stdout,
-                stderr=stderr,
-                execution_time_ms=int((end_time - start_time) * 1000)
+                stdout=tails["stdout"].text(),
+                stderr=tails["stderr"].text(),
+                execution_time_ms=int((end_time - start_time) * 1000),
+                stages=stages,
             )
 
         except Exception as e:
@@ -73,3 +616,5 @@ class DockerExecutor:
                     container.remove(force=True)
                 except:
                     pass
+            if staged:
+                self.blob_cache.unstage(job)
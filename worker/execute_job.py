@@ -1,29 +1,62 @@
+import os
 import sys
 import json
-import asyncio
-from common.models import Job
+import threading
+from contextlib import redirect_stdout
+from typing import Callable
+from common.models import Job, JobResult
+from common.log_protocol import log_frame
+from common.security import validate_job_command
 from worker.docker_executor import DockerExecutor
 
+def run_payload(executor: DockerExecutor, job_data: dict, emit: Callable[[str], None], dry_run: bool = False) -> JobResult:
+    """
+    Validate a job payload and run it, streaming log frames through emit.
+    With dry_run the job is parsed and the executor is ready, but nothing is started;
+    used to measure dispatch overhead.
+    """
+    job = Job(**job_data)
+    # The master checked this at submit; the daemon's port is reachable without going through it
+    if not validate_job_command(job.command):
+        return JobResult(exit_code=1, stdout="", stderr="Invalid command", execution_time_ms=0)
+    if dry_run:
+        return JobResult(exit_code=0, stdout="", stderr="", execution_time_ms=0)
+    return executor.run_job(job, on_output=lambda stream, data: emit(log_frame(stream, data)))
+
 def execute_job():
     """
     Entry point for executing a job.
-    Expected usage: python3 -m worker.execute_job '<json_job_payload>'
+    Expected usage: python3 -m worker.execute_job [--dry-run] '<json_job_payload>'
+
+    stdout is the channel back to the master: job output is streamed as one
+    log frame per line while the job runs, and the last line is the JobResult JSON.
     """
-    if len(sys.argv) < 2:
-        print("Usage: python3 -m worker.execute_job <json_job_payload>", file=sys.stderr)
+    args = [a for a in sys.argv[1:] if a != "--dry-run"]
+    dry_run = len(args) != len(sys.argv) - 1
+    if not args:
+        print("Usage: python3 -m worker.execute_job [--dry-run] <json_job_payload>", file=sys.stderr)
         sys.exit(1)
 
+    channel = sys.stdout
+    channel_lock = threading.Lock()
+
+    def emit(line: str):
+        with channel_lock:
+            channel.write(line + "\n")
+            channel.flush()
+
     try:
-        job_data = json.loads(sys.argv[1])
-        job = Job(**job_data)
-        
-        executor = DockerExecutor()
-        result = executor.run_job(job)
-        
+        job_data = json.loads(args[0])
+
+        # Keep executor chatter (pull progress etc.) off the result channel
+        with redirect_stdout(sys.stderr):
+            executor = DockerExecutor(process=os.environ.get("DCLOUD_PROCESS_EXECUTOR") == "1")
+            result = run_payload(executor, job_data, emit, dry_run=dry_run)
+
         # Print result as JSON to stdout for the caller (Master via SSH) to capture
-        print(result.json())
+        emit(result.json())
         sys.exit(result.exit_code)
-        
+
     except Exception as e:
         print(json.dumps({"error": str(e)}), file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,140 @@
+import hmac
+import json
+import os
+import secrets
+import socketserver
+import sys
+import threading
+import psutil
+from common.security import EXECUTOR_TOKEN_FILE
+from worker.docker_executor import DockerExecutor
+from worker.artifacts import sweep_kept_workspaces, sweep_workspaces
+from worker.slot_manager import SlotManager
+from worker.execute_job import run_payload
+
+DEFAULT_EXECUTOR_PORT = 7071
+
+class _ExecutorRequestHandler(socketserver.StreamRequestHandler):
+    """
+    One request per connection: the client sends a single JSON line
+    {"token": "...", "job": {...}, "dry_run": false} and gets back the same stream
+    execute_job prints (log frames, then the JobResult line) before the connection
+    closes. Requests without the daemon's token get {"error": "unauthorized"}.
+    """
+    def handle(self):
+        lock = threading.Lock()
+        connected = [True]
+
+        def emit(line: str):
+            # If the master goes away mid-job we still let the job finish
+            if not connected[0]:
+                return
+            with lock:
+                try:
+                    self.wfile.write((line + "\n").encode())
+                    self.wfile.flush()
+                except OSError:
+                    connected[0] = False
+
+        try:
+            request = json.loads(self.rfile.readline())
+            if not hmac.compare_digest(str(request.get("token", "")).encode(), self.server.token.encode()):
+                emit(json.dumps({"error": "unauthorized"}))
+                return
+            dry_run = request.get("dry_run", False)
+            job_id = request["job"].get("id")
+            if not dry_run:
+                self.server.on_event("job_started", job_id=job_id)
+            result = run_payload(self.server.executor, request["job"], emit, dry_run=dry_run)
+            if not dry_run:
+                # For the node's event log; the master settles the job from the result line below
+                self.server.on_event("job_finished", job_id=job_id, exit_code=result.exit_code,
+                                     execution_time_ms=result.execution_time_ms, rejected=result.rejected)
+            emit(result.json())
+        except Exception as e:
+            emit(json.dumps({"error": str(e)}))
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ExecutorDaemon:
+    """
+    Long-running job executor for a worker. Keeps the Docker client and models
+    loaded so a dispatch costs a socket round trip instead of a fresh interpreter.
+
+    Listens on loopback only; the master reaches it through a forwarded channel on
+    its pooled SSH connection. Other local users can reach the port too, so every
+    request must carry a token generated at start and written where only this
+    user (and so whoever can SSH in as them, like the master) can read it.
+    """
+    def __init__(self, port: int = DEFAULT_EXECUTOR_PORT, host: str = "127.0.0.1", executor: DockerExecutor = None,
+                 master_url: str = None, on_event=None, token_file: str = None):
+        self.host = host
+        self.port = port
+        self.token_file = token_file or os.path.join(os.path.expanduser("~"), EXECUTOR_TOKEN_FILE)
+        self.token = None
+        self.instance = None # advertised, so the master knows when to read a new token
+        self.on_event = on_event or (lambda kind, **fields: None)
+        if executor is None:
+            # Concurrent jobs are admitted against this node's CPUs and memory;
+            # DCLOUD_CPU_PINNING=1 also gives each job dedicated, NUMA-local CPUs
+            slots = SlotManager(
+                memory_mb=int(psutil.virtual_memory().total / (1024 * 1024)),
+                pinning=os.environ.get("DCLOUD_CPU_PINNING") == "1",
+            )
+            # DCLOUD_WARM_POOL=1 keeps idle containers per hot image (see WarmPool);
+            # DCLOUD_PROCESS_EXECUTOR=1 lets trusted jobs run as plain processes
+            executor = DockerExecutor(warm_pool=os.environ.get("DCLOUD_WARM_POOL") == "1", slots=slots,
+                                      master_url=master_url,
+                                      process=os.environ.get("DCLOUD_PROCESS_EXECUTOR") == "1")
+        self.executor = executor
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        # Workspaces are removed after each job (or kept a while for dependents); this
+        # catches ones orphaned by a crash or a restart
+        removed = sweep_workspaces("/tmp/dcloud") + sweep_kept_workspaces("/tmp/dcloud", self.executor.retain_s)
+        if removed:
+            print(f"Removed {removed} stale job workspaces")
+        self.token = secrets.token_hex(32)
+        self.instance = secrets.token_hex(8)
+        _write_private(self.token_file, self.token)
+        self.server = _ThreadingServer((self.host, self.port), _ExecutorRequestHandler)
+        self.server.token = self.token
+        self.server.executor = self.executor
+        self.server.on_event = self.on_event
+        # Port 0 picks a free port; report the real one
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Executor daemon listening on {self.host}:{self.port}")
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.executor.warm_pool:
+            self.executor.warm_pool.shutdown()
+
+
+def _write_private(path: str, content: str):
+    """Replace a file with one only this user can read (0600, in a 0700 directory)"""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        os.fchmod(f.fileno(), 0o600) # in case a stale tmp file had other bits
+        f.write(content)
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EXECUTOR_PORT
+    daemon = ExecutorDaemon(port=port)
+    daemon.start()
+    daemon.thread.join()
@@ -0,0 +1,217 @@
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Refresh policies for mutable tags (digest references are never re-pulled)
+REFRESH_NEVER = "never"     # pull only when the image is missing
+REFRESH_TTL = "ttl"         # re-pull a tag once it was last checked more than refresh_ttl ago
+REFRESH_ALWAYS = "always"   # re-pull on every job (the old behaviour)
+
+
+class _CacheEntry:
+    __slots__ = ("last_used", "last_checked", "refs")
+
+    def __init__(self, last_checked: float = 0.0):
+        self.last_used = 0.0
+        self.last_checked = last_checked
+        self.refs = 0 # jobs currently using the image
+
+
+class _PendingPull:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class ImageCache:
+    """
+    Worker-side view of the local Docker images.
+
+    - ensure() uses the local image when it is fresh enough, and only goes to the
+      registry when the image is missing or its tag is due for a refresh.
+    - Concurrent ensure() calls for the same image share a single pull.
+    - prepull() fetches images the master expects to send here, in the background.
+    - evict_if_needed() removes least-recently-used idle images while free disk
+      is below min_free_gb.
+    """
+    def __init__(self, client, refresh_policy: str = REFRESH_TTL, refresh_ttl: int = 3600,
+                 min_free_gb: float = 5.0, disk_path: str = "/"):
+        self.client = client
+        self.refresh_policy = refresh_policy
+        self.refresh_ttl = refresh_ttl
+        self.min_free_gb = min_free_gb
+        self.disk_path = disk_path
+        self.entries: Dict[str, _CacheEntry] = {}
+        self.pending: Dict[str, _PendingPull] = {}
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "collapsed": 0, "pull_errors": 0, "evictions": 0, "prepulls": 0}
+
+    @classmethod
+    def from_env(cls, client) -> "ImageCache":
+        return cls(
+            client,
+            refresh_policy=os.environ.get("DCLOUD_IMAGE_REFRESH", REFRESH_TTL),
+            refresh_ttl=int(os.environ.get("DCLOUD_IMAGE_REFRESH_TTL", "3600")),
+            min_free_gb=float(os.environ.get("DCLOUD_IMAGE_MIN_FREE_GB", "5")),
+            disk_path=os.environ.get("DCLOUD_DOCKER_ROOT", "/"),
+        )
+
+    def _needs_refresh(self, image: str, entry: _CacheEntry, now: float) -> bool:
+        if "@" in image:
+            return False # pinned by digest, content can't change
+        if self.refresh_policy == REFRESH_ALWAYS:
+            return True
+        if self.refresh_policy == REFRESH_TTL:
+            return now - entry.last_checked > self.refresh_ttl
+        return False
+
+    def ensure(self, image: str, hold: bool = True) -> bool:
+        """
+        Make sure `image` is available locally. Returns True on a cache hit.
+        With hold=True the image is marked in use until release() is called.
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(image)
+            if entry and not self._needs_refresh(image, entry, now):
+                self.counters["hits"] += 1
+                return self._touch(image, hold, now)
+
+            pending = self.pending.get(image)
+            leader = pending is None
+            if leader:
+                pending = _PendingPull()
+                self.pending[image] = pending
+            else:
+                self.counters["collapsed"] += 1
+
+        if not leader:
+            pending.done.wait()
+            if pending.error:
+                raise pending.error
+            with self.lock:
+                return self._touch(image, hold, time.time())
+
+        hit = False
+        try:
+            hit = self._fetch(image, known=entry is not None)
+        except Exception as e:
+            pending.error = e
+        finally:
+            with self.lock:
+                del self.pending[image]
+                if not pending.error:
+                    self.entries.setdefault(image, _CacheEntry()).last_checked = time.time()
+                    self.counters["hits" if hit else "misses"] += 1
+                else:
+                    self.counters["pull_errors"] += 1
+            pending.done.set()
+
+        if pending.error:
+            raise pending.error
+        with self.lock:
+            self._touch(image, hold, time.time())
+        if not hit:
+            self.evict_if_needed()
+        return hit
+
+    def _fetch(self, image: str, known: bool) -> bool:
+        """Pull or adopt a local copy; returns True if no registry transfer was needed"""
+        local = self._exists_locally(image)
+        if local and not known and self.refresh_policy != REFRESH_ALWAYS:
+            # First time we see it, but it's already on disk: trust it for one TTL window
+            return True
+        try:
+            print(f"Pulling image {image}...")
+            self.client.images.pull(image)
+            return False
+        except Exception as e:
+            if local:
+                # Registry unreachable; a slightly stale tag beats failing the job
+                print(f"Refresh of {image} failed, using local copy: {e}")
+                return True
+            raise
+
+    def _exists_locally(self, image: str) -> bool:
+        try:
+            self.client.images.get(image)
+            return True
+        except Exception:
+            return False
+
+    def _touch(self, image: str, hold: bool, now: float) -> bool:
+        entry = self.entries.setdefault(image, _CacheEntry(last_checked=now))
+        entry.last_used = now
+        if hold:
+            entry.refs += 1
+        return True
+
+    def release(self, image: str):
+        with self.lock:
+            entry = self.entries.get(image)
+            if entry and entry.refs > 0:
+                entry.refs -= 1
+
+    def prepull(self, images: Iterable[str]):
+        """Fetch hinted images in the background without holding them"""
+        for image in images:
+            with self.lock:
+                if image in self.entries or image in self.pending:
+                    continue
+                self.counters["prepulls"] += 1
+            threading.Thread(target=self._prepull_one, args=(image,), daemon=True).start()
+
+    def _prepull_one(self, image: str):
+        try:
+            self.ensure(image, hold=False)
+        except Exception as e:
+            print(f"Pre-pull of {image} failed: {e}")
+
+    def _free_gb(self) -> float:
+        return shutil.disk_usage(self.disk_path).free / (1024**3)
+
+    def evict_if_needed(self) -> List[str]:
+        """Remove idle images, least recently used first, until free disk is above the threshold"""
+        evicted = []
+        try:
+            if self._free_gb() >= self.min_free_gb:
+                return evicted
+            self._adopt_local_images()
+        except Exception as e:
+            print(f"Image eviction check failed: {e}")
+            return evicted
+
+        while True:
+            with self.lock:
+                idle = [(e.last_used, image) for image, e in self.entries.items()
+                        if e.refs == 0 and image not in self.pending]
+                if not idle:
+                    break
+                _, victim = min(idle)
+                del self.entries[victim]
+            try:
+                self.client.images.remove(victim)
+                evicted.append(victim)
+                with self.lock:
+                    self.counters["evictions"] += 1
+                print(f"Evicted image {victim} (low disk)")
+            except Exception as e:
+                print(f"Could not evict {victim}: {e}")
+            if self._free_gb() >= self.min_free_gb:
+                break
+        return evicted
+
+    def _adopt_local_images(self):
+        """Images pulled before we started are unknown to us; treat them as least recently used"""
+        tags = [tag for img in self.client.images.list() for tag in img.tags]
+        with self.lock:
+            for tag in tags:
+                self.entries.setdefault(tag, _CacheEntry())
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.counters)
+            stats["cached"] = len(self.entries)
+        return stats
@@ -0,0 +1,51 @@
+import os
+import signal
+import sys
+from typing import Optional
+import psutil
+
+JOB_LABEL = "dcloud.job_id" # on containers started for a single job
+ATTEMPT_LABEL = "dcloud.attempt" # common.models.attempt_id of the attempt the container runs
+
+def kill_job(job_id: str, attempt: Optional[str] = None) -> int:
+    """
+    Stop whatever is still running for a job on this worker: its own container
+    (by label) and any process carrying DCLOUD_JOB_ID (plain-process jobs and
+    warm-pool execs). Given an attempt, only that attempt's (DCLOUD_JOB_ATTEMPT),
+    so a retry already placed here again survives. Returns how many were killed.
+    """
+    killed = 0
+    labels = [f"{JOB_LABEL}={job_id}"] + ([f"{ATTEMPT_LABEL}={attempt}"] if attempt is not None else [])
+    try:
+        import docker
+        client = docker.from_env()
+        for container in client.containers.list(filters={"label": labels}):
+            container.kill()
+            killed += 1
+    except Exception as e:
+        print(f"Docker unavailable or kill failed: {e}", file=sys.stderr)
+
+    for proc in psutil.process_iter(["pid"]):
+        try:
+            env = proc.environ()
+            if env.get("DCLOUD_JOB_ID") != job_id or (attempt is not None and env.get("DCLOUD_JOB_ATTEMPT") != attempt):
+                continue
+            # Process jobs lead their own session; take the whole group down with them
+            try:
+                group = os.getpgid(proc.pid)
+                if group == os.getpgid(0):
+                    raise OSError("shares our process group")
+                os.killpg(group, signal.SIGKILL)
+            except OSError:
+                proc.kill()
+            killed += 1
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    return killed
+
+if __name__ == "__main__":
+    # Usage: python3 -m worker.kill_job <job_id> [attempt]
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python3 -m worker.kill_job <job_id> [attempt]", file=sys.stderr)
+        sys.exit(1)
+    print(kill_job(*sys.argv[1:]))
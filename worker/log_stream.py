@@ -0,0 +1,45 @@
+import codecs
+from collections import deque
+from typing import Callable
+
+# How much of each stream we keep in memory for the final JobResult.
+# Everything else has already been streamed to the master as it was produced.
+LOG_TAIL_BYTES = 64 * 1024
+
+# Callback signature used by the executors: on_output(stream_name, text)
+OutputCallback = Callable[[str, str], None]
+
+
+class LogTail:
+    """
+    Keeps only the last `max_bytes` of a byte stream, decoded as UTF-8.
+    Chunks can split multi-byte characters, so decoding is incremental.
+    """
+    def __init__(self, max_bytes: int = LOG_TAIL_BYTES):
+        self.max_bytes = max_bytes
+        self.chunks = deque()
+        self.size = 0
+        self.truncated = False
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def feed(self, data: bytes) -> str:
+        """Add raw bytes, return the newly decoded text"""
+        text = self._decoder.decode(data)
+        if not text:
+            return text
+        self.chunks.append(text)
+        self.size += len(text)
+        while self.size > self.max_bytes and len(self.chunks) > 1:
+            self.size -= len(self.chunks.popleft())
+            self.truncated = True
+        return text
+
+    def text(self) -> str:
+        text = "".join(self.chunks)
+        if len(text) > self.max_bytes:
+            text = text[-self.max_bytes:]
+            self.truncated = True
+        if self.truncated:
+            return "[... output truncated, see streamed logs ...]\n" + text
+        return text
+
@@ -0,0 +1,227 @@
+import os
+import resource
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from typing import Dict, Optional
+from common.models import Job, JobResult, attempt_id
+from common.timing import elapsed_ms, timed
+from worker.log_stream import LogTail, OutputCallback
+from worker.slot_manager import Slot
+
+CGROUP_FS = "/sys/fs/cgroup"
+CPU_PERIOD = 100000
+# The job is spawned through this shim, which waits on stdin until the worker has put it
+# in its cgroup and set its limits, then execs the command; nothing runs unlimited
+START_SHIM = 'IFS= read -r _ || exit 1; exec </dev/null; exec "$@"'
+
+def _lower_rlimit(pid: int, which: int, soft: int, hard: int = None):
+    """prlimit that never tries to raise the hard limit (unprivileged processes can't)"""
+    _, current_hard = resource.prlimit(pid, which)
+    hard = soft if hard is None else hard
+    if current_hard != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current_hard), min(hard, current_hard)
+    resource.prlimit(pid, which, (soft, hard))
+
+def _own_cgroup() -> Optional[str]:
+    """This process's cgroup v2 directory, if the unified hierarchy is mounted"""
+    if not os.path.exists(os.path.join(CGROUP_FS, "cgroup.controllers")):
+        return None
+    try:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return os.path.join(CGROUP_FS, line[3:].strip().lstrip("/"))
+    except OSError:
+        pass
+    return None
+
+
+class CgroupLimiter:
+    """
+    Per-job cgroup v2 groups under a delegated parent (DCLOUD_CGROUP_ROOT, e.g. a
+    systemd slice with Delegate=yes). Unavailable when the parent isn't writable or
+    the cpu/memory controllers can't be enabled there; callers then rely on rlimits.
+    """
+    def __init__(self, root: str = None):
+        self.root = root or os.environ.get("DCLOUD_CGROUP_ROOT") or _own_cgroup()
+        self.available = self._setup()
+
+    def _setup(self) -> bool:
+        if not self.root:
+            return False
+        try:
+            with open(os.path.join(self.root, "cgroup.subtree_control"), "w") as f:
+                f.write("+cpu +memory")
+            parent = os.path.join(self.root, "dcloud-jobs")
+            os.makedirs(parent, exist_ok=True)
+            with open(os.path.join(parent, "cgroup.subtree_control"), "w") as f:
+                f.write("+cpu +memory")
+            self.root = parent
+            return True
+        except OSError as e:
+            print(f"cgroup v2 limits unavailable ({e}); using rlimits only")
+            return False
+
+    def create(self, job_id: str, cpu_cores: int, memory_mb: int) -> Optional[str]:
+        if not self.available:
+            return None
+        path = os.path.join(self.root, job_id)
+        try:
+            os.makedirs(path, exist_ok=True)
+            self._write(path, "memory.max", str(memory_mb * 1024 * 1024))
+            self._write(path, "memory.swap.max", "0")
+            self._write(path, "cpu.max", f"{cpu_cores * CPU_PERIOD} {CPU_PERIOD}")
+            return path
+        except OSError as e:
+            print(f"Could not create cgroup for job {job_id}: {e}")
+            self.remove(path)
+            return None
+
+    def _write(self, path: str, name: str, value: str):
+        try:
+            with open(os.path.join(path, name), "w") as f:
+                f.write(value)
+        except FileNotFoundError:
+            if name != "memory.swap.max": # absent when swap accounting is off
+                raise
+
+    def remove(self, path: str):
+        # Kill anything the job left running (cgroup.kill needs 5.14+), then drop the group
+        try:
+            with open(os.path.join(path, "cgroup.kill"), "w") as f:
+                f.write("1")
+        except OSError:
+            pass
+        for _ in range(50):
+            try:
+                os.rmdir(path)
+                return
+            except FileNotFoundError:
+                return
+            except OSError:
+                time.sleep(0.02)
+
+
+class ProcessExecutor:
+    """
+    Runs a job as a plain process on the worker, for trusted short jobs where
+    container create/teardown dominates the run time.
+
+    The job runs in its own session with the workspace as working directory, HOME
+    and TMPDIR, a minimal environment and a private umask. CPU and memory are capped
+    with a cgroup v2 group when one can be created, otherwise with rlimits; pinned
+    slots also set the CPU affinity. On timeout the whole process group (and
+    cgroup) is killed. This is isolation from accidents, not from hostile code.
+    """
+    def __init__(self, cgroups: CgroupLimiter = None):
+        self.cgroups = cgroups or CgroupLimiter()
+
+    def run(self, job: Job, job_dir: str, on_output: Optional[OutputCallback], start_time: float,
+            slot: Optional[Slot] = None) -> JobResult:
+        reqs = job.resource_requirements
+        cgroup = self.cgroups.create(job.id, reqs.cpu_cores, reqs.memory_mb)
+        env = {
+            "PATH": os.environ.get("PATH", "/usr/local/bin:/usr/bin:/bin"),
+            "HOME": job_dir,
+            "TMPDIR": job_dir,
+            "LANG": "C.UTF-8",
+        }
+        env.update(job.env)
+        env["DCLOUD_JOB_ID"] = job.id
+        env["DCLOUD_JOB_ATTEMPT"] = attempt_id(job.started_at)
+        tails = {"stdout": LogTail(), "stderr": LogTail()}
+        timed_out = False
+        stages: Dict[str, float] = {}
+        started = time.perf_counter()
+        # No preexec_fn: the daemon is multithreaded, so the forked child must not run Python
+        proc = None
+        try:
+            proc = subprocess.Popen(
+                ["sh", "-c", START_SHIM, "sh"] + shlex.split(job.command),
+                cwd=job_dir,
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,
+                umask=0o077,
+            )
+            self._apply_limits(proc.pid, job, cgroup, slot)
+            proc.stdin.write(b"\n")
+            proc.stdin.close()
+        except Exception as e:
+            if proc:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                proc.wait()
+                for pipe in (proc.stdin, proc.stdout, proc.stderr):
+                    pipe.close()
+            if cgroup:
+                self.cgroups.remove(cgroup)
+            return JobResult(exit_code=1, stdout="", stderr=f"Execution failed: {e}",
+                             execution_time_ms=int((time.time() - start_time) * 1000))
+
+        readers = [
+            threading.Thread(target=self._pump, args=(proc.stdout, "stdout", tails, on_output), daemon=True),
+            threading.Thread(target=self._pump, args=(proc.stderr, "stderr", tails, on_output), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        stages["container_start"] = elapsed_ms(started) # spawn; no container, same place in the lifecycle
+        running = time.perf_counter()
+        try:
+            exit_code = proc.wait(timeout=reqs.timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            exit_code = proc.wait()
+        finally:
+            if cgroup:
+                self.cgroups.remove(cgroup)
+        stages["run"] = elapsed_ms(running)
+        with timed(stages, "log_collection"):
+            for reader in readers:
+                reader.join(timeout=10)
+
+        stderr = tails["stderr"].text()
+        if timed_out:
+            stderr += f"\nExecution failed: timed out after {reqs.timeout}s"
+        return JobResult(
+            exit_code=exit_code if exit_code >= 0 else 128 - exit_code, # killed by signal N -> 128+N like a shell
+            stdout=tails["stdout"].text(),
+            stderr=stderr,
+            execution_time_ms=int((time.time() - start_time) * 1000),
+            stages=stages,
+        )
+
+    def _apply_limits(self, pid: int, job: Job, cgroup: Optional[str], slot: Optional[Slot]):
+        """Cap the waiting shim from here; the job inherits it all when the shim execs"""
+        reqs = job.resource_requirements
+        if cgroup:
+            with open(os.path.join(cgroup, "cgroup.procs"), "w") as f:
+                f.write(str(pid))
+        else:
+            # Address-space cap is cruder than memory.max but needs no privileges
+            _lower_rlimit(pid, resource.RLIMIT_AS, reqs.memory_mb * 1024 * 1024)
+        # Backstop for runaway CPU even if the wall-clock timeout is missed
+        cpu_seconds = reqs.timeout * reqs.cpu_cores + 5
+        _lower_rlimit(pid, resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 5)
+        _lower_rlimit(pid, resource.RLIMIT_CORE, 0)
+        if slot and slot.cpus:
+            os.sched_setaffinity(pid, slot.cpus)
+
+    def _pump(self, pipe, name: str, tails: Dict[str, LogTail], on_output: Optional[OutputCallback]):
+        # read1 returns whatever is available, so output is forwarded as it's produced
+        for data in iter(lambda: pipe.read1(65536), b""):
+            text = tails[name].feed(data)
+            if text and on_output:
+                on_output(name, text)
+        pipe.close()
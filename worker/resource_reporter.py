@@ -1,10 +1,63 @@
 import psutil
+import shutil
+import subprocess
+import threading
 import time
-from typing import Dict, Any
+from collections import deque
+from typing import Dict, Any, List, Optional, Set, Tuple
 from common.models import NodeResources
 
+# Layer lists go out with a heartbeat when they change, and in full at least this often
+LAYER_REPORT_INTERVAL_S = 300
+
+def image_layers(image) -> List[Tuple[str, int]]:
+    """(digest, bytes) of each layer of a local image (docker SDK Image), base layer first"""
+    layers = image.attrs.get("RootFS", {}).get("Layers", [])
+    if not layers:
+        return []
+    # History lists one entry per build step, newest first; only steps that wrote files have a size
+    sizes = [entry.get("Size", 0) for entry in reversed(image.history()) if entry.get("Size")]
+    if len(sizes) != len(layers):
+        # Some layer was empty, so steps and layers can't be matched up: spread the total instead
+        sizes = [image.attrs.get("Size", 0) // len(layers)] * len(layers)
+    return list(zip(layers, sizes))
+
+class RollingSeries:
+    """Fixed-size window of samples with an EWMA and the window peak"""
+    def __init__(self, size: int = 60, alpha: float = 0.3):
+        self.samples = deque(maxlen=size)
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+
+    def add(self, value: float):
+        self.samples.append(value)
+        self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+
+    @property
+    def peak(self) -> float:
+        return max(self.samples) if self.samples else 0.0
+
+    @property
+    def last(self) -> float:
+        return self.samples[-1] if self.samples else 0.0
+
+
 class ResourceReporter:
-    def __init__(self):
+    """
+    Node resource reporting that is cheap to call from the heartbeat.
+
+    Static facts (core count, GPU presence, disk size) are probed once. A background
+    thread samples CPU, memory and free disk every `interval` seconds into rolling
+    windows, and the Docker image set (with each image's layers, inspected once per
+    image ID) is kept current from Docker's event stream instead of listing all
+    images each time. collect() only reads these values, so a heartbeat costs next
+    to nothing even on small nodes like a Raspberry Pi.
+    """
+    def __init__(self, slots=None, interval: float = 5.0, window: int = 60, disk_path: str = '/'):
+        # Local SlotManager, if any: capacity already promised to running jobs isn't available
+        self.slots = slots
+        self.interval = interval
+        self.disk_path = disk_path
         self.last_net_io = psutil.net_io_counters()
         self.last_time = time.time()
         try:
@@ -13,75 +66,193 @@ class ResourceReporter:
         except Exception:
             self.docker_client = None
 
-    def collect(self) -> NodeResources:
-        # Memory
-        vm = psutil.virtual_memory()
-        
-        # Disk (Root partition)
-        disk = psutil.disk_usage('/')
-        
-        # CPU
-        # interval=None is non-blocking but requires a previous call or it returns 0.0 first time.
-        # We might want to call it once in __init__? 
-        # But psutil.cpu_percent with interval=None compares to last call. 
-        # If we want accurate "current" load, we might need a small interval or rely on the agent calling it periodically.
-        # The agent calls it every heartbeat.
-        cpu_percent = psutil.cpu_percent(interval=None) 
-        cpu_count = psutil.cpu_count(logical=True)
-        
-        # Estimate available CPU cores
-        # If usage is 50% on 4 cores, we treat it as 2 cores available.
-        cpu_available = max(0, int(cpu_count * (1 - cpu_percent / 100)))
-
-        # GPU Check (Mock or simplified for now, as nvidia-smi bindings might not be present)
-        gpu_available = False
+        # Static facts
+        self.cpu_count = psutil.cpu_count(logical=True)
+        self.memory_total_mb = int(psutil.virtual_memory().total / (1024 * 1024))
+        self.disk_total_gb = round(psutil.disk_usage(disk_path).total / (1024**3), 2)
+        self.gpu_available = self._probe_gpu()
+
+        # Rolling windows
+        self.cpu_percent = RollingSeries(window)
+        self.memory_available_mb = RollingSeries(window)
+        self.disk_free_gb = RollingSeries(window)
+        self.images: Set[str] = set()
+        self.images_lock = threading.Lock()
+        self.layers: Dict[str, List[Tuple[str, int]]] = {} # tag or repo digest -> layers
+        self.layers_by_id: Dict[str, List[Tuple[str, int]]] = {} # image ID -> layers, never change
+        self.layers_changed = True
+        self.layers_unconfirmed = False # layers went out in a report the master hasn't acknowledged yet
+        self.layers_sent = 0.0
+
+        psutil.cpu_percent(interval=None) # prime: the first non-blocking call always returns 0.0
+        self._sample()
+        self._sync_images()
+
+        self.running = True
+        threading.Thread(target=self._sample_loop, daemon=True).start()
+        if self.docker_client:
+            threading.Thread(target=self._watch_images, daemon=True).start()
+
+    def _probe_gpu(self) -> bool:
+        # simple check if nvidia-smi exists and sees a device; done once, not per heartbeat
+        if not shutil.which('nvidia-smi'):
+            return False
         try:
-            # simple check if nvidia-smi exists
-            import subprocess
-            subprocess.check_call(['nvidia-smi', '-L'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            gpu_available = True
+            subprocess.check_call(['nvidia-smi', '-L'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+            return True
         except Exception:
-            pass
+            return False
 
-        cached_images = []
-        if self.docker_client:
+    def _sample(self):
+        self.cpu_percent.add(psutil.cpu_percent(interval=None))
+        self.memory_available_mb.add(psutil.virtual_memory().available / (1024 * 1024))
+        self.disk_free_gb.add(psutil.disk_usage(self.disk_path).free / (1024**3))
+
+    def _sample_loop(self):
+        while self.running:
+            time.sleep(self.interval)
             try:
-                # List image tags
-                for img in self.docker_client.images.list():
-                    if img.tags:
-                        cached_images.extend(img.tags)
+                self._sample()
+            except Exception as e:
+                print(f"Resource sampling failed: {e}")
+
+    def _sync_images(self):
+        if not self.docker_client:
+            return
+        try:
+            images = self.docker_client.images.list()
+            tags = {tag for img in images for tag in img.tags}
+            layers = {}
+            for img in images:
+                for name in img.tags + img.attrs.get("RepoDigests", []):
+                    layers[name] = self._layers_of(img)
+            ids = {img.id for img in images}
+        except Exception:
+            return
+        with self.images_lock:
+            self.images = tags
+            if layers != self.layers:
+                self.layers = layers
+                self.layers_changed = True
+            self.layers_by_id = {image_id: cached for image_id, cached in self.layers_by_id.items() if image_id in ids}
+
+    def _layers_of(self, img) -> List[Tuple[str, int]]:
+        cached = self.layers_by_id.get(img.id)
+        if cached is None:
+            # images.list() summaries lack RootFS; inspect once per image ID
+            try:
+                cached = image_layers(self.docker_client.images.get(img.id))
             except Exception:
-                pass
+                return [] # e.g. removed meanwhile; try again on the next sync
+            self.layers_by_id[img.id] = cached
+        return cached
+
+    def _watch_images(self):
+        """Follow image events; on any stream error resync the full list and re-subscribe"""
+        backoff = 1
+        while self.running:
+            try:
+                since = int(time.time())
+                self._sync_images() # catch up on anything missed while disconnected
+                for event in self.docker_client.events(decode=True, since=since, filters={"type": "image"}):
+                    backoff = 1
+                    self._apply_image_event(event)
+            except Exception as e:
+                print(f"Docker event stream lost: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def _apply_image_event(self, event: Dict[str, Any]):
+        action = event.get("Action") or event.get("status")
+        if action in ("pull", "tag", "load", "import"):
+            name = event.get("Actor", {}).get("Attributes", {}).get("name") or event.get("id")
+            if name and ":" in name and "sha256:" not in name:
+                try:
+                    layers = self._layers_of(self.docker_client.images.get(name))
+                except Exception:
+                    layers = []
+                with self.images_lock:
+                    self.images.add(name)
+                    if layers and self.layers.get(name) != layers:
+                        self.layers[name] = layers
+                        self.layers_changed = True
+        elif action in ("untag", "delete"):
+            # These only carry the image id, so look up which tags survive
+            self._sync_images()
+
+    def collect(self, full_layers: bool = False) -> NodeResources:
+        """
+        Current resources; layers are included if they changed, are due, weren't
+        confirmed yet, or full_layers. Call mark_layers_sent() once the report is accepted.
+        """
+        # Smoothed values: a momentary spike shouldn't make cores disappear for a whole heartbeat
+        cpu_load = self.cpu_percent.ewma or 0.0
+        cpu_available = max(0.0, self.cpu_count * (1 - cpu_load / 100))
+        memory_available_mb = int(self.memory_available_mb.ewma or 0)
+        if self.slots:
+            cpu_available = min(cpu_available, self.slots.free_cores())
+            if self.slots.free_memory_mb() is not None:
+                memory_available_mb = min(memory_available_mb, self.slots.free_memory_mb())
+
+        layer_lists, layer_sizes = None, None
+        with self.images_lock:
+            cached_images = sorted(self.images)
+            if (full_layers or self.layers_changed or self.layers_unconfirmed
+                    or time.time() - self.layers_sent > LAYER_REPORT_INTERVAL_S):
+                layer_lists = {name: [digest for digest, _ in layers] for name, layers in self.layers.items()}
+                layer_sizes = {digest: size for layers in self.layers.values() for digest, size in layers}
+                # A change from here on sets layers_changed again and goes out with the next report
+                self.layers_changed = False
+                self.layers_unconfirmed = True
 
         return NodeResources(
-            cpu_total=cpu_count,
-            cpu_available=cpu_available,
-            memory_total_mb=int(vm.total / (1024 * 1024)),
-            memory_available_mb=int(vm.available / (1024 * 1024)),
-            disk_total_gb=round(disk.total / (1024**3), 2),
-            disk_free_gb=round(disk.free / (1024**3), 2),
-            gpu_available=gpu_available,
-            cached_images=cached_images
+            cpu_total=self.cpu_count,
+            cpu_available=round(cpu_available, 2),
+            memory_total_mb=self.memory_total_mb,
+            memory_available_mb=memory_available_mb,
+            disk_total_gb=self.disk_total_gb,
+            disk_free_gb=round(self.disk_free_gb.last, 2),
+            gpu_available=self.gpu_available,
+            cached_images=cached_images,
+            image_layers=layer_lists,
+            layer_sizes=layer_sizes,
         )
 
+    def mark_layers_sent(self):
+        """The master accepted the last collected report; until then every report repeats the layers"""
+        with self.images_lock:
+            if self.layers_unconfirmed:
+                self.layers_unconfirmed = False
+                self.layers_sent = time.time()
+
+    def load_summary(self) -> Dict[str, float]:
+        """Smoothed and peak load over the sampling window, for heartbeat metrics"""
+        return {
+            "cpu_percent_ewma": round(self.cpu_percent.ewma or 0.0, 1),
+            "cpu_percent_peak": round(self.cpu_percent.peak, 1),
+            "memory_available_mb_min": int(min(self.memory_available_mb.samples, default=0)),
+        }
+
     def get_metrics_json(self) -> Dict[str, Any]:
         """Detailed metrics for logging/monitoring beyond scheduling"""
         cpu_per_core = psutil.cpu_percent(interval=None, percpu=True)
-        
+
         # Network Speed Calculation
         curr_net = psutil.net_io_counters()
         curr_time = time.time()
         dt = curr_time - self.last_time
-        
+
         bytes_sent_sec = (curr_net.bytes_sent - self.last_net_io.bytes_sent) / dt if dt > 0 else 0
         bytes_recv_sec = (curr_net.bytes_recv - self.last_net_io.bytes_recv) / dt if dt > 0 else 0
-        
+
         self.last_net_io = curr_net
         self.last_time = curr_time
 
         return {
             "cpu": {
-                "usage_percent": psutil.cpu_percent(interval=None),
+                "usage_percent": self.cpu_percent.last,
+                "usage_percent_ewma": self.cpu_percent.ewma,
+                "usage_percent_peak": self.cpu_percent.peak,
                 "per_core": cpu_per_core
             },
             "memory": dict(psutil.virtual_memory()._asdict()),
@@ -90,3 +261,6 @@ class ResourceReporter:
                 "bytes_recv_sec": bytes_recv_sec
             }
         }
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,133 @@
+import glob
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+from common.exceptions import ResourceUnavailableError
+
+NUMA_SYSFS = "/sys/devices/system/node"
+
+def parse_cpulist(text: str) -> List[int]:
+    """Parse a kernel cpulist such as '0-3,8,10-11'"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+def read_numa_topology(cpus: List[int]) -> Dict[int, List[int]]:
+    """NUMA node -> usable CPUs. Machines without sysfs NUMA info count as one node."""
+    usable = set(cpus)
+    topology = {}
+    for path in glob.glob(os.path.join(NUMA_SYSFS, "node[0-9]*", "cpulist")):
+        node = int(re.search(r"node(\d+)", path).group(1))
+        try:
+            with open(path) as f:
+                node_cpus = [c for c in parse_cpulist(f.read()) if c in usable]
+        except OSError:
+            continue
+        if node_cpus:
+            topology[node] = node_cpus
+    return topology or {0: sorted(usable)}
+
+
+class Slot:
+    def __init__(self, job_id: str, cpu_cores: int, memory_mb: int, cpus: List[int] = None, numa_node: Optional[int] = None):
+        self.job_id = job_id
+        self.cpu_cores = cpu_cores
+        self.memory_mb = memory_mb
+        self.cpus = cpus or [] # empty unless pinned
+        self.numa_node = numa_node # set when all pinned CPUs share one NUMA node
+
+    @property
+    def cpuset(self) -> Optional[str]:
+        return ",".join(str(c) for c in self.cpus) if self.cpus else None
+
+
+class SlotManager:
+    """
+    Local admission control for concurrent jobs on a worker.
+
+    Every job gets a slot sized by its ResourceRequirements; the sum of slots never
+    exceeds the node's CPUs and memory, so what the master reserved is what the
+    containers are limited to. With pinning enabled, slots also get dedicated CPUs,
+    taken from a single NUMA node when one has room (best fit, to keep larger
+    holes free for later jobs) and spread across nodes only when none does.
+    """
+    def __init__(self, cpus: List[int] = None, memory_mb: int = None, pinning: bool = False):
+        if cpus is None:
+            cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+        self.pinning = pinning
+        self.numa = read_numa_topology(cpus)
+        self.free_cpus = set(cpus)
+        self.used_cores = 0
+        self.used_memory_mb = 0
+        self.slots: Dict[str, Slot] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, job_id: str, cpu_cores: int, memory_mb: int) -> Slot:
+        with self.lock:
+            if self.used_cores + cpu_cores > len(self.cpus):
+                raise ResourceUnavailableError(
+                    f"Need {cpu_cores} cores, {len(self.cpus) - self.used_cores} of {len(self.cpus)} free")
+            if self.memory_mb is not None and self.used_memory_mb + memory_mb > self.memory_mb:
+                raise ResourceUnavailableError(
+                    f"Need {memory_mb} MB, {self.memory_mb - self.used_memory_mb} MB free")
+
+            cpus, numa_node = [], None
+            if self.pinning:
+                cpus, numa_node = self._pick_cpus(cpu_cores)
+                self.free_cpus.difference_update(cpus)
+
+            slot = Slot(job_id, cpu_cores, memory_mb, cpus, numa_node)
+            self.used_cores += cpu_cores
+            self.used_memory_mb += memory_mb
+            self.slots[job_id] = slot
+            return slot
+
+    def _pick_cpus(self, count: int):
+        free_by_node = {node: [c for c in cpus if c in self.free_cpus] for node, cpus in self.numa.items()}
+        fitting = [(len(free), node) for node, free in free_by_node.items() if len(free) >= count]
+        if fitting:
+            _, node = min(fitting)
+            return free_by_node[node][:count], node
+
+        # No single node has room: span, emptiest nodes first
+        picked = []
+        for node in sorted(free_by_node, key=lambda n: -len(free_by_node[n])):
+            picked.extend(free_by_node[node][:count - len(picked)])
+            if len(picked) == count:
+                return picked, None
+        raise ResourceUnavailableError(f"Need {count} dedicated CPUs, {len(self.free_cpus)} free")
+
+    def release(self, slot: Slot):
+        with self.lock:
+            if self.slots.pop(slot.job_id, None) is None:
+                return
+            self.used_cores -= slot.cpu_cores
+            self.used_memory_mb -= slot.memory_mb
+            self.free_cpus.update(slot.cpus)
+
+    def free_cores(self) -> int:
+        with self.lock:
+            return len(self.cpus) - self.used_cores
+
+    def free_memory_mb(self) -> Optional[int]:
+        with self.lock:
+            return None if self.memory_mb is None else self.memory_mb - self.used_memory_mb
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "slots": len(self.slots),
+                "cores_total": len(self.cpus),
+                "cores_used": self.used_cores,
+                "pinned_cpus_free": len(self.free_cpus) if self.pinning else None,
+            }